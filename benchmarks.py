@@ -0,0 +1,210 @@
+# Benchmark corpus and measurement helpers for the scheduling engines
+import argparse
+import contextlib
+import io
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from weather_source import weather_payload_to_rows
+from solvers import build_weather_grid, load_engines, solve
+from problem_cache import clear_caches
+from milp import optimal_starts
+from multires import rank_minutes
+
+# Constants and Global Variables
+BENCHMARK_DAY = "2024-06-01"
+
+# Import every engine up front, so module import time never lands in a measurement
+load_engines()
+
+
+# Deterministic API-shaped payload: dry morning, overcast early afternoon, rain in the evening
+def synthetic_weather_payload(day, seed=0):
+    rng = random.Random(seed)
+    hours = []
+    for hour in range(24):
+        if hour < 12:
+            precip_mm, chance_of_rain = 0.0, 10
+        elif hour < 16:
+            precip_mm, chance_of_rain = 0.2, 50
+        else:
+            precip_mm, chance_of_rain = 1.0, 80
+        hours.append({
+            'time': f"{day} {hour:02d}:00",
+            'temp_c': round(12 + 8 * rng.random() + (4 if 10 <= hour <= 17 else 0), 1),
+            'wind_kph': round(5 + 15 * rng.random(), 1),
+            'humidity': rng.randint(40, 90),
+            'chance_of_rain': chance_of_rain,
+            'precip_mm': precip_mm,
+            'vis_km': 10.0,
+        })
+    return {'forecast': {'forecastday': [{'date': day, 'hour': hours}]}}
+
+
+def synthetic_weather(day=BENCHMARK_DAY, seed=0):
+    weather_data = pd.DataFrame(weather_payload_to_rows(synthetic_weather_payload(day, seed), day))
+    weather_data['datetime'] = pd.to_datetime(weather_data['time'])
+    return weather_data
+
+
+def make_activities(specs):
+    return [{"name": f"activity_{index}", "duration": duration, "weather": list(weather)}
+            for index, (duration, weather) in enumerate(specs)]
+
+
+# Scheduling instances: window hours, activities as (duration, ordered preferences), engines that can handle them
+INSTANCES = {
+    "small_feasible": {
+        "window": (8, 18),
+        "activities": make_activities([(1.0, ["Sunny"]), (1.5, ["Cloudy"]), (1.0, ["Rainy", "Cloudy"])]),
+        "engines": ("csp", "csp_bitset", "wcsp", "milp", "multires", "heuristic", "cpnet"),
+    },
+    "medium_feasible": {
+        "window": (7, 21),
+        "activities": make_activities([(1.0, ["Sunny"]), (0.5, ["Sunny"]), (1.0, ["Cloudy", "Sunny"]),
+                                       (1.5, ["Rainy"]), (1.0, ["Rainy", "Cloudy"]), (0.5, ["Sunny", "Cloudy"])]),
+        "engines": ("csp", "csp_bitset", "wcsp", "milp", "multires", "heuristic", "cpnet"),
+    },
+    "large_feasible": {
+        "window": (6, 22),
+        "activities": make_activities([(1.0, ["Sunny"])] * 3 + [(0.5, ["Sunny", "Cloudy"])] * 2
+                                      + [(1.0, ["Rainy"])] * 2 + [(1.5, ["Cloudy", "Rainy"])]),
+        "engines": ("csp", "csp_bitset", "wcsp", "milp", "multires", "heuristic", "cpnet"),
+    },
+    "dense_short": {
+        "window": (0, 24),
+        "activities": make_activities([(0.5, ["Sunny"])] * 12 + [(0.5, ["Cloudy"])] * 6 + [(0.5, ["Rainy"])] * 10),
+        "engines": ("csp_bitset", "milp", "multires", "heuristic"),
+    },
+    "team_plan": {
+        "window": (0, 24),
+        "activities": make_activities([(0.5 * (1 + index % 3), [("Sunny", "Cloudy", "Rainy")[index % 3]]) for index in range(60)]),
+        "engines": ("heuristic",),
+    },
+    "small_infeasible": {
+        "window": (8, 12),
+        "activities": make_activities([(3.0, ["Sunny"])] * 3),
+        "engines": ("csp", "csp_bitset", "wcsp", "milp", "multires"),
+    },
+    "medium_infeasible": {
+        "window": (9, 15),
+        "activities": make_activities([(1.0, ["Sunny"])] * 4 + [(0.5, ["Cloudy"])] * 9),
+        "engines": ("csp_bitset", "milp", "multires"),
+    },
+}
+
+
+def instance_window(instance, day=BENCHMARK_DAY):
+    start_hour, end_hour = instance["window"]
+    base = datetime.strptime(day, "%Y-%m-%d")
+    start_datetime = base.replace(hour=start_hour)
+    # A window ending at 24:00 stops at the last half hour of the day
+    end_datetime = base.replace(hour=23, minute=30) if end_hour == 24 else base.replace(hour=end_hour)
+    return start_datetime, end_datetime
+
+
+# Engine options that keep the anytime heuristic deterministic and short
+ENGINE_OPTIONS = {
+    "heuristic": {"seed": 0, "time_budget": 0.5, "max_iterations": 200},
+}
+
+
+# One grid per instance, shared by whichever engine runs on it
+def run_engine(engine, activities, weather_data, start_datetime, end_datetime):
+    grid = build_weather_grid(weather_data, start_datetime, end_datetime)
+    return solve(engine, activities, grid, **ENGINE_OPTIONS.get(engine, {}))
+
+
+# Wall-clock seconds and (optionally) peak traced allocation of one solve, with solver output silenced
+def measure(engine, instance_name, track_memory=False, weather_data=None):
+    instance = INSTANCES[instance_name]
+    if weather_data is None:
+        weather_data = synthetic_weather()
+    start_datetime, end_datetime = instance_window(instance)
+
+    # Every measurement starts cold so results do not depend on run order
+    clear_caches()
+    if track_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = run_engine(engine, instance["activities"], weather_data, start_datetime, end_datetime)
+    seconds = time.perf_counter() - started
+    peak_bytes = None
+    if track_memory:
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'engine': engine,
+        'instance': instance_name,
+        'seconds': seconds,
+        'peak_bytes': peak_bytes,
+        'feasible': result.feasible,
+    }
+
+
+# Coarse-to-fine against the MILP solved directly on the 1-minute grid: times, objectives and the proven bound
+def multires_gap(instance_name, weather_data=None):
+    instance = INSTANCES[instance_name]
+    if weather_data is None:
+        weather_data = synthetic_weather()
+    start_datetime, end_datetime = instance_window(instance)
+    grid = build_weather_grid(weather_data, start_datetime, end_datetime)
+    activities = instance["activities"]
+    fine_grid = grid.view(1)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        coarse_to_fine = solve("multires", activities, grid)
+        multires_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        direct_starts, _, _ = optimal_starts(fine_grid, activities)
+        direct_seconds = time.perf_counter() - started
+
+    report = coarse_to_fine.report
+    return {
+        'instance': instance_name,
+        'multires_seconds': multires_seconds,
+        'direct_seconds': direct_seconds,
+        'multires_objective': report.get('objective_rank_minutes'),
+        'direct_objective': None if direct_starts is None else rank_minutes(fine_grid, activities, direct_starts),
+        'lower_bound': report.get('lower_bound_rank_minutes'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the scheduling benchmark corpus")
+    parser.add_argument("--engines", nargs="*", help="engines to run (default: all that apply)")
+    parser.add_argument("--instances", nargs="*", help="instances to run (default: all)")
+    parser.add_argument("--memory", action="store_true", help="also report peak traced memory")
+    parser.add_argument("--multires-gap", action="store_true",
+                        help="compare coarse-to-fine with a direct 1-minute MILP (slow: the direct solves take seconds)")
+    args = parser.parse_args()
+
+    weather_data = synthetic_weather()
+    if args.multires_gap:
+        print(f"{'instance':<20}{'multires s':>11}{'direct s':>10}{'objective':>11}{'direct':>8}{'bound':>7}")
+        for instance_name in args.instances or INSTANCES:
+            if "multires" not in INSTANCES[instance_name]["engines"]:
+                continue
+            row = multires_gap(instance_name, weather_data)
+            print(f"{instance_name:<20}{row['multires_seconds']:>11.3f}{row['direct_seconds']:>10.3f}"
+                  f"{str(row['multires_objective']):>11}{str(row['direct_objective']):>8}{str(row['lower_bound']):>7}")
+        return
+    print(f"{'instance':<20}{'engine':<12}{'seconds':>10}{'peak KiB':>12}  feasible")
+    for instance_name in args.instances or INSTANCES:
+        for engine in INSTANCES[instance_name]["engines"]:
+            if args.engines and engine not in args.engines:
+                continue
+            row = measure(engine, instance_name, track_memory=args.memory, weather_data=weather_data)
+            peak = f"{row['peak_bytes'] / 1024:.1f}" if row['peak_bytes'] is not None else "-"
+            print(f"{instance_name:<20}{engine:<12}{row['seconds']:>10.4f}{peak:>12}  {row['feasible']}")
+
+
+if __name__ == "__main__":
+    main()
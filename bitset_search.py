@@ -0,0 +1,73 @@
+# Bitset search kernel: placements are integer masks over the day's slots, a partial schedule is one occupancy integer
+import time
+
+
+# Bit s of a mask is set when the placement covers slot s
+def placement_masks(starts, length):
+    block = (1 << length) - 1
+    return [(int(start), block << int(start)) for start in starts]
+
+
+# Drop every placement that collides with the occupancy in one pass over the domain
+def filter_domain(domain, occupied):
+    return [placement for placement in domain if not placement[1] & occupied]
+
+
+# Depth-first search with forward checking; returns one start slot per domain, or None if none fits.
+# `order_pairs` lists (earlier, later) domain indices whose start slots must strictly increase.
+# A SolveControl `control` can stop the search early and receives the node count as it goes.
+def search(domains, deadline=None, order_pairs=(), control=None):
+    stats = {'nodes': 0, 'dead_ends': 0, 'symmetry_pruned': 0, 'timed_out': False}
+    assignment = [None] * len(domains)
+    later = {index: set() for index in range(len(domains))}
+    for earlier_index, later_index in order_pairs:
+        later[earlier_index].add(later_index)
+    earlier = {index: set() for index in range(len(domains))}
+    for earlier_index, successors in later.items():
+        for later_index in successors:
+            earlier[later_index].add(earlier_index)
+
+    def extend(remaining, occupied):
+        if not remaining:
+            return True
+        if deadline is not None and time.time() > deadline:
+            stats['timed_out'] = True
+            return False
+        if control is not None:
+            control.report(nodes=stats['nodes'])
+            if control.should_stop():
+                stats['timed_out'] = True
+                return False
+        # Branch on the activity with the fewest placements left
+        index = min(remaining, key=lambda key: len(remaining[key]))
+        options = remaining.pop(index)
+        for start, mask in options:
+            stats['nodes'] += 1
+            next_occupied = occupied | mask
+            filtered = {}
+            for other, domain in remaining.items():
+                live = filter_domain(domain, next_occupied)
+                if other in later[index] or other in earlier[index]:
+                    before = len(live)
+                    if other in later[index]:
+                        live = [placement for placement in live if placement[0] > start]
+                    else:
+                        live = [placement for placement in live if placement[0] < start]
+                    stats['symmetry_pruned'] += before - len(live)
+                if not live:
+                    stats['dead_ends'] += 1
+                    break
+                filtered[other] = live
+            else:
+                assignment[index] = start
+                if extend(filtered, next_occupied):
+                    return True
+            if stats['timed_out']:
+                break
+        remaining[index] = options
+        return False
+
+    if any(not domain for domain in domains):
+        return None, stats
+    found = extend({index: list(domain) for index, domain in enumerate(domains)}, 0)
+    return (assignment if found else None), stats
@@ -0,0 +1,291 @@
+# Fixed events (meetings, commutes, blackout windows) that no activity may overlap.
+# Events are imported from an ICS calendar or a CSV file and merged into a sorted array of disjoint intervals,
+# so whether any number of candidate placements hit a busy time is one vectorized binary search.
+import hashlib
+import io
+import logging
+import os
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import NamedTuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+import pandas as pd
+
+# Constants and Global Variables
+RECURRENCE_DAYS = 90  # Recurring events are expanded this far past today when the rule has no COUNT or UNTIL
+ICS_WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+ICS_DURATION = re.compile(r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+CSV_SUMMARY_COLUMNS = ("summary", "title", "name", "label")
+
+logger = logging.getLogger(__name__)
+
+
+class FixedEvent(NamedTuple):
+    start: datetime
+    end: datetime
+    summary: str = ""
+
+
+def _to_datetime64(values):
+    return np.asarray(values, dtype='datetime64[us]').reshape(-1)
+
+
+# Immutable index of busy time: sorted, disjoint [start, end) intervals. Events that overlap or touch are merged.
+class BusyIntervals:
+    def __init__(self, events=()):
+        events = [(event[0], event[1]) for event in events]
+        starts = _to_datetime64([start for start, _ in events])
+        ends = _to_datetime64([end for _, end in events])
+        kept = ends > starts
+        starts, ends = starts[kept], ends[kept]
+        if starts.size:
+            order = np.argsort(starts, kind="stable")
+            starts, ends = starts[order], ends[order]
+            # An interval opens a new group unless it starts within the furthest end reached so far
+            reach = np.maximum.accumulate(ends)
+            opens = np.concatenate(([True], starts[1:] > reach[:-1]))
+            closes = np.concatenate((np.flatnonzero(opens)[1:] - 1, [starts.size - 1]))
+            starts, ends = starts[opens], reach[closes]
+        self._set(starts, ends)
+
+    def _set(self, starts, ends):
+        starts.flags.writeable = False
+        ends.flags.writeable = False
+        self.starts = starts
+        self.ends = ends
+        self.key = hashlib.blake2b(starts.tobytes() + ends.tobytes(), digest_size=16).hexdigest()
+
+    @classmethod
+    def _merged(cls, starts, ends):
+        index = cls.__new__(cls)
+        index._set(np.array(starts), np.array(ends))
+        return index
+
+    def __len__(self):
+        return int(self.starts.size)
+
+    def __iter__(self):
+        return zip(self.starts.astype(datetime), self.ends.astype(datetime))
+
+    def __repr__(self):
+        return f"BusyIntervals({len(self)} intervals)"
+
+    # Per candidate, whether [start, end) overlaps busy time. The first interval ending after each start is
+    # found by binary search; the candidate overlaps exactly when that interval starts before the candidate ends.
+    def overlaps(self, starts, ends):
+        starts, ends = _to_datetime64(starts), _to_datetime64(ends)
+        index = np.searchsorted(self.ends, starts, side="right")
+        hit = index < self.ends.size
+        hit[hit] = self.starts[index[hit]] < ends[hit]
+        return hit
+
+    # Per start, whether an activity of `duration` (a timedelta) starting there stays clear of busy time
+    def available(self, starts, duration):
+        starts = _to_datetime64(starts)
+        return ~self.overlaps(starts, starts + np.timedelta64(duration, 'us'))
+
+    # Which of `n_slots` consecutive slots from `start_datetime` touch busy time
+    def blocked_slots(self, start_datetime, slot_minutes, n_slots):
+        slot = np.timedelta64(slot_minutes, 'm')
+        starts = np.datetime64(start_datetime, 'us') + np.arange(n_slots) * slot
+        return self.overlaps(starts, starts + slot)
+
+    # The busy time within [start, end), with intervals cut at the edges
+    def clip(self, start_datetime, end_datetime):
+        start, end = np.datetime64(start_datetime, 'us'), np.datetime64(end_datetime, 'us')
+        if not self.starts.size or (self.starts[0] >= start and self.ends[-1] <= end):
+            return self
+        first = np.searchsorted(self.ends, start, side="right")
+        last = np.searchsorted(self.starts, end, side="left")
+        return BusyIntervals._merged(np.maximum(self.starts[first:last], start), np.minimum(self.ends[first:last], end))
+
+    def total(self):
+        return timedelta(microseconds=int((self.ends - self.starts).sum().astype(np.int64)))
+
+    # Earliest time at or after `start` where `duration` (a timedelta) fits without touching busy time
+    def next_free(self, start, duration):
+        current, length = np.datetime64(start, 'us'), np.timedelta64(duration, 'us')
+        while True:
+            index = np.searchsorted(self.ends, current, side="right")
+            if index == self.ends.size or self.starts[index] >= current + length:
+                return current.astype(datetime)
+            current = self.ends[index]
+
+
+# Content lines of an ICS file with folded continuation lines joined back
+def _unfold(text):
+    lines = []
+    for line in text.splitlines():
+        if line[:1] in (" ", "\t") and lines:
+            lines[-1] += line[1:]
+        elif line:
+            lines.append(line)
+    return lines
+
+
+# "NAME;PARAM=VALUE:value" -> (NAME, {PARAM: VALUE}, value); colons inside quoted parameter values are kept
+def _content_line(line):
+    quoted = False
+    for position, character in enumerate(line):
+        if character == '"':
+            quoted = not quoted
+        elif character == ":" and not quoted:
+            break
+    else:
+        return None
+    name, *params = line[:position].split(";")
+    params = dict(param.split("=", 1) for param in params if "=" in param)
+    return name.upper(), {key.upper(): value.strip('"') for key, value in params.items()}, line[position + 1:]
+
+
+# An ICS date or date-time as a naive local datetime, and whether it was a whole date. UTC and TZID times are
+# converted to `zone` when one is given; otherwise UTC becomes this machine's local time and TZID times stay
+# as written, which is the planning location's clock for a calendar kept in that location's zone.
+def _ics_time(value, params, zone):
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value[:8], "%Y%m%d"), True
+    moment = datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        moment = moment.replace(tzinfo=timezone.utc)
+    elif "TZID" in params and zone is not None:
+        try:
+            moment = moment.replace(tzinfo=ZoneInfo(params["TZID"]))
+        except (ZoneInfoNotFoundError, ValueError):
+            logger.warning("Unknown time zone %s; reading %s as local time", params["TZID"], value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(zone).replace(tzinfo=None)
+    return moment, False
+
+
+def _ics_duration(value):
+    match = ICS_DURATION.match(value.strip())
+    if match is None:
+        raise ValueError(f"Unreadable duration '{value}'")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0), minutes=int(minutes or 0),
+                         seconds=int(seconds or 0))
+    return -duration if sign == "-" else duration
+
+
+# Start times of a recurring event: DAILY and WEEKLY rules (INTERVAL, COUNT, UNTIL, BYDAY) are expanded;
+# any other frequency keeps only the first occurrence
+def _occurrences(start, rule, until, zone):
+    parts = dict(part.split("=", 1) for part in rule.upper().split(";") if "=" in part)
+    frequency = parts.get("FREQ")
+    if frequency not in ("DAILY", "WEEKLY"):
+        logger.warning("Recurrence FREQ=%s is not expanded; only the first occurrence is blocked", frequency)
+        return [start]
+    interval = max(int(parts.get("INTERVAL", 1)), 1)
+    count = int(parts["COUNT"]) if "COUNT" in parts else None
+    if "UNTIL" in parts:
+        until = min(until, _ics_time(parts["UNTIL"], {}, zone)[0] + timedelta(seconds=1))
+    weekdays = [start.weekday()]
+    if "BYDAY" in parts:
+        weekdays = sorted(ICS_WEEKDAYS.index(day[-2:]) for day in parts["BYDAY"].split(",") if day[-2:] in ICS_WEEKDAYS)
+
+    if frequency == "DAILY":
+        base, period, offsets = start, timedelta(days=interval), [timedelta(0)]
+    else:
+        base, period = start - timedelta(days=start.weekday()), timedelta(weeks=interval)
+        offsets = [timedelta(days=weekday) for weekday in weekdays]
+    occurrences = []
+    while base < until and (count is None or len(occurrences) < count):
+        for offset in offsets:
+            moment = base + offset
+            if moment.weekday() not in weekdays and frequency == "DAILY" and "BYDAY" in parts:
+                continue
+            if start <= moment < until and (count is None or len(occurrences) < count):
+                occurrences.append(moment)
+        base += period
+    return occurrences
+
+
+# Busy events of an ICS calendar (text or bytes). Transparent ("show as free") and cancelled events are skipped.
+# Recurrences are expanded up to `until` (default RECURRENCE_DAYS past today), minus EXDATEs; `zone` is the
+# time zone to read UTC and TZID times in (a ZoneInfo or key), see _ics_time.
+def read_ics(source, zone=None, until=None):
+    text = source.decode("utf-8-sig") if isinstance(source, bytes) else source
+    zone = ZoneInfo(zone) if isinstance(zone, str) else zone
+    until = until or datetime.combine(date.today() + timedelta(days=RECURRENCE_DAYS), time())
+    events, event = [], None
+    for line in _unfold(text):
+        parsed = _content_line(line)
+        if parsed is None:
+            continue
+        name, params, value = parsed
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event = {'EXDATE': []}
+        elif name == "END" and value.upper() == "VEVENT" and event is not None:
+            events.extend(_ics_event(event, zone, until))
+            event = None
+        elif event is not None:
+            if name == "EXDATE":
+                event['EXDATE'].extend(_ics_time(part, params, zone)[0] for part in value.split(","))
+            elif name not in event:
+                event[name] = (params, value)
+    return events
+
+
+def _ics_event(event, zone, until):
+    if "DTSTART" not in event:
+        return []
+    if event.get("TRANSP", ({}, ""))[1].upper() == "TRANSPARENT" or event.get("STATUS", ({}, ""))[1].upper() == "CANCELLED":
+        return []
+    start, whole_day = _ics_time(event["DTSTART"][1], event["DTSTART"][0], zone)
+    if "DTEND" in event:
+        length = _ics_time(event["DTEND"][1], event["DTEND"][0], zone)[0] - start
+    elif "DURATION" in event:
+        length = _ics_duration(event["DURATION"][1])
+    else:
+        length = timedelta(days=1) if whole_day else timedelta(0)
+    if length <= timedelta(0):
+        return []
+    summary = event.get("SUMMARY", ({}, ""))[1].replace("\\,", ",").replace("\\n", " ")
+    starts = _occurrences(start, event["RRULE"][1], until, zone) if "RRULE" in event else [start]
+    excluded = set(event['EXDATE'])
+    return [FixedEvent(moment, moment + length, summary) for moment in starts if moment not in excluded]
+
+
+# Busy events of a CSV file (path, text or file-like) with `start` and `end` columns, either full date-times or
+# times of day with a separate `date` column. An optional summary/title/name/label column names the events.
+def read_csv(source):
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    table = pd.read_csv(source, skipinitialspace=True)
+    table.columns = [str(column).strip().lower() for column in table.columns]
+    missing = {"start", "end"} - set(table.columns)
+    if missing:
+        raise ValueError(f"Fixed events CSV needs columns {sorted(missing)}")
+    try:
+        if "date" in table.columns:
+            starts = pd.to_datetime(table["date"].astype(str) + " " + table["start"].astype(str))
+            ends = pd.to_datetime(table["date"].astype(str) + " " + table["end"].astype(str))
+        else:
+            starts, ends = pd.to_datetime(table["start"]), pd.to_datetime(table["end"])
+    except (ValueError, TypeError) as error:
+        raise ValueError(f"Unreadable time in fixed events CSV: {error}") from error
+    # An end at or before the start on the same row runs past midnight
+    ends = ends.where(ends > starts, ends + pd.Timedelta(days=1)) if "date" in table.columns else ends
+    summary_column = next((column for column in CSV_SUMMARY_COLUMNS if column in table.columns), None)
+    summaries = table[summary_column].fillna("").astype(str) if summary_column else [""] * len(table)
+    return [FixedEvent(start.to_pydatetime(), end.to_pydatetime(), summary)
+            for start, end, summary in zip(starts, ends, summaries)]
+
+
+# Events from an uploaded or local file, read as ICS or CSV by its extension
+def read_fixed_events(source, filename=None, zone=None):
+    filename = filename or getattr(source, 'name', None) or (source if isinstance(source, str) else "")
+    extension = os.path.splitext(str(filename))[1].lower()
+    if isinstance(source, str) and os.path.exists(source):
+        with open(source, "rb") as handle:
+            source = handle.read()
+    elif hasattr(source, 'read'):
+        source = source.read()
+    if extension in (".ics", ".ical", ".ifb"):
+        return read_ics(source, zone)
+    if extension == ".csv":
+        return read_csv(source)
+    raise ValueError(f"Fixed events must be an .ics or .csv file, not '{filename}'")
@@ -0,0 +1,181 @@
+# Climatology index: per location, day of year and hour, how often each weather class occurs and how warm it is.
+# Built once from the weather archive, it lets the solvers plan weeks ahead on expected weather with no API calls.
+import argparse
+import os
+import threading
+from datetime import date, datetime, timedelta
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from weather_grid import CLASSIFICATION_SCHEMES, WEATHER_CLASSES
+from weather_archive import ARCHIVE_FIELDS, DEFAULT_ARCHIVE_DIR, WeatherArchive, location_slug
+
+# Constants and Global Variables
+DEFAULT_CLIMATOLOGY_DIR = "climatology"
+CLIMATOLOGY_WINDOW_DAYS = 7        # Days either side of the target day pooled into its statistics
+CLIMATOLOGY_HORIZON_DAYS = 60      # How far ahead the apps allow planning from climatology
+TEMPERATURE_PERCENTILES = (10, 50, 90)
+DAYS_IN_YEAR = 366                 # Indexed on a leap-year calendar so 29 February has a slot
+SCHEMES = tuple(CLASSIFICATION_SCHEMES)
+
+
+def day_of_year(day):
+    return date(2000, day.month, day.day).timetuple().tm_yday - 1
+
+
+class Climatology:
+    def __init__(self, location, class_percent, temperature, chance_of_rain, precip_mm, samples):
+        self.location = location
+        self.class_percent = class_percent    # uint8 (scheme, day, hour, class), percent of samples in each class
+        self.temperature = temperature        # float32 (day, hour, percentile), served rounded to 0.01 °C
+        self.chance_of_rain = chance_of_rain  # float64 (day, hour) medians, exact so the class thresholds hold
+        self.precip_mm = precip_mm
+        self.samples = samples                # uint16 (day, hour) observations behind each cell
+
+    def class_probabilities(self, day, hour, scheme="precip"):
+        percent = self.class_percent[SCHEMES.index(scheme), day_of_year(day), hour]
+        return {name: float(value) / 100 for name, value in zip(WEATHER_CLASSES, percent)}
+
+    def temperature_percentiles(self, day, hour):
+        return {percentile: round(float(value), 2)
+                for percentile, value in zip(TEMPERATURE_PERCENTILES, self.temperature[day_of_year(day), hour])}
+
+    # Expected (median) weather for every hour of a day, in the hour-record shape WeatherGrid accepts
+    def expected_hours(self, day):
+        index = day_of_year(day)
+        median = TEMPERATURE_PERCENTILES.index(50)
+        midnight = datetime.combine(day, datetime.min.time())
+        return MappingProxyType({
+            midnight + timedelta(hours=hour): MappingProxyType({
+                'temp_c': round(float(self.temperature[index, hour, median]), 2),
+                'chance_of_rain': float(self.chance_of_rain[index, hour]),
+                'precip_mm': float(self.precip_mm[index, hour]),
+            })
+            for hour in range(24) if self.samples[index, hour]
+        })
+
+    # Same columns fetch_weather_data returns, marked as climatology in DataFrame.attrs
+    def expected_frame(self, day):
+        rows = [dict(record, date=day.isoformat(), time=stamp.strftime("%Y-%m-%d %H:%M"))
+                for stamp, record in self.expected_hours(day).items()]
+        weather_data = pd.DataFrame(rows, columns=['date', 'time', 'temp_c', 'chance_of_rain', 'precip_mm'])
+        weather_data['datetime'] = pd.to_datetime(weather_data['time'])
+        weather_data.attrs['source'] = "climatology"
+        return weather_data
+
+    def save(self, path):
+        np.savez_compressed(path, location=np.array(self.location), class_percent=self.class_percent,
+                            temperature=self.temperature, chance_of_rain=self.chance_of_rain,
+                            precip_mm=self.precip_mm, samples=self.samples)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(str(data['location']), data['class_percent'], data['temperature'],
+                       data['chance_of_rain'], data['precip_mm'], data['samples'])
+
+
+# Pools every archived year within CLIMATOLOGY_WINDOW_DAYS of each day of year
+def build_climatology(archive, location, window_days=CLIMATOLOGY_WINDOW_DAYS):
+    first_day, n_days = archive.day_range(location)
+    _, block = archive.hour_block(location, first_day, first_day + timedelta(days=n_days - 1))
+    values = np.asarray(block).reshape(n_days, 24, len(ARCHIVE_FIELDS))
+    field = {name: values[:, :, ARCHIVE_FIELDS.index(name)] for name in ('temp_c', 'chance_of_rain', 'precip_mm')}
+    observed = ~np.isnan(field['precip_mm'])
+
+    # Per scheme, whether each archived hour falls in each class (unobserved hours in none)
+    in_class = np.stack([
+        np.stack([classify(field[field_name])[name] & observed for name in WEATHER_CLASSES], axis=-1)
+        for field_name, classify in (CLASSIFICATION_SCHEMES[scheme] for scheme in SCHEMES)
+    ])
+
+    doy = np.array([day_of_year(first_day + timedelta(days=offset)) for offset in range(n_days)])
+    class_percent = np.zeros((len(SCHEMES), DAYS_IN_YEAR, 24, len(WEATHER_CLASSES)), dtype=np.uint8)
+    temperature = np.full((DAYS_IN_YEAR, 24, len(TEMPERATURE_PERCENTILES)), np.nan, dtype=np.float32)
+    chance_of_rain = np.full((DAYS_IN_YEAR, 24), np.nan)
+    precip_mm = np.full((DAYS_IN_YEAR, 24), np.nan)
+    samples = np.zeros((DAYS_IN_YEAR, 24), dtype=np.uint16)
+
+    for target in range(DAYS_IN_YEAR):
+        distance = np.abs(doy - target)
+        pooled = np.minimum(distance, DAYS_IN_YEAR - distance) <= window_days
+        counts = observed[pooled].sum(axis=0)
+        samples[target] = counts
+        if not counts.any():
+            continue
+        with np.errstate(invalid='ignore'):
+            class_percent[:, target] = np.rint(100 * in_class[:, pooled].sum(axis=1) / np.maximum(counts, 1)[None, :, None])
+        hours = counts > 0
+        temperature[target, hours] = np.nanpercentile(field['temp_c'][pooled][:, hours], TEMPERATURE_PERCENTILES, axis=0).T
+        chance_of_rain[target, hours] = np.nanmedian(field['chance_of_rain'][pooled][:, hours], axis=0)
+        precip_mm[target, hours] = np.nanmedian(field['precip_mm'][pooled][:, hours], axis=0)
+
+    return Climatology(location, class_percent, temperature, chance_of_rain, precip_mm, samples)
+
+
+# Directory of per-location climatologies; each file is loaded once and then served by array lookup
+class ClimatologyIndex:
+    def __init__(self, path=DEFAULT_CLIMATOLOGY_DIR):
+        self.path = path
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def _file(self, location):
+        return os.path.join(self.path, f"{location_slug(location)}.npz")
+
+    def covers(self, location):
+        return location in self._loaded or os.path.exists(self._file(location))
+
+    def get(self, location):
+        with self._lock:
+            if location not in self._loaded:
+                if not os.path.exists(self._file(location)):
+                    raise LookupError(f"No climatology for {location} in {self.path}")
+                self._loaded[location] = Climatology.load(self._file(location))
+            return self._loaded[location]
+
+    def expected_frame(self, location, day):
+        return self.get(location).expected_frame(day)
+
+    def build(self, archive, locations=None):
+        os.makedirs(self.path, exist_ok=True)
+        built = []
+        for location in locations or archive.locations():
+            climatology = build_climatology(archive, location)
+            climatology.save(self._file(location))
+            with self._lock:
+                self._loaded[location] = climatology
+            built.append(location)
+        return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and inspect the climatology index")
+    parser.add_argument("--climatology", default=os.environ.get("WEATHER_CLIMATOLOGY", DEFAULT_CLIMATOLOGY_DIR))
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build climatologies from the weather archive")
+    build.add_argument("locations", nargs="*")
+    build.add_argument("--archive", default=os.environ.get("WEATHER_ARCHIVE", DEFAULT_ARCHIVE_DIR))
+    show = commands.add_parser("show", help="print expected weather for a location and day")
+    show.add_argument("location")
+    show.add_argument("day")
+    args = parser.parse_args()
+
+    index = ClimatologyIndex(args.climatology)
+    if args.command == "build":
+        for location in index.build(WeatherArchive(args.archive), args.locations):
+            print(f"built {location}")
+    else:
+        day = datetime.strptime(args.day, "%Y-%m-%d").date()
+        climatology = index.get(args.location)
+        for hour in range(24):
+            probabilities = climatology.class_probabilities(day, hour)
+            temperatures = climatology.temperature_percentiles(day, hour)
+            classes = "  ".join(f"{name} {probability:4.0%}" for name, probability in probabilities.items())
+            print(f"{hour:02d}:00  {classes}  temp p10/p50/p90 {temperatures[10]:.1f}/{temperatures[50]:.1f}/{temperatures[90]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,280 +1,378 @@
-# Library Imports
-import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import matplotlib.colors as mcolors
-import networkx as nx
-import requests
-from datetime import datetime, timedelta, date
-from constraint import Problem, AllDifferentConstraint, FunctionConstraint, BacktrackingSolver
-import seaborn as sns
-import logging
-import time
-import math
-
-# Constants and Global Variables
-api_key = ""
-location = "Los Angeles"
-
-# Function to Fetch and Process Weather Data for a Specific Day
-def fetch_weather_data(api_key, location, selected_date):
-    url = f"http://api.weatherapi.com/v1/history.json?key={api_key}&q={location}&dt={selected_date}"
-    response = requests.get(url)
-    data = response.json()
-
-    df_weather = pd.DataFrame()
-    for hour in data['forecast']['forecastday'][0]['hour']:
-        df_weather = df_weather.append({
-            'date': selected_date,
-            'time': hour['time'],
-            'temp_c': hour['temp_c'],
-            'wind_kph': hour['wind_kph'],
-            'humidity': hour['humidity'],
-            'chance_of_rain': hour['chance_of_rain'],
-            'precip_mm': hour['precip_mm'],
-            'vis_km': hour['vis_km'],
-        }, ignore_index=True)
-
-    df_weather['datetime'] = pd.to_datetime(df_weather['time'])
-    return df_weather
-
-def add_activity_input(activity_id):
-    unique_key = lambda field: f"{field}_{activity_id}"  # Unique key generator
-
-    with st.container():
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            activity_name = st.text_input("Activity Name", key=unique_key("activity_name"))
-        with col2:
-            duration = st.number_input("Duration (in hours)", min_value=0.5, max_value=12.0, step=0.5, key=unique_key("duration"))
-        with col3:
-            weather_preference = st.selectbox("Preferred Weather", ["Sunny", "Cloudy", "Rainy"], key=f"weather_{activity_id}")
-    return {"name": activity_name, "duration": duration, "weather": weather_preference}
-
-
-def weather_condition_check(chance_of_rain, preferences):
-    # Mapping conditions to chance of rain
-    condition_map = {
-        'Sunny': lambda rain_chance: rain_chance < 20,
-        'Cloudy': lambda rain_chance: 20 <= rain_chance <= 70,
-        'Rainy': lambda rain_chance: rain_chance > 70
-    }
-
-    # Check weather conditions based on preferences
-    for preference in preferences:
-        if condition_map[preference](chance_of_rain):
-            return True
-    return False
-
-def is_within_time_range(start_time, end_time, activity_start, activity_duration):
-    activity_end = activity_start + activity_duration
-    return start_time <= activity_start and activity_end <= end_time
-
-def combine_date_time(date_obj, time_obj):
-    return datetime.combine(date_obj, time_obj)
-
-def weather_constraint(start_time, duration, preferences, weather_dict):
-    for hour_offset in range(int(duration)):
-        hour = start_time + timedelta(hours=hour_offset)
-        weather_data = weather_dict.get(hour)
-        if weather_data:
-            chance_of_rain = weather_data['chance_of_rain']
-            if not weather_condition_check(chance_of_rain, preferences):
-                return False
-    return True
-
-def calculate_average_weather(activity_start, activity_duration, weather_dict):
-    activity_end = activity_start + timedelta(hours=activity_duration)
-    temp_sum = 0
-    rain_chance_sum = 0
-    count = 0
-
-    while activity_start < activity_end:
-        nearest_hour = activity_start.replace(minute=0, second=0, microsecond=0)
-        if activity_start.minute >= 30:
-            nearest_hour += timedelta(hours=1)
-
-        weather_info = weather_dict.get(nearest_hour)
-        if weather_info is not None:
-            temp_sum += weather_info['temp_c']
-            rain_chance_sum += int(weather_info['chance_of_rain'])
-            count += 1
-        activity_start += timedelta(hours=1)
-
-    if count > 0:
-        avg_temp = temp_sum / count
-        avg_rain_chance = rain_chance_sum / count
-    else:
-        avg_temp = None
-        avg_rain_chance = None
-
-    return avg_temp, avg_rain_chance
-
-def solve_csp(activities, weather_data, start_datetime, end_datetime):
-    estart_time = time.time()
-
-    problem = Problem(BacktrackingSolver())
-
-    # Convert weather data to a dictionary for easy access
-    weather_dict = {pd.to_datetime(row['datetime']): row for index, row in weather_data.iterrows()}
-
-    # Debugging: Print activities to check input
-    print("Activities:", activities)
-
-    # Add variables for each activity (activity start time)
-    for activity in activities:
-        possible_start_times = []
-        # Ensure duration is correctly formatted (as an integer)
-        duration = int(activity['duration'] * 2)  # Convert hours to half-hour increments
-
-        # Calculate possible start times
-        for hour in range(int((end_datetime - start_datetime).total_seconds() // 1800) - duration):
-            possible_start = start_datetime + timedelta(minutes=hour * 60)
-            possible_end = possible_start + timedelta(minutes=duration * 60)
-            if possible_end <= end_datetime:
-                possible_start_times.append(possible_start)
-
-        # Ensure the variable name is unique and a string
-        problem.addVariable(str(activity['name']), possible_start_times)
-
-    # Apply the no_overlap constraint to all pairs of activities
-    def no_overlap(start1, start2, dur1, dur2):
-        end1 = start1 + timedelta(hours=dur1)
-        end2 = start2 + timedelta(hours=dur2)
-
-        # Check if the first activity ends before the second starts or vice versa
-        return end1 <= start2 or end2 <= start1
-
-    for i in range(len(activities)):
-        for j in range(i + 1, len(activities)):
-            problem.addConstraint(lambda start1, start2, dur1=activities[i]['duration'], dur2=activities[j]['duration']: 
-                                  no_overlap(start1, start2, dur1, dur2), 
-                                  [str(activities[i]['name']), str(activities[j]['name'])])
-
-    # Weather constraints for each activity
-    for activity in activities:
-        problem.addConstraint(FunctionConstraint(lambda start_time, dur=activity['duration'], prefs=activity['weather']: 
-                                                weather_constraint(start_time, dur, prefs, weather_dict)), 
-                                                [str(activity['name'])])
-
-    # Solve the problem
-    solution = problem.getSolution()
-
-    if solution is None:
-        return "No feasible schedule found."
-
-    # Convert solution to a readable format
-    schedule = {}
-    for activity_name, start_time in solution.items():
-        activity = next(act for act in activities if act['name'] == activity_name)
-        end_time = start_time + timedelta(minutes=activity['duration'] * 60)
-        avg_temp, avg_rain_chance = calculate_average_weather(start_time, activity['duration'], weather_dict)
-        schedule[activity_name] = {
-            'start': start_time, 
-            'end': end_time, 
-            'average_temperature': avg_temp, 
-            'average_chance_of_rain': avg_rain_chance
-        }
-    eend_time = time.time()
-    # Calculate execution time
-    execution_time = eend_time - estart_time
-    print(f"Execution Time: {execution_time} seconds")
-    return schedule, execution_time
-
-def plot_activity_timeline(schedule, planning_day):
-    fig, ax = plt.subplots(figsize=(10, 3))
-
-    # Generate distinct colors for each activity
-    colors = list(mcolors.TABLEAU_COLORS.values())
-    color_idx = 0
-
-    for activity, details in schedule.items():
-        start = details['start']
-        end = details['end']
-        ax.plot([start, end], [1, 1], color=colors[color_idx], linewidth=6, label=activity)
-        color_idx = (color_idx + 1) % len(colors)
-
-    ax.set_yticks([])
-    ax.set_xlabel('Time')
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-    plt.xticks(rotation=45)
-    plt.title(f'Activity Timeline for {planning_day.strftime("%Y-%m-%d")}')
-    plt.grid(True)
-    plt.legend()
-
-    return fig
-
-def user_interface():
-    st.title("Activity Scheduler Using Weather Constraints and CSP")
-    st.subheader("Enter Activities")
-    activities = []
-    activity_names = set()
-    activity_count = st.number_input("How many activities do you want to schedule?", min_value=1, max_value=10, step=1)
-
-    valid_input = True
-
-    for i in range(activity_count):
-        activity = add_activity_input(i)
-        if not activity['name']:
-            st.error("Activity name cannot be blank.")
-            valid_input = False
-        if activity['name'] in activity_names:
-            st.error(f"Activity name '{activity['name']}' is already used. Please use a unique name.")
-            valid_input = False
-        activity_names.add(activity['name'])
-        activities.append(activity)
-
-    st.subheader("Planning Day and Time")
-    planning_day = st.date_input("Select the Day for Planning", min_value=date.today())
-    start_time = st.time_input("Start Time", key="start_time")
-    end_time = st.time_input("End Time", key="end_time")
-
-    # Check for valid time inputs
-    if start_time > end_time:
-        st.error("Start time cannot be after end time.")
-        valid_input = False
-    if planning_day > date.today() + timedelta(days=2):
-        st.error("Date chosen must be within the next 3 days.")
-        valid_input = False
-
-    if st.button("Submit") and valid_input:
-        st.write("Scheduled Activities:")
-        for activity in activities:
-            st.write(activity)
-        
-        start_datetime = combine_date_time(planning_day, start_time)
-        end_datetime = combine_date_time(planning_day, end_time)
-
-        weather_data = fetch_weather_data(api_key, location, planning_day.strftime("%Y-%m-%d"))
-        csp_schedule, execution_time = solve_csp(activities, weather_data, start_datetime, end_datetime)  # Modified to capture execution time
-
-        if isinstance(csp_schedule, str):
-            st.write(csp_schedule)
-        else:
-            st.write("Optimized Schedule:")
-            for activity in csp_schedule:
-                start = csp_schedule[activity]['start']
-                end = csp_schedule[activity]['end']
-                avg_temp = csp_schedule[activity]['average_temperature']
-                if avg_temp is not None:
-                    avg_temp = math.ceil(avg_temp)
-                avg_rain_chance = csp_schedule[activity]['average_chance_of_rain']
-                if avg_rain_chance is not None:
-                    avg_rain_chance = math.ceil(avg_rain_chance)
-                st.write(f"{activity}: Start at {start.strftime('%Y-%m-%d %H:%M')}, End by {end.strftime('%Y-%m-%d %H:%M')}, Average Temperature: {avg_temp}°C, Chance of Rain: {avg_rain_chance}%")
-
-            # Display execution time
-            st.write(f"Execution Time: {execution_time:.2f} seconds")  # Display execution time
-
-            # Plot and display the activity timeline
-            fig = plot_activity_timeline(csp_schedule, planning_day)
-            st.pyplot(fig)
-
-# Main Function
-def main():
-    user_interface()
-
-
-if __name__ == "__main__":
+# Library Imports
+import streamlit as st
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+import matplotlib.colors as mcolors
+import networkx as nx
+import requests
+from datetime import datetime, timedelta, date
+from constraint import Problem, AllDifferentConstraint, FunctionConstraint, BacktrackingSolver
+import seaborn as sns
+import logging
+import time
+import math
+from weather_client import WeatherClient, default_weather_client
+from weather_source import WeatherSourceError
+from bitset_search import placement_masks, search
+from symmetry import interchangeable_classes, ordering_pairs, symmetry_factor
+from instrumentation import record_solve
+from weather_grid import preference_list
+from problem_cache import candidate_cache, feasibility_cache, cached_weather_grid, cache_totals
+from solvers import Placement, SolveInterrupted, build_weather_grid, get_engine, legacy_result, make_schedule, register_engine
+from warmup import server_warmup, show_warmup_status
+from metrics import ensure_metrics_server
+from solve_jobs import DEFAULT_DEADLINE_SECONDS, fixed_events_input, show_job, start_job, weather_notice
+
+# Constants and Global Variables
+api_key = ""
+location = "Los Angeles"
+CSP_SLOT_MINUTES = 30  # Durations are whole half hours
+
+# Function to Fetch and Process Weather Data for a Specific Day
+def fetch_weather_data(api_key, location, selected_date, source=None):
+    # The client picks history or forecast by date and caches every day a response contains
+    client = default_weather_client(api_key) if source is None else WeatherClient(source)
+    return client.get_day(location, selected_date)
+
+def add_activity_input(activity_id):
+    unique_key = lambda field: f"{field}_{activity_id}"  # Unique key generator
+
+    with st.container():
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            activity_name = st.text_input("Activity Name", key=unique_key("activity_name"))
+        with col2:
+            duration = st.number_input("Duration (in hours)", min_value=0.5, max_value=12.0, step=0.5, key=unique_key("duration"))
+        with col3:
+            weather_preference = st.selectbox("Preferred Weather", ["Sunny", "Cloudy", "Rainy"], key=f"weather_{activity_id}")
+    return {"name": activity_name, "duration": duration, "weather": weather_preference}
+
+
+def weather_condition_check(chance_of_rain, preferences):
+    # Mapping conditions to chance of rain
+    condition_map = {
+        'Sunny': lambda rain_chance: rain_chance < 20,
+        'Cloudy': lambda rain_chance: 20 <= rain_chance <= 70,
+        'Rainy': lambda rain_chance: rain_chance > 70
+    }
+
+    # Check weather conditions based on preferences
+    for preference in preferences:
+        if condition_map[preference](chance_of_rain):
+            return True
+    return False
+
+def is_within_time_range(start_time, end_time, activity_start, activity_duration):
+    activity_end = activity_start + activity_duration
+    return start_time <= activity_start and activity_end <= end_time
+
+def combine_date_time(date_obj, time_obj):
+    return datetime.combine(date_obj, time_obj)
+
+def weather_constraint(start_time, duration, preferences, weather_dict):
+    for hour_offset in range(int(duration)):
+        hour = start_time + timedelta(hours=hour_offset)
+        weather_data = weather_dict.get(hour)
+        if weather_data is not None:
+            chance_of_rain = weather_data['chance_of_rain']
+            if not weather_condition_check(chance_of_rain, preferences):
+                return False
+    return True
+
+def calculate_average_weather(activity_start, activity_duration, weather_dict):
+    activity_end = activity_start + timedelta(hours=activity_duration)
+    temp_sum = 0
+    rain_chance_sum = 0
+    count = 0
+
+    while activity_start < activity_end:
+        nearest_hour = activity_start.replace(minute=0, second=0, microsecond=0)
+        if activity_start.minute >= 30:
+            nearest_hour += timedelta(hours=1)
+
+        weather_info = weather_dict.get(nearest_hour)
+        if weather_info is not None:
+            temp_sum += weather_info['temp_c']
+            rain_chance_sum += int(weather_info['chance_of_rain'])
+            count += 1
+        activity_start += timedelta(hours=1)
+
+    if count > 0:
+        avg_temp = temp_sum / count
+        avg_rain_chance = rain_chance_sum / count
+    else:
+        avg_temp = None
+        avg_rain_chance = None
+
+    return avg_temp, avg_rain_chance
+
+# Candidate start times for an activity of `duration` half-hours
+def candidate_start_times(start_datetime, end_datetime, duration):
+    possible_start_times = []
+    for hour in range(int((end_datetime - start_datetime).total_seconds() // 1800) - duration):
+        possible_start = start_datetime + timedelta(minutes=hour * 60)
+        possible_end = possible_start + timedelta(minutes=duration * 60)
+        if possible_end <= end_datetime:
+            possible_start_times.append(possible_start)
+    return tuple(possible_start_times)
+
+@register_engine("csp", "Backtracking (python-constraint)", slot_minutes=CSP_SLOT_MINUTES, scheme="chance_of_rain", single_preference=True)
+def schedule_csp(activities, grid, control=None):
+    estart_time = time.time()
+    hits_before, misses_before = cache_totals()
+    start_datetime, end_datetime = grid.start_datetime, grid.end_datetime
+
+    problem = Problem(BacktrackingSolver())
+
+    # Hourly weather keyed by datetime, parsed once per day by the grid
+    weather_key = grid.weather_key
+    weather_dict = grid.hours
+
+    # Debugging: Print activities to check input
+    print("Activities:", activities)
+
+    # Add variables for each activity (activity start time), pre-filtered by the weather constraint
+    for activity in activities:
+        # Ensure duration is correctly formatted (as an integer)
+        duration = int(activity['duration'] * 2)  # Convert hours to half-hour increments
+        prefs = tuple(preference_list(activity['weather']))
+
+        # Candidate starts depend only on the window, weather feasibility also on the day and preferences
+        possible_start_times = candidate_cache.get_or_build(
+            ("csp", start_datetime, end_datetime, duration),
+            lambda: candidate_start_times(start_datetime, end_datetime, duration))
+        feasible_start_times = feasibility_cache.get_or_build(
+            ("csp", weather_key, start_datetime, end_datetime, activity['duration'], prefs),
+            lambda: [start for start in possible_start_times if weather_constraint(start, activity['duration'], prefs, weather_dict)])
+        # Starts that would run into a fixed event are dropped in one pass, not by extra constraints
+        if grid.busy is not None and feasible_start_times:
+            free = grid.busy.available(feasible_start_times, timedelta(hours=activity['duration']))
+            feasible_start_times = [start for start, keep in zip(feasible_start_times, free) if keep]
+
+        # No start time suits the weather, so no schedule can exist
+        if not feasible_start_times:
+            return make_schedule("csp", (), time.time() - estart_time)
+
+        # Ensure the variable name is unique and a string
+        problem.addVariable(str(activity['name']), feasible_start_times)
+
+    # Apply the no_overlap constraint to all pairs of activities
+    def no_overlap(start1, start2, dur1, dur2):
+        # python-constraint runs the search, so progress and stop requests ride on its constraint checks
+        if control is not None:
+            control.tick()
+        end1 = start1 + timedelta(hours=dur1)
+        end2 = start2 + timedelta(hours=dur2)
+
+        # Check if the first activity ends before the second starts or vice versa
+        return end1 <= start2 or end2 <= start1
+
+    for i in range(len(activities)):
+        for j in range(i + 1, len(activities)):
+            problem.addConstraint(lambda start1, start2, dur1=activities[i]['duration'], dur2=activities[j]['duration']: 
+                                  no_overlap(start1, start2, dur1, dur2), 
+                                  [str(activities[i]['name']), str(activities[j]['name'])])
+
+    # Interchangeable activities must start in input order, so their swaps are never explored
+    classes = interchangeable_classes(activities)
+    for earlier, later in ordering_pairs(classes):
+        problem.addConstraint(lambda start1, start2: start1 < start2,
+                              [str(activities[earlier]['name']), str(activities[later]['name'])])
+    hits_after, misses_after = cache_totals()
+    record_solve("csp", symmetry_classes=len(classes), symmetric_solutions_removed=symmetry_factor(classes),
+                 cache_hits=hits_after - hits_before, cache_misses=misses_after - misses_before)
+
+    # Solve the problem; a first-solution search has nothing to return when stopped early
+    try:
+        solution = problem.getSolution()
+    except SolveInterrupted:
+        return make_schedule("csp", (), time.time() - estart_time, control=control)
+
+    if solution is None:
+        return make_schedule("csp", (), time.time() - estart_time)
+
+    # Convert solution to a readable format
+    placements = []
+    for activity_name, start_time in solution.items():
+        activity = next(act for act in activities if act['name'] == activity_name)
+        end_time = start_time + timedelta(minutes=activity['duration'] * 60)
+        avg_temp, avg_rain_chance = calculate_average_weather(start_time, activity['duration'], weather_dict)
+        placements.append(Placement(activity_name, start_time, end_time, average_temperature=avg_temp,
+                                    average_chance_of_rain=avg_rain_chance))
+    eend_time = time.time()
+    # Calculate execution time
+    execution_time = eend_time - estart_time
+    print(f"Execution Time: {execution_time} seconds")
+    return make_schedule("csp", placements, execution_time)
+
+def solve_csp(activities, weather_data, start_datetime, end_datetime, busy=None):
+    grid = cached_weather_grid(weather_data, start_datetime, end_datetime, CSP_SLOT_MINUTES, scheme="chance_of_rain").with_busy(busy)
+    return legacy_result(schedule_csp(activities, grid))
+
+# Same problem as solve_csp, searched with precomputed placement bitmasks instead of pairwise constraints
+@register_engine("csp_bitset", "Bitset search (30-minute slots)", slot_minutes=CSP_SLOT_MINUTES, scheme="chance_of_rain", single_preference=True,
+                 mask_feasible=True)
+def schedule_csp_bitset(activities, grid, control=None):
+    estart_time = time.time()
+    hits_before, misses_before = cache_totals()
+    start_datetime, end_datetime, slot_minutes = grid.start_datetime, grid.end_datetime, grid.slot_minutes
+    weather_key = grid.weather_key
+
+    # Candidate placements per activity, already filtered by the weather constraint
+    lengths = [grid.duration_slots(activity['duration']) for activity in activities]
+    domains = []
+    for activity, length in zip(activities, lengths):
+        prefs = tuple(preference_list(activity['weather']))
+        domains.append(feasibility_cache.get_or_build(
+            ("csp_bitset", weather_key, grid.busy_key, start_datetime, end_datetime, slot_minutes, length, prefs),
+            lambda: placement_masks(np.flatnonzero(grid.placement_scores(prefs, length)[0]), length)))
+
+    classes = interchangeable_classes(activities)
+    starts, stats = search(domains, order_pairs=ordering_pairs(classes), control=control)
+    hits_after, misses_after = cache_totals()
+    record_solve("csp_bitset", nodes=stats['nodes'], dead_ends=stats['dead_ends'], symmetry_classes=len(classes),
+                 symmetric_solutions_removed=symmetry_factor(classes), symmetry_pruned=stats['symmetry_pruned'],
+                 cache_hits=hits_after - hits_before, cache_misses=misses_after - misses_before)
+
+    if starts is None:
+        return make_schedule("csp_bitset", (), time.time() - estart_time, control=control)
+
+    # Convert solution to the same format solve_csp returns
+    placements = []
+    for activity, start, length in zip(activities, starts, lengths):
+        placements.append(Placement(activity['name'], grid.slot_time(start), grid.slot_time(start + length),
+                                    average_temperature=grid.window_average(grid.temp_c, start, length),
+                                    average_chance_of_rain=grid.window_average(grid.chance_of_rain, start, length)))
+    eend_time = time.time()
+    # Calculate execution time
+    execution_time = eend_time - estart_time
+    print(f"Execution Time: {execution_time} seconds")
+    return make_schedule("csp_bitset", placements, execution_time)
+
+def solve_csp_bitset(activities, weather_data, start_datetime, end_datetime, slot_minutes=CSP_SLOT_MINUTES, busy=None):
+    grid = cached_weather_grid(weather_data, start_datetime, end_datetime, slot_minutes, scheme="chance_of_rain").with_busy(busy)
+    return legacy_result(schedule_csp_bitset(activities, grid))
+
+def plot_activity_timeline(schedule, planning_day, busy=None):
+    fig, ax = plt.subplots(figsize=(10, 3))
+
+    # Fixed events the schedule was planned around
+    for index, (start, end) in enumerate(busy or ()):
+        ax.axvspan(start, end, color='lightgrey', alpha=0.6, label='Fixed events' if index == 0 else None)
+
+    # Generate distinct colors for each activity
+    colors = list(mcolors.TABLEAU_COLORS.values())
+    color_idx = 0
+
+    for activity, details in schedule.items():
+        start = details['start']
+        end = details['end']
+        ax.plot([start, end], [1, 1], color=colors[color_idx], linewidth=6, label=activity)
+        color_idx = (color_idx + 1) % len(colors)
+
+    ax.set_yticks([])
+    ax.set_xlabel('Time')
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+    plt.xticks(rotation=45)
+    plt.title(f'Activity Timeline for {planning_day.strftime("%Y-%m-%d")}')
+    plt.grid(True)
+    plt.legend()
+
+    return fig
+
+def user_interface():
+    st.title("Activity Scheduler Using Weather Constraints and CSP")
+    st.subheader("Enter Activities")
+    activities = []
+    activity_names = set()
+    activity_count = st.number_input("How many activities do you want to schedule?", min_value=1, max_value=10, step=1)
+
+    valid_input = True
+
+    for i in range(activity_count):
+        activity = add_activity_input(i)
+        if not activity['name']:
+            st.error("Activity name cannot be blank.")
+            valid_input = False
+        if activity['name'] in activity_names:
+            st.error(f"Activity name '{activity['name']}' is already used. Please use a unique name.")
+            valid_input = False
+        activity_names.add(activity['name'])
+        activities.append(activity)
+
+    st.subheader("Planning Day and Time")
+    planning_day = st.date_input("Select the Day for Planning", min_value=date.today())
+    start_time = st.time_input("Start Time", key="start_time")
+    end_time = st.time_input("End Time", key="end_time")
+    busy = fixed_events_input(planning_day)
+    solver = st.selectbox("Solver", ["csp", "csp_bitset"], format_func=lambda name: get_engine(name).label, key="solver")
+    deadline = st.number_input("Deadline (seconds)", min_value=1.0, max_value=600.0, value=DEFAULT_DEADLINE_SECONDS, step=1.0, key="deadline")
+
+    # Check for valid time inputs
+    if start_time > end_time:
+        st.error("Start time cannot be after end time.")
+        valid_input = False
+    horizon = default_weather_client(api_key).planning_horizon(location)
+    if planning_day > date.today() + timedelta(days=horizon - 1):
+        st.error(f"Date chosen must be within the next {horizon} days.")
+        valid_input = False
+
+    if st.button("Submit") and valid_input:
+        st.write("Scheduled Activities:")
+        for activity in activities:
+            st.write(activity)
+        
+        start_datetime = combine_date_time(planning_day, start_time)
+        end_datetime = combine_date_time(planning_day, end_time)
+
+        try:
+            weather_data = fetch_weather_data(api_key, location, planning_day.strftime("%Y-%m-%d"))
+        except WeatherSourceError as error:
+            st.error(f"Weather data for {planning_day} is unavailable: {error}")
+        else:
+            grid = build_weather_grid(weather_data, start_datetime, end_datetime).with_busy(busy)
+            start_job("solve_job", solver, activities, grid, deadline_seconds=deadline,
+                      context={'planning_day': planning_day, 'weather_notice': weather_notice(weather_data), 'busy': grid.busy})
+
+    show_job("solve_job", show_schedule)
+
+
+# Draws a finished solve started from the form above
+def show_schedule(job):
+    result = job.result
+    planning_day = job.context['planning_day']
+    csp_schedule, execution_time = result.as_dict(), result.execution_time
+
+    if not result.feasible:
+        st.write(result.message)
+    else:
+        st.write("Optimized Schedule:")
+        for activity in csp_schedule:
+            start = csp_schedule[activity]['start']
+            end = csp_schedule[activity]['end']
+            avg_temp = csp_schedule[activity]['average_temperature']
+            if avg_temp is not None:
+                avg_temp = math.ceil(avg_temp)
+            avg_rain_chance = csp_schedule[activity]['average_chance_of_rain']
+            if avg_rain_chance is not None:
+                avg_rain_chance = math.ceil(avg_rain_chance)
+            st.write(f"{activity}: Start at {start.strftime('%Y-%m-%d %H:%M')}, End by {end.strftime('%Y-%m-%d %H:%M')}, Average Temperature: {avg_temp}°C, Chance of Rain: {avg_rain_chance}%")
+
+        # Display execution time
+        st.write(f"Execution Time: {execution_time:.2f} seconds")  # Display execution time
+
+        # Plot and display the activity timeline
+        fig = plot_activity_timeline(csp_schedule, planning_day, job.context.get('busy'))
+        st.pyplot(fig)
+
+# Main Function
+def main():
+    ensure_metrics_server()
+    show_warmup_status(server_warmup(api_key, (location,)))
+    user_interface()
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,225 @@
+# Anytime heuristic scheduler for large plans: greedy construction followed by large-neighbourhood search
+import streamlit as st
+import pandas as pd
+import numpy as np
+from datetime import date, timedelta
+import time
+
+from weather_grid import PREFERENCE_SCORES, free_starts
+from problem_cache import cached_weather_grid
+from instrumentation import record_solve
+from solvers import build_weather_grid, make_schedule, placement_from_details, register_engine
+from solve_jobs import show_job, start_job, weather_notice
+from wcsp import add_activity_input, combine_date_time, fetch_weather_data, plot_activity_timeline, api_key, location
+from warmup import server_warmup, show_warmup_status
+from metrics import ensure_metrics_server
+from weather_client import default_weather_client
+from weather_source import WeatherSourceError
+
+# Constants and Global Variables
+MAX_ACTIVITIES = 200
+SCORE_TOLERANCE = 1e-9
+
+
+@register_engine("heuristic", "Greedy + large-neighbourhood search (15-minute slots)", partial=True, mask_feasible=True)
+def schedule_heuristic(activities, grid, seed=0, time_budget=2.0, max_iterations=None, destroy_fraction=0.3, control=None):
+    estart_time = time.time()
+    rng = np.random.default_rng(seed)
+
+    lengths = [grid.duration_slots(activity['duration']) for activity in activities]
+    placements = [grid.placement_scores(activity['weather'], length) for activity, length in zip(activities, lengths)]
+    # Scarcity is the number of start slots whose weather suits the activity at all
+    scarcity = np.array([int(feasible.sum()) for feasible, _ in placements])
+
+    def insert(assignment, occupied, indices, randomize):
+        for i in indices:
+            feasible, scores = placements[i]
+            if not feasible.size:
+                continue
+            candidates = np.flatnonzero(feasible & free_starts(occupied, lengths[i]))
+            if not candidates.size:
+                continue
+            candidate_scores = scores[candidates]
+            ties = candidates[candidate_scores >= candidate_scores.max() - SCORE_TOLERANCE]
+            start = int(ties[rng.integers(ties.size)]) if randomize else int(ties[0])
+            assignment[i] = start
+            occupied[start:start + lengths[i]] = True
+
+    def total_score(assignment):
+        return float(sum(placements[i][1][start] for i, start in assignment.items()))
+
+    def occupancy(assignment):
+        occupied = np.zeros(grid.n_slots, dtype=bool)
+        for i, start in assignment.items():
+            occupied[start:start + lengths[i]] = True
+        return occupied
+
+    # Greedy construction: scarcest weather windows first, longer activities first among equals
+    order = sorted(range(len(activities)), key=lambda i: (scarcity[i], -lengths[i]))
+    current = {}
+    insert(current, np.zeros(grid.n_slots, dtype=bool), order, randomize=False)
+    current_score = total_score(current)
+    upper_bound = float(PREFERENCE_SCORES[0]) * sum(1 for feasible, _ in placements if feasible.any())
+    convergence = [(time.time() - estart_time, 0, current_score)]
+
+    # Large-neighbourhood search: destroy part of the schedule, repair greedily, keep non-worsening moves
+    iteration = 0
+    while time.time() - estart_time < time_budget and current_score < upper_bound - SCORE_TOLERANCE:
+        if max_iterations is not None and iteration >= max_iterations:
+            break
+        if control is not None:
+            control.report(nodes=iteration, best_score=current_score)
+            if control.should_stop():
+                break
+        iteration += 1
+        scheduled = list(current)
+        if not scheduled:
+            break
+
+        candidate = dict(current)
+        if iteration % 2:
+            # Random removal
+            count = max(1, int(len(scheduled) * destroy_fraction))
+            removed = rng.choice(scheduled, size=min(count, len(scheduled)), replace=False)
+        else:
+            # Time-window removal frees a contiguous stretch of the day
+            width = max(1, int(grid.n_slots * destroy_fraction))
+            window_start = int(rng.integers(max(grid.n_slots - width, 0) + 1))
+            removed = [i for i in scheduled if window_start <= candidate[i] < window_start + width]
+        for i in removed:
+            del candidate[int(i)]
+
+        pending = [i for i in range(len(activities)) if i not in candidate]
+        noise = rng.random(len(pending))
+        pending = [i for _, i in sorted(zip(scarcity[pending] * (0.5 + noise), pending))]
+        insert(candidate, occupancy(candidate), pending, randomize=True)
+
+        candidate_score = total_score(candidate)
+        if candidate_score >= current_score - SCORE_TOLERANCE:
+            if candidate_score > current_score + SCORE_TOLERANCE:
+                convergence.append((time.time() - estart_time, iteration, candidate_score))
+            current, current_score = candidate, candidate_score
+
+    record_solve("heuristic", iterations=iteration, score=current_score, unscheduled=len(activities) - len(current))
+    report = {
+        'seed': seed,
+        'score': current_score,
+        'upper_bound': upper_bound,
+        'iterations': iteration,
+        'convergence': convergence,
+        'unscheduled': [activities[i]['name'] for i in range(len(activities)) if i not in current],
+    }
+
+    placements = [placement_from_details(activities[i]['name'], grid.describe_placement(current[i], lengths[i]))
+                  for i in current]
+
+    eend_time = time.time()
+    # Calculate execution time
+    execution_time = eend_time - estart_time
+    print(f"Execution Time: {execution_time} seconds")
+    return make_schedule("heuristic", placements, execution_time, report['unscheduled'], report, control)
+
+
+def solve_heuristic(activities, weather_data, start_datetime, end_datetime, seed=0, time_budget=2.0,
+                    slot_minutes=15, max_iterations=None, destroy_fraction=0.3):
+    grid = cached_weather_grid(weather_data, start_datetime, end_datetime, slot_minutes)
+    result = schedule_heuristic(activities, grid, seed, time_budget, max_iterations, destroy_fraction)
+    return (result.as_dict() if result.feasible else result.message), result.execution_time, result.report
+
+
+def user_interface():
+    st.title("Activity Scheduler for Large Plans (Greedy + Large-Neighbourhood Search)")
+    st.subheader("Enter Activities")
+    activities = []
+    activity_names = set()
+    activity_count = st.number_input("How many activities do you want to schedule?", min_value=1, max_value=MAX_ACTIVITIES, step=1)
+
+    valid_input = True
+
+    for i in range(activity_count):
+        activity = add_activity_input(i)
+        if not activity['name']:
+            st.error("Activity name cannot be blank.")
+            valid_input = False
+        if activity['name'] in activity_names:
+            st.error(f"Activity name '{activity['name']}' is already used. Please use a unique name.")
+            valid_input = False
+        activity_names.add(activity['name'])
+        activities.append(activity)
+
+    st.subheader("Planning Day and Time")
+    planning_day = st.date_input("Select the Day for Planning", min_value=date.today())
+    start_time = st.time_input("Start Time", key="start_time")
+    end_time = st.time_input("End Time", key="end_time")
+
+    st.subheader("Search Settings")
+    seed = st.number_input("Random seed", min_value=0, value=0, step=1)
+    time_budget = st.slider("Time budget (seconds)", min_value=0.5, max_value=30.0, value=2.0, step=0.5)
+
+    # Check for valid time inputs
+    if start_time > end_time:
+        st.error("Start time cannot be after end time.")
+        valid_input = False
+    horizon = default_weather_client(api_key).planning_horizon(location)
+    if planning_day > date.today() + timedelta(days=horizon - 1):
+        st.error(f"Date chosen must be within the next {horizon} days.")
+        valid_input = False
+
+    if st.button("Submit") and valid_input:
+        start_datetime = combine_date_time(planning_day, start_time)
+        end_datetime = combine_date_time(planning_day, end_time)
+
+        try:
+            weather_data = fetch_weather_data(api_key, location, planning_day.strftime("%Y-%m-%d"))
+        except WeatherSourceError as error:
+            st.error(f"Weather data for {planning_day} is unavailable: {error}")
+        else:
+            grid = build_weather_grid(weather_data, start_datetime, end_datetime)
+            # The time budget is the deadline here; Cancel stops the search early with the best plan so far
+            start_job("solve_job", "heuristic", activities, grid, seed=int(seed), time_budget=time_budget,
+                      context={'planning_day': planning_day, 'weather_notice': weather_notice(weather_data)})
+
+    show_job("solve_job", show_schedule)
+
+
+# Draws a finished solve started from the form above
+def show_schedule(job):
+    result = job.result
+    planning_day = job.context['planning_day']
+    schedule, execution_time, report = result.as_dict(), result.execution_time, result.report
+
+    if not result.feasible:
+        st.write(result.message)
+    else:
+        st.write("Optimized Schedule:")
+        for activity in schedule:
+            start = schedule[activity]['start']
+            end = schedule[activity]['end']
+            avg_temp = schedule[activity]['average_temperature']
+            if avg_temp is not None:
+                avg_temp = round(avg_temp, 1)
+            avg_rain_chance = schedule[activity]['average_precip_mm']
+            if avg_rain_chance is not None:
+                avg_rain_chance = round(avg_rain_chance, 2)
+            st.write(f"{activity}: Start at {start.strftime('%Y-%m-%d %H:%M')}, End by {end.strftime('%Y-%m-%d %H:%M')}, Average Temperature: {avg_temp}°C, Precipitation: {avg_rain_chance}mm")
+
+        if report['unscheduled']:
+            st.write(f"Could not fit: {', '.join(report['unscheduled'])}")
+        st.write(f"Preference score: {report['score']:.2f} of at most {report['upper_bound']:.2f} after {report['iterations']} iterations")
+        st.write(f"Execution Time: {execution_time:.2f} seconds")
+
+        # Convergence curve of the best score found so far
+        curve = pd.DataFrame(report['convergence'], columns=['elapsed', 'iteration', 'score']).set_index('elapsed')
+        st.line_chart(curve['score'])
+
+        fig = plot_activity_timeline(schedule, planning_day)
+        st.pyplot(fig)
+
+# Main Function
+def main():
+    ensure_metrics_server()
+    show_warmup_status(server_warmup(api_key, (location,)))
+    user_interface()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# Solver instrumentation: per-solve counters printed alongside the execution time and totalled per engine.
+# Only counts are totalled; levels such as a score or bound are kept as the last value seen.
+import numbers
+import threading
+from collections import defaultdict
+
+from metrics import search_nodes, solver_counters_total, solver_last_value
+
+# Counters that measure how much of the search space a solve explored
+NODE_COUNTERS = ("nodes", "orderings_evaluated", "iterations")
+# Values that are levels, not counts: summing them across solves means nothing
+LEVEL_VALUES = ("score", "upper_bound", "best_score")
+
+_lock = threading.Lock()
+_totals = defaultdict(int)
+_solves = defaultdict(int)
+last_solve = {}
+
+
+# Whole-number values not named as levels; these are summed, everything else numeric is a gauge
+def is_count(name, value):
+    return isinstance(value, numbers.Integral) and not isinstance(value, bool) and name not in LEVEL_VALUES
+
+
+def record_solve(engine, **counters):
+    with _lock:
+        last_solve[engine] = dict(counters)
+        _solves[engine] += 1
+        for name, value in counters.items():
+            if is_count(name, value):
+                _totals[(engine, name)] += value
+    for name, value in counters.items():
+        if is_count(name, value):
+            solver_counters_total.inc(value, engine=engine, counter=name)
+            if name in NODE_COUNTERS:
+                search_nodes.observe(value, engine=engine)
+        elif isinstance(value, numbers.Real) and not isinstance(value, bool):
+            solver_last_value.set(value, engine=engine, field=name)
+    print(f"[{engine}] " + ", ".join(f"{name}: {value}" for name, value in counters.items()))
+
+
+# Totals per (engine, counter) since start-up or the last reset; levels are in last_solve
+def totals():
+    with _lock:
+        return {'solves': dict(_solves), 'counters': dict(_totals)}
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+        _solves.clear()
+        last_solve.clear()
@@ -0,0 +1,189 @@
+# Process-wide counters, gauges and histograms, served in Prometheus text format on a local port.
+# Updates are a dict lookup and an add under a per-metric lock, so they are safe to call on every solve.
+import bisect
+import logging
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Constants and Global Variables
+DEFAULT_METRICS_PORT = 9464
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+NODE_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    # Label values in labelnames order; names are only attached when rendering
+    def _key(self, labels):
+        return tuple(map(labels.__getitem__, self.labelnames))
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, tuple(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{_format_labels(key)} {_format_value(value)}" for name, key, value in self.samples())
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][position] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            snapshot = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        samples = []
+        for values, counts, total, count in snapshot:
+            key = tuple(zip(self.labelnames, values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", key + (("le", _format_value(bound)),), cumulative))
+            samples.append((f"{self.name}_sum", key, total))
+            samples.append((f"{self.name}_count", key, count))
+        return samples
+
+
+REGISTRY = []
+# Callables run at scrape time for values that are cheaper to read than to track (cache sizes, hit counts)
+COLLECTORS = []
+
+
+def register_collector(collect):
+    COLLECTORS.append(collect)
+    return collect
+
+
+def exposition():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for collect in COLLECTORS:
+        try:
+            for name, kind, help_text, samples in collect():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(tuple(labels.items()))} {_format_value(value)}" for labels, value in samples)
+        except Exception:
+            logger.exception("Metrics collector failed")
+    return "\n".join(lines) + "\n"
+
+
+# Scheduler metrics
+solve_seconds = Histogram("scheduler_solve_seconds", "Wall-clock time of one solve.", ("engine",))
+solves_total = Counter("scheduler_solves_total", "Solves by engine and outcome.", ("engine", "outcome"))
+activities_per_request = Histogram("scheduler_activities_per_request", "Activities submitted per solve.", ("engine",), COUNT_BUCKETS)
+search_nodes = Histogram("scheduler_search_nodes", "Search nodes (orderings, iterations) explored per solve.", ("engine",), NODE_BUCKETS)
+solver_counters_total = Counter("scheduler_solver_counter_total", "Per-solve solver counters, summed.", ("engine", "counter"))
+solver_last_value = Gauge("scheduler_solver_last_value", "Last reported per-solve level (score, bound) by engine.", ("engine", "field"))
+weather_fetch_seconds = Histogram("scheduler_weather_fetch_seconds", "Latency of upstream weather requests.", ("endpoint",))
+weather_fetch_failures_total = Counter("scheduler_weather_fetch_failures_total", "Failed upstream weather requests.", ("endpoint", "error"))
+weather_retries_total = Counter("scheduler_weather_retries_total", "Upstream weather attempts that failed and were retried or given up.", ("endpoint", "reason"))
+weather_fallbacks_total = Counter("scheduler_weather_fallbacks_total", "Days served from stale cache or climatology because upstream was unavailable.", ("source",))
+weather_quota_remaining = Gauge("scheduler_weather_quota_remaining", "Upstream weather calls left in today's budget.")
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = exposition().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=DEFAULT_METRICS_PORT, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+# One endpoint per process, however many pages or reruns ask for it; SCHEDULER_METRICS_PORT=0 turns it off
+def ensure_metrics_server():
+    global _server
+    with _server_lock:
+        port = int(os.environ.get("SCHEDULER_METRICS_PORT", DEFAULT_METRICS_PORT))
+        if _server is None and port:
+            try:
+                _server = start_metrics_server(port)
+            except OSError as error:
+                # Another app on this host already serves the port; keep running without an endpoint
+                logger.warning("Metrics endpoint not started on port %s: %s", port, error)
+                _server = False
+        return _server or None
@@ -0,0 +1,174 @@
+# Time-indexed MILP backend for the WCSP, solved locally with SciPy's HiGHS interface
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import Bounds, LinearConstraint, milp
+import time
+
+from problem_cache import cached_weather_grid
+from shared_grids import solver_process_context
+from solvers import legacy_result, make_schedule, placement_from_details, register_engine
+
+# Constants and Global Variables
+DEFAULT_SLOT_MINUTES = 15
+IN_PROCESS_VARIABLES = 1000   # Cancellable models up to this size solve in well under 0.1 s and stay in process
+CANCEL_POLL_SECONDS = 0.05
+DEADLINE_GRACE_SECONDS = 0.5  # HiGHS presolve can overrun its time limit; the process is killed this long after the deadline
+
+
+# Sum of preference ranks over every window of `length` slots (0 means the first preference throughout)
+def window_rank_costs(ranks, length):
+    totals = np.concatenate(([0], np.cumsum(ranks)))
+    return totals[length:] - totals[:-length]
+
+
+# Builds x[a, s] = 1 iff activity a starts at slot s, restricted to weather-feasible starts.
+# `allowed` optionally narrows each activity further, one boolean mask over its start slots.
+# `start_costs` optionally replaces the rank costs and the weather check: one cost per start slot for each
+# activity, infinite where it may not start.
+def build_milp(grid, activities, allowed=None, start_costs=None):
+    costs, var_activity, var_start, lengths = [], [], [], []
+    for index, activity in enumerate(activities):
+        length = grid.duration_slots(activity['duration'])
+        if start_costs is None:
+            feasible, _ = grid.placement_scores(activity['weather'], length)
+            activity_costs = None
+        else:
+            activity_costs = np.asarray(start_costs[index], dtype=float)
+            feasible = np.isfinite(activity_costs)
+        if allowed is not None:
+            feasible = feasible & allowed[index]
+        starts = np.flatnonzero(feasible)
+        if activity_costs is None:
+            costs.append(window_rank_costs(grid.preference_ranks(activity['weather']), length)[starts])
+        else:
+            costs.append(activity_costs[starts])
+        var_activity.append(np.full(starts.size, index))
+        var_start.append(starts)
+        lengths.append(length)
+
+    costs = np.concatenate(costs).astype(float) if costs else np.zeros(0)
+    var_activity = np.concatenate(var_activity) if var_activity else np.zeros(0, dtype=np.int64)
+    var_start = np.concatenate(var_start) if var_start else np.zeros(0, dtype=np.int64)
+    var_length = np.asarray(lengths, dtype=np.int64)[var_activity]
+    n_vars = costs.size
+
+    # Every activity is scheduled exactly once
+    assign = sp.csr_array((np.ones(n_vars), (var_activity, np.arange(n_vars))), shape=(len(activities), n_vars))
+
+    # No slot is covered by more than one placement: one row per slot, one entry per covered slot
+    cover_counts = var_length
+    cover_vars = np.repeat(np.arange(n_vars), cover_counts)
+    offsets = np.arange(cover_counts.sum()) - np.repeat(np.cumsum(cover_counts) - cover_counts, cover_counts)
+    cover_slots = var_start[cover_vars] + offsets
+    overlap = sp.csr_array((np.ones(cover_vars.size), (cover_slots, cover_vars)), shape=(grid.n_slots, n_vars))
+
+    constraints = [
+        LinearConstraint(assign, lb=1, ub=1),
+        LinearConstraint(overlap, lb=0, ub=1),
+    ]
+    return costs, constraints, var_activity, var_start
+
+
+def solve_highs(costs, constraints, time_limit=None):
+    options = {} if time_limit is None else {'time_limit': time_limit}
+    return milp(costs, constraints=constraints, integrality=np.ones(costs.size), bounds=Bounds(0, 1), options=options)
+
+
+def _highs_worker(connection, costs, constraints, time_limit):
+    try:
+        connection.send(solve_highs(costs, constraints, time_limit))
+    except Exception as error:
+        connection.send(error)
+    finally:
+        connection.close()
+
+
+# The model solved in a child process, polled so a cancel (or a deadline HiGHS overran) kills it at once.
+# None when it was killed.
+def _solve_highs_killable(costs, constraints, time_limit, control):
+    context = solver_process_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_highs_worker, args=(sender, costs, constraints, time_limit), daemon=True)
+    process.start()
+    sender.close()
+    try:
+        while not receiver.poll(CANCEL_POLL_SECONDS):
+            if control.should_stop() and (control.stop_reason == "cancelled"
+                                          or time.time() > control.deadline + DEADLINE_GRACE_SECONDS):
+                return None
+            if not process.is_alive() and not receiver.poll():
+                raise RuntimeError(f"HiGHS process exited with code {process.exitcode}")
+        result = receiver.recv()
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        receiver.close()
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+# HiGHS cannot be interrupted from Python, and its time limit does not bound presolve. A model that can be
+# cancelled is solved in a child process Cancel can kill, unless it is small enough to finish before anyone could
+# press Cancel. A killed solve returns None.
+def run_highs(costs, constraints, time_limit=None, control=None):
+    if control is None or costs.size <= IN_PROCESS_VARIABLES:
+        return solve_highs(costs, constraints, time_limit)
+    return _solve_highs_killable(costs, constraints, time_limit, control)
+
+
+# Start slot of every activity in the best solution HiGHS finds on `grid`, with the raw result and model size.
+# Starts are None when the model is infeasible, out of time or stopped.
+def optimal_starts(grid, activities, allowed=None, time_limit=None, control=None, start_costs=None):
+    costs, constraints, var_activity, var_start = build_milp(grid, activities, allowed, start_costs)
+
+    # An activity without a single weather-feasible start makes the whole problem infeasible
+    if np.setdiff1d(np.arange(len(activities)), var_activity).size:
+        return None, None, int(costs.size)
+
+    # A deadline becomes HiGHS's time limit and the best incumbent is kept; run_highs makes cancel stop the solve
+    if control is not None:
+        if control.should_stop():
+            return None, None, int(costs.size)
+        remaining = control.remaining()
+        if remaining is not None:
+            time_limit = remaining if time_limit is None else min(time_limit, remaining)
+        control.report(variables=int(costs.size))
+
+    result = run_highs(costs, constraints, time_limit, control)
+    if control is not None:
+        control.should_stop()
+
+    if result is None or result.x is None:
+        return None, result, int(costs.size)
+    chosen = np.flatnonzero(result.x > 0.5)
+    starts = np.empty(len(activities), dtype=np.int64)
+    starts[var_activity[chosen]] = var_start[chosen]
+    return starts, result, int(costs.size)
+
+
+@register_engine("milp", "MILP (HiGHS, 15-minute slots)", slot_minutes=DEFAULT_SLOT_MINUTES, mask_feasible=True)
+def schedule_milp(activities, grid, time_limit=None, control=None):
+    estart_time = time.time()
+
+    starts, result, _ = optimal_starts(grid, activities, time_limit=time_limit, control=control)
+    if starts is None:
+        return make_schedule("milp", (), time.time() - estart_time, control=control)
+
+    # Convert solution to the same format solve_wcsp returns
+    placements = []
+    for activity, start in zip(activities, starts):
+        placement = grid.describe_placement(start, grid.duration_slots(activity['duration']))
+        placements.append(placement_from_details(activity['name'], placement))
+
+    eend_time = time.time()
+    # Calculate execution time
+    execution_time = eend_time - estart_time
+    print(f"Execution Time: {execution_time} seconds")
+    return make_schedule("milp", placements, execution_time, report={'status': result.message}, control=control)
+
+
+def solve_milp(activities, weather_data, start_datetime, end_datetime, slot_minutes=DEFAULT_SLOT_MINUTES, time_limit=None):
+    grid = cached_weather_grid(weather_data, start_datetime, end_datetime, slot_minutes)
+    return legacy_result(schedule_milp(activities, grid, time_limit=time_limit))
@@ -0,0 +1,117 @@
+# Coarse-to-fine search over the slot grid: the time-indexed MILP is solved on an hourly view first, then
+# re-solved at 15 minutes and at 1 minute with every activity limited to a neighbourhood of its coarser start.
+# Each level stays small, so minute-level placement costs about as much as an hourly search.
+import time
+
+import numpy as np
+
+from milp import optimal_starts, window_rank_costs
+from solvers import make_schedule, placement_from_details, register_engine
+
+# Constants and Global Variables
+RESOLUTION_LEVELS = (60, 15, 5, 1)  # Slot minutes, coarsest first; the last level is the resolution of the answer
+NEIGHBOURHOOD_SLOTS = 2          # Coarse slots searched either side of each coarse start at the next level
+
+
+# Per activity, the start slots of `grid` within `radius_minutes` of where the coarser level started it
+def neighbourhood_masks(grid, activities, coarse_minutes, radius_minutes):
+    masks = []
+    for activity, start_minute in zip(activities, coarse_minutes):
+        n_starts = max(grid.n_slots - grid.duration_slots(activity['duration']) + 1, 0)
+        slot_minutes = np.arange(n_starts) * grid.slot_minutes
+        masks.append(np.abs(slot_minutes - start_minute) <= radius_minutes)
+    return masks
+
+
+# Preference-rank cost of a set of starts on `grid`, in rank-minutes so levels and bounds compare directly
+def rank_minutes(grid, activities, starts):
+    total = 0
+    for activity, start in zip(activities, starts):
+        length = grid.duration_slots(activity['duration'])
+        total += int(window_rank_costs(grid.preference_ranks(activity['weather']), length)[start])
+    return total * grid.slot_minutes
+
+
+# Lower bound on the full-resolution optimum: every activity at its own cheapest start, overlaps ignored.
+# None when some activity has no weather-feasible start at all.
+def independent_bound(grid, activities):
+    total = 0
+    for activity in activities:
+        length = grid.duration_slots(activity['duration'])
+        feasible, _ = grid.placement_scores(activity['weather'], length)
+        if not feasible.any():
+            return None
+        total += int(window_rank_costs(grid.preference_ranks(activity['weather']), length)[feasible].min())
+    return total * grid.slot_minutes
+
+
+@register_engine("multires", "Coarse-to-fine MILP (1 h, 15 min, 1 min)", slot_minutes=min(RESOLUTION_LEVELS),
+                 mask_feasible=True)
+def schedule_multires(activities, grid, levels=RESOLUTION_LEVELS, neighbourhood_slots=NEIGHBOURHOOD_SLOTS,
+                      time_limit=None, control=None):
+    estart_time = time.time()
+    levels = sorted(set(levels) | {grid.slot_minutes}, reverse=True)
+    levels = [slot_minutes for slot_minutes in levels if slot_minutes >= grid.slot_minutes]
+    report = {'levels': []}
+
+    # One time budget for the whole search: each level gets an equal share of what is left, so later levels
+    # are not starved by a slow one and the total stays within time_limit and the control's deadline
+    deadline = None if time_limit is None else estart_time + time_limit
+
+    def level_limit(levels_left):
+        remaining = None if deadline is None else max(deadline - time.time(), 0)
+        if control is not None and control.remaining() is not None:
+            remaining = control.remaining() if remaining is None else min(remaining, control.remaining())
+        return None if remaining is None else remaining / levels_left
+
+    best = None  # (level grid, starts) of the finest level solved so far
+    for position, slot_minutes in enumerate(levels):
+        levels_left = len(levels) - position
+        if control is not None and control.should_stop() or level_limit(levels_left) == 0:
+            break
+        level_grid = grid.view(slot_minutes)
+        allowed = None
+        if best is not None:
+            coarse_grid, coarse_starts = best
+            allowed = neighbourhood_masks(level_grid, activities, coarse_starts * coarse_grid.slot_minutes,
+                                          neighbourhood_slots * coarse_grid.slot_minutes)
+        level_started = time.time()
+        starts, _, variables = optimal_starts(level_grid, activities, allowed, level_limit(levels_left), control)
+        # The neighbourhood can miss when a coarse slot straddles an hour it never classified; widen to the whole level
+        if (starts is None and allowed is not None and not (control is not None and control.should_stop())
+                and level_limit(levels_left) != 0):
+            starts, _, widened = optimal_starts(level_grid, activities, None, level_limit(levels_left), control)
+            variables += widened
+        report['levels'].append({'slot_minutes': slot_minutes, 'variables': variables, 'feasible': starts is not None,
+                                 'seconds': time.time() - level_started})
+        if starts is not None:
+            best = (level_grid, starts)
+        elif control is not None and control.should_stop():
+            break
+        elif level_limit(levels_left) == 0:
+            # Out of time rather than infeasible: keep the coarser answer
+            break
+        else:
+            # Infeasible at this resolution even unrestricted. A finer level can still fit (durations round up
+            # to whole slots), but it searches from scratch, and coarser answers are never returned for it.
+            best = None
+
+    if best is None:
+        return make_schedule("multires", (), time.time() - estart_time, report=report, control=control)
+
+    # Measured gap to the full-resolution optimum: 0 proves the coarse-to-fine answer optimal
+    final_grid, starts = best
+    finest = grid.view(levels[-1])
+    objective = rank_minutes(final_grid, activities, starts)
+    bound = independent_bound(finest, activities)
+    report.update(resolution_minutes=final_grid.slot_minutes, objective_rank_minutes=objective,
+                  lower_bound_rank_minutes=bound, gap_rank_minutes=None if bound is None else objective - bound)
+
+    placements = []
+    for activity, start in zip(activities, starts):
+        placement = final_grid.describe_placement(start, final_grid.duration_slots(activity['duration']))
+        placements.append(placement_from_details(activity['name'], placement))
+
+    execution_time = time.time() - estart_time
+    print(f"Execution Time: {execution_time} seconds")
+    return make_schedule("multires", placements, execution_time, report=report, control=control)
@@ -0,0 +1,199 @@
+# Multi-objective scheduling: instead of one best plan, the set of plans where no objective can improve
+# without another getting worse. Objectives (all minimized): weather-preference shortfall, time outside the
+# comfortable temperature range, idle time between activities and the finishing time.
+import time
+
+import numpy as np
+
+from milp import optimal_starts
+from solvers import make_schedule, placement_from_details, register_engine
+from weather_grid import PREFERENCE_SCORES, free_starts
+
+# Constants and Global Variables
+OBJECTIVES = ("weather_shortfall", "comfort_degree_hours", "idle_hours", "finish_hours")
+COMFORT_RANGE_C = (15.0, 25.0)
+DEFAULT_FRONT_SIZE = 24       # Plans kept on the front; the most crowded are dropped beyond this
+DESTROY_FRACTION = 0.3
+# Weighted sums of the additive objectives (weather, comfort, end times) solved exactly to seed the front
+SEED_WEIGHTS = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0), (1.0, 1.0, 1.0))
+
+
+# Rows of `points` (minimized in every column) that no other row dominates; of identical rows only the first.
+# After a lexicographic sort no row can be dominated by a later one, so each row is compared only with the
+# front found so far.
+def non_dominated(points):
+    points = np.asarray(points, dtype=float)
+    keep = np.zeros(len(points), dtype=bool)
+    if not len(points):
+        return keep
+    front = np.empty_like(points)
+    size = 0
+    for index in np.lexsort(points.T[::-1]):
+        if size and (front[:size] <= points[index]).all(axis=1).any():
+            continue
+        keep[index] = True
+        front[size] = points[index]
+        size += 1
+    return keep
+
+
+# NSGA-II crowding distance: how much room each point has along the front; the extremes get infinity
+def crowding_distance(points):
+    points = np.asarray(points, dtype=float)
+    n_points = len(points)
+    distance = np.zeros(n_points)
+    if n_points <= 2:
+        return np.full(n_points, np.inf)
+    for column in points.T:
+        order = np.argsort(column, kind="stable")
+        span = column[order[-1]] - column[order[0]]
+        distance[order[0]] = distance[order[-1]] = np.inf
+        if span > 0:
+            distance[order[1:-1]] += (column[order[2:]] - column[order[:-2]]) / span
+    return distance
+
+
+# Bounded set of mutually non-dominated solutions
+class ParetoArchive:
+    def __init__(self, max_size=DEFAULT_FRONT_SIZE, n_objectives=len(OBJECTIVES)):
+        self.max_size = max_size
+        self.points = np.empty((0, n_objectives))
+        self.solutions = []
+
+    def __len__(self):
+        return len(self.solutions)
+
+    # Adds a solution unless an archived one is at least as good everywhere; returns whether it was kept
+    def add(self, objectives, solution):
+        objectives = np.asarray(objectives, dtype=float)
+        if len(self.solutions) and (self.points <= objectives).all(axis=1).any():
+            return False
+        survivors = ~(objectives <= self.points).all(axis=1)
+        self.points = np.vstack((self.points[survivors], objectives))
+        self.solutions = [solution for solution, kept in zip(self.solutions, survivors) if kept] + [solution]
+        while len(self.solutions) > self.max_size:
+            crowded = int(np.argmin(crowding_distance(self.points)))
+            self.points = np.delete(self.points, crowded, axis=0)
+            del self.solutions[crowded]
+        return any(kept is solution for kept in self.solutions)
+
+
+# Hours outside [low, high] °C for every slot (missing temperatures count as comfortable)
+def comfort_deviation(temp_c, comfort_range):
+    low, high = comfort_range
+    deviation = np.maximum(low - temp_c, 0) + np.maximum(temp_c - high, 0)
+    return np.nan_to_num(deviation, nan=0.0)
+
+
+@register_engine("pareto", "Pareto front (weather, comfort, idle time, finish)", mask_feasible=True)
+def schedule_pareto(activities, grid, comfort_range=COMFORT_RANGE_C, seed=0, time_budget=1.0, max_iterations=None,
+                    max_front=DEFAULT_FRONT_SIZE, control=None):
+    estart_time = time.time()
+    rng = np.random.default_rng(seed)
+    hours_per_slot = grid.slot_minutes / 60
+    n_activities = len(activities)
+
+    # Per activity and start slot: weather feasibility, shortfall from a perfect score and degree-hours of discomfort
+    lengths = np.array([grid.duration_slots(activity['duration']) for activity in activities], dtype=np.int64)
+    comfort_totals = np.concatenate(([0.0], np.cumsum(comfort_deviation(grid.temp_c, comfort_range))))
+    feasible, shortfall, comfort = [], [], []
+    for activity, length in zip(activities, lengths):
+        activity_feasible, scores = grid.placement_scores(activity['weather'], length)
+        feasible.append(activity_feasible)
+        shortfall.append((PREFERENCE_SCORES[0] - scores) * length * hours_per_slot)
+        comfort.append((comfort_totals[length:] - comfort_totals[:-length]) * hours_per_slot if activity_feasible.size else np.zeros(0))
+
+    def objectives(starts):
+        ends = starts + lengths
+        return np.array([
+            sum(shortfall[i][start] for i, start in enumerate(starts)),
+            sum(comfort[i][start] for i, start in enumerate(starts)),
+            (ends.max() - starts.min() - lengths.sum()) * hours_per_slot,
+            ends.max() * hours_per_slot,
+        ])
+
+    report = {'objectives': OBJECTIVES, 'comfort_range': tuple(comfort_range), 'front': [], 'iterations': 0}
+    if not n_activities or any(not mask.any() for mask in feasible):
+        return make_schedule("pareto", (), time.time() - estart_time, report=report, control=control)
+
+    # Weights act on objectives scaled to comparable ranges
+    def spread(tables):
+        values = np.concatenate([table[mask] for table, mask in zip(tables, feasible)])
+        return max(float(np.ptp(values)), 1e-9)
+    shortfall_scale, comfort_scale = spread(shortfall), spread(comfort)
+
+    # Scaled cost of every start of activity i under `weights`; a fourth weight pulls it towards the occupied block
+    def activity_costs(i, weights, occupied=None):
+        ends = np.arange(feasible[i].size) + lengths[i]
+        cost = (weights[0] * shortfall[i] / shortfall_scale + weights[1] * comfort[i] / comfort_scale
+                + weights[2] * ends / grid.n_slots)
+        if occupied is not None and occupied.any():
+            busy = np.flatnonzero(occupied)
+            gap = np.maximum(np.maximum(busy[0] - ends, ends - lengths[i] - (busy[-1] + 1)), 0)
+            cost = cost + weights[3] * gap / grid.n_slots
+        return np.where(feasible[i], cost, np.inf)
+
+    archive = ParetoArchive(max_front)
+
+    # Exact seeds: each weighted sum of the additive objectives, solved by the MILP
+    seed_time_limit = max(time_budget / (2 * len(SEED_WEIGHTS)), 0.05)
+    for weights in SEED_WEIGHTS:
+        if control is not None and control.should_stop():
+            break
+        starts, _, _ = optimal_starts(grid, activities, time_limit=seed_time_limit, control=control,
+                                      start_costs=[activity_costs(i, weights) for i in range(n_activities)])
+        if starts is not None:
+            archive.add(objectives(starts), starts)
+
+    # Pareto local search: take an archived plan, free some activities and re-place them under random weights
+    iteration = 0
+    while len(archive) and time.time() - estart_time < time_budget:
+        if max_iterations is not None and iteration >= max_iterations:
+            break
+        if control is not None:
+            control.report(nodes=iteration, front_size=len(archive))
+            if control.should_stop():
+                break
+        iteration += 1
+        starts = archive.solutions[rng.integers(len(archive))].copy()
+        removed = rng.choice(n_activities, size=max(1, int(n_activities * DESTROY_FRACTION)), replace=False)
+        occupied = np.zeros(grid.n_slots, dtype=bool)
+        for i in np.setdiff1d(np.arange(n_activities), removed):
+            occupied[starts[i]:starts[i] + lengths[i]] = True
+
+        weights = rng.dirichlet(np.ones(4))
+        complete = True
+        for i in rng.permutation(removed):
+            costs = np.where(free_starts(occupied, lengths[i]), activity_costs(i, weights, occupied), np.inf)
+            if not np.isfinite(costs).any():
+                complete = False
+                break
+            starts[i] = int(np.argmin(costs))
+            occupied[starts[i]:starts[i] + lengths[i]] = True
+        if complete:
+            archive.add(objectives(starts), starts)
+
+    # The plan shown first is the one closest to the ideal point once every objective is scaled to [0, 1]
+    points = archive.points
+    scaled = (points - points.min(axis=0)) / np.maximum(np.ptp(points, axis=0), 1e-9) if len(points) else points
+    order = np.argsort(scaled.sum(axis=1), kind="stable") if len(points) else []
+    total_hours = float(lengths.sum() * hours_per_slot)
+
+    front = []
+    for index in order:
+        starts = archive.solutions[index]
+        front.append({
+            'weather_score': float(PREFERENCE_SCORES[0] - points[index][0] / total_hours),
+            'comfort_degree_hours': float(points[index][1]),
+            'idle_hours': float(points[index][2]),
+            'finish': grid.slot_time(int((starts + lengths).max())),
+            'placements': tuple(sorted((placement_from_details(activity['name'], grid.describe_placement(start, length))
+                                        for activity, start, length in zip(activities, starts, lengths)),
+                                       key=lambda placement: placement.start)),
+        })
+    report.update(front=front, iterations=iteration)
+
+    execution_time = time.time() - estart_time
+    print(f"Execution Time: {execution_time} seconds")
+    placements = front[0]['placements'] if front else ()
+    return make_schedule("pareto", placements, execution_time, report=report, control=control)
@@ -0,0 +1,163 @@
+# Performance regression suite: runs the benchmark corpus against stored per-solver latency baselines
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+from benchmarks import INSTANCES, measure, synthetic_weather
+
+# Constants and Global Variables
+PERF_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perf")
+BASELINE_PATH = os.path.join(PERF_DIR, "baselines.json")
+HISTORY_PATH = os.path.join(PERF_DIR, "history.jsonl")
+DEFAULT_TOLERANCE = 1.0       # Fail when a solve takes more than twice its baseline
+DEFAULT_NOISE_FLOOR = 0.002   # Slowdowns smaller than this many seconds are treated as timer noise
+NOISE_FRACTION = 0.5          # ...or smaller than this fraction of the expected time, whichever is larger
+
+
+# Fixed pure-Python workload; timings are divided by it so baselines carry over between machines
+def calibration_seconds(rounds=5):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        total = 0
+        for value in range(300000):
+            total += value % 7
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_corpus(repeat=3, engines=None, instances=None):
+    weather_data = synthetic_weather()
+    results = {}
+    for instance_name in instances or INSTANCES:
+        for engine in INSTANCES[instance_name]["engines"]:
+            if engines and engine not in engines:
+                continue
+            # Best of `repeat` runs is the most stable estimate of the solver's own cost
+            runs = [measure(engine, instance_name, weather_data=weather_data) for _ in range(repeat)]
+            results[f"{engine}/{instance_name}"] = {
+                'seconds': min(run['seconds'] for run in runs),
+                'feasible': runs[0]['feasible'],
+            }
+    return results
+
+
+def load_baselines(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def save_baselines(results, calibration, path=BASELINE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as handle:
+        json.dump({'calibration_seconds': calibration, 'results': results}, handle, indent=2, sort_keys=True)
+
+
+def append_history(results, calibration, path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = {
+        'timestamp': datetime.now().isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'calibration_seconds': calibration,
+        'results': results,
+    }
+    with open(path, "a") as handle:
+        handle.write(json.dumps(entry, sort_keys=True) + "\n")
+
+
+# Compares machine-normalized timings; returns one row per case and whether any case failed.
+# The noise allowance scales with the expected time, so millisecond solves are held to the same ratio as slow ones.
+def compare(results, calibration, baselines, tolerance=DEFAULT_TOLERANCE, noise_floor=DEFAULT_NOISE_FLOOR):
+    scale = calibration / baselines['calibration_seconds']
+    rows = []
+    failed = False
+    for case, result in results.items():
+        baseline = baselines['results'].get(case)
+        if baseline is None:
+            rows.append((case, result['seconds'], None, None, "NEW"))
+            continue
+        expected = baseline['seconds'] * scale
+        ratio = result['seconds'] / expected if expected > 0 else float("inf")
+        if result['feasible'] != baseline['feasible']:
+            status = "WRONG RESULT"
+        elif result['seconds'] > expected * (1 + tolerance) and result['seconds'] - expected > max(noise_floor, NOISE_FRACTION * expected):
+            status = "SLOWER"
+        elif result['seconds'] < expected * (1 - tolerance / 2):
+            status = "faster"
+        else:
+            status = "ok"
+        failed = failed or status in ("WRONG RESULT", "SLOWER")
+        rows.append((case, result['seconds'], expected, ratio, status))
+    return rows, failed
+
+
+# Trend of every case over the recorded history, as a PNG
+def plot_history(output_path, path=HISTORY_PATH):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    with open(path) as handle:
+        entries = [json.loads(line) for line in handle if line.strip()]
+    fig, ax = plt.subplots(figsize=(12, 6))
+    cases = sorted({case for entry in entries for case in entry['results']})
+    for case in cases:
+        points = [(datetime.fromisoformat(entry['timestamp']), entry['results'][case]['seconds'] / entry['calibration_seconds'])
+                  for entry in entries if case in entry['results']]
+        ax.plot([point[0] for point in points], [point[1] for point in points], marker="o", label=case)
+    ax.set_yscale("log")
+    ax.set_ylabel("Solve time / calibration time")
+    ax.set_title("Solver latency history")
+    ax.legend(fontsize="small", ncol=2)
+    fig.autofmt_xdate()
+    fig.savefig(output_path, bbox_inches="tight")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check solver latencies against stored baselines")
+    parser.add_argument("--engines", nargs="*", help="engines to check (default: all)")
+    parser.add_argument("--instances", nargs="*", help="instances to check (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest counts")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed relative slowdown")
+    parser.add_argument("--update-baselines", action="store_true", help="store this run as the new baselines")
+    parser.add_argument("--history", action="store_true", help="append this run to the history file")
+    parser.add_argument("--plot", metavar="PNG", help="plot the recorded history to this file and exit")
+    args = parser.parse_args()
+
+    if args.plot:
+        print(f"Wrote {plot_history(args.plot)}")
+        return 0
+
+    calibration = calibration_seconds()
+    results = run_corpus(args.repeat, args.engines, args.instances)
+    if args.history:
+        append_history(results, calibration)
+
+    baselines = load_baselines()
+    if args.update_baselines or baselines is None:
+        if baselines is not None:
+            # Keep baselines of cases that were not part of this (filtered) run
+            results = {**baselines['results'], **results}
+        save_baselines(results, calibration)
+        print(f"Stored {len(results)} baselines in {BASELINE_PATH}")
+        return 0
+
+    rows, failed = compare(results, calibration, baselines, args.tolerance)
+    print(f"{'case':<32}{'seconds':>10}{'expected':>10}{'ratio':>8}  status")
+    for case, seconds, expected, ratio, status in rows:
+        expected_text = f"{expected:.4f}" if expected is not None else "-"
+        ratio_text = f"{ratio:.2f}" if ratio is not None else "-"
+        print(f"{case:<32}{seconds:>10.4f}{expected_text:>10}{ratio_text:>8}  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
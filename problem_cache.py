@@ -0,0 +1,121 @@
+# Bounded LRU caches for the compiled pieces of a scheduling problem, reused across solver calls
+import threading
+import weakref
+from collections import OrderedDict
+
+from weather_grid import WeatherGrid, weather_fingerprint
+from metrics import register_collector
+
+# Every live cache, including ones owned by other objects (weather clients), for the metrics endpoint
+ALL_CACHES = weakref.WeakSet()
+
+
+class LRUCache:
+    def __init__(self, name, maxsize):
+        self.name = name
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        ALL_CACHES.add(self)
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # Build outside the lock; if two callers race, the later value simply replaces the earlier one
+        value = build()
+        self.put(key, value)
+        return value
+
+    # Plain lookup and insert, for values that are fetched rather than built on demand
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Per-(window, slot size, duration) candidate start lists
+candidate_cache = LRUCache("candidate_starts", 256)
+# Per-(day, window, duration, preference set) weather-feasible candidates
+feasibility_cache = LRUCache("feasibility_masks", 1024)
+# Per-day, per-window slot grids (they also carry the parsed hourly weather)
+weather_grid_cache = LRUCache("weather_grids", 64)
+# Solved schedules by canonical problem fingerprint (solution_cache.py)
+solution_cache_entries = LRUCache("solutions", 512)
+
+CACHES = (candidate_cache, feasibility_cache, weather_grid_cache, solution_cache_entries)
+
+
+def cached_weather_grid(weather_data, start_datetime, end_datetime, slot_minutes, scheme="precip", weather_key=None):
+    if weather_key is None:
+        weather_key = weather_fingerprint(weather_data)
+    key = (weather_key, start_datetime, end_datetime, slot_minutes, scheme)
+    return weather_grid_cache.get_or_build(key, lambda: WeatherGrid(weather_data, start_datetime, end_datetime, slot_minutes, scheme, weather_key))
+
+
+def cache_totals():
+    hits = sum(cache.hits for cache in CACHES)
+    misses = sum(cache.misses for cache in CACHES)
+    return hits, misses
+
+
+def cache_stats():
+    return {cache.name: cache.stats() for cache in CACHES}
+
+
+# Hits, misses, size and hit ratio per cache name, read at scrape time rather than tracked per lookup
+@register_collector
+def cache_metrics():
+    by_name = {}
+    for cache in list(ALL_CACHES):
+        totals = by_name.setdefault(cache.name, [0, 0, 0])
+        totals[0] += cache.hits
+        totals[1] += cache.misses
+        totals[2] += len(cache._entries)
+    names = sorted(by_name)
+    return [
+        ("scheduler_cache_hits_total", "counter", "Cache hits.", [({'cache': name}, by_name[name][0]) for name in names]),
+        ("scheduler_cache_misses_total", "counter", "Cache misses.", [({'cache': name}, by_name[name][1]) for name in names]),
+        ("scheduler_cache_entries", "gauge", "Entries currently cached.", [({'cache': name}, by_name[name][2]) for name in names]),
+        ("scheduler_cache_hit_ratio", "gauge", "Hits over lookups since start-up.",
+         [({'cache': name}, by_name[name][0] / max(by_name[name][0] + by_name[name][1], 1)) for name in names]),
+    ]
+
+
+def clear_caches():
+    for cache in CACHES:
+        cache.clear()
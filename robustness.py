@@ -0,0 +1,195 @@
+# Schedules under forecast uncertainty: chance_of_rain is a probability, not a threshold. Thousands of
+# precipitation outcomes are sampled per day in one NumPy batch, and every placement is scored against all of them.
+# The "robust" engine maximizes expected preference satisfaction instead of requiring the forecast to fit.
+import time
+
+import numpy as np
+from scipy.signal import lfilter
+from scipy.special import ndtri
+
+from milp import optimal_starts
+from solvers import make_schedule, placement_from_details, register_engine
+from weather_grid import NO_MATCH, PREFERENCE_SCORES, classify_precip, free_starts, preference_list
+
+# Constants and Global Variables
+DEFAULT_SAMPLES = 4000
+DEFAULT_SEED = 0
+RAIN_CORRELATION = 0.8  # Hour-to-hour correlation of the latent rain field; showers tend to last longer than an hour
+WET_HOUR_MM = 0.5       # Mean rainfall of a wet hour when the forecast gives a chance of rain but no amount
+
+
+# (n_samples, n_hours) precipitation outcomes for the grid's hours, NaN where the forecast has no data.
+# Each hour is wet with its chance_of_rain, wet hours cluster through an AR(1) Gaussian field, and a wet hour's
+# amount is exponential with the mean that keeps the forecast precip_mm as the hour's expected rainfall.
+def precip_scenarios(grid, n_samples=DEFAULT_SAMPLES, seed=DEFAULT_SEED, correlation=RAIN_CORRELATION):
+    if not 0 <= correlation < 1:
+        raise ValueError("correlation must be in [0, 1)")
+    chance = grid.hourly['chance_of_rain'] / 100
+    precip = grid.hourly['precip_mm']
+    unknown = np.isnan(chance) & np.isnan(precip)
+
+    # An amount with no chance (or a zero chance) is taken as certain rain
+    wet_probability = np.where(np.isnan(chance) | ((precip > 0) & (chance == 0)), (precip > 0).astype(float), chance)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wet_mean = np.where(precip > 0, precip / wet_probability, WET_HOUR_MM)
+
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal((n_samples, chance.size))
+    scale = np.sqrt(1 - correlation ** 2)
+    noise[:, :1] /= scale
+    latent = lfilter([scale], [1.0, -correlation], noise, axis=1)
+    wet = latent < ndtri(wet_probability)
+    samples = np.where(wet, rng.exponential(1.0, wet.shape) * wet_mean, 0.0)
+    samples[:, unknown] = np.nan
+    return samples
+
+
+# Preference rank of every sampled hour (NO_MATCH if none); hours without data match the first preference
+def sample_ranks(samples, preferences):
+    unknown = np.isnan(samples)
+    masks = classify_precip(samples)
+    ranks = np.full(samples.shape, NO_MATCH, dtype=np.int8)
+    for rank, preference in reversed(list(enumerate(preference_list(preferences)))):
+        ranks[masks[preference] | unknown] = rank
+    return ranks
+
+
+# Sampled weather for one grid. Classes always come from sampled rainfall (the precip scheme), whatever
+# scheme the schedule was planned on, because that is the weather the activities would meet.
+class RobustnessModel:
+    def __init__(self, grid, n_samples=DEFAULT_SAMPLES, seed=DEFAULT_SEED, correlation=RAIN_CORRELATION):
+        self.grid = grid
+        self.samples = precip_scenarios(grid, n_samples, seed, correlation)
+        self._ranks = {}
+
+    @property
+    def n_samples(self):
+        return self.samples.shape[0]
+
+    def ranks(self, preferences):
+        key = tuple(preference_list(preferences))
+        if key not in self._ranks:
+            self._ranks[key] = sample_ranks(self.samples, key)
+        return self._ranks[key]
+
+    # (n_samples, n_placements) whether each placement stays within preferences in each sample, and each
+    # placement's expected mean preference score. Placements are start slots and lengths in slots.
+    def placement_outcomes(self, preferences, start_slots, lengths):
+        grid = self.grid
+        start_slots = np.asarray(start_slots, dtype=np.int64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        ranks = self.ranks(preferences)
+        misses = np.concatenate((np.zeros((self.n_samples, 1), dtype=np.int32), np.cumsum(ranks == NO_MATCH, axis=1, dtype=np.int32)), axis=1)
+        first_hour = grid.slot_hour[start_slots]
+        last_hour = grid.slot_hour[start_slots + lengths - 1]
+        within = (misses[:, last_hour + 1] - misses[:, first_hour]) == 0
+
+        # Expected score is linear in the samples, so the per-hour mean is all it needs
+        slot_scores = PREFERENCE_SCORES[ranks].mean(axis=0)[grid.slot_hour]
+        totals = np.concatenate(([0.0], np.cumsum(slot_scores)))
+        expected = (totals[start_slots + lengths] - totals[start_slots]) / lengths
+        return within, expected
+
+    # Chance of staying within preferences and expected score of every start slot for an activity of `length` slots
+    def start_outcomes(self, preferences, length):
+        n_starts = self.grid.n_slots - length + 1
+        if length <= 0 or n_starts <= 0:
+            return np.zeros(0), np.zeros(0)
+        within, expected = self.placement_outcomes(preferences, np.arange(n_starts), np.full(n_starts, length))
+        return within.mean(axis=0), expected
+
+    # For each candidate schedule (a Schedule, a list of Placements or a {name: {'start', 'end'}} dict):
+    # the chance every placed activity stays within its preferences, each activity's own chance, and the
+    # duration-weighted expected preference score (3 = first preference throughout). All candidates share
+    # one set of samples, and placements common to several candidates are scored once.
+    def evaluate(self, activities, schedules):
+        grid = self.grid
+        by_name = {activity['name']: activity for activity in activities}
+        slot = np.timedelta64(grid.slot_minutes, 'm')
+        placements = {}  # (preferences, start slot, length) -> column
+        columns, names = [], []
+        for schedule in schedules:
+            entries = _schedule_entries(schedule)
+            schedule_columns = []
+            for name, start in entries:
+                activity = by_name[name]
+                start_slot = int((np.datetime64(start) - np.datetime64(grid.start_datetime)) // slot)
+                length = grid.duration_slots(activity['duration'])
+                if start_slot < 0 or start_slot + length > grid.n_slots:
+                    raise ValueError(f"Placement of '{name}' lies outside the planning window")
+                key = (tuple(preference_list(activity['weather'])), start_slot, length)
+                schedule_columns.append(placements.setdefault(key, len(placements)))
+            columns.append(schedule_columns)
+            names.append([name for name, _ in entries])
+
+        within = np.ones((self.n_samples, len(placements)), dtype=bool)
+        expected = np.zeros(len(placements))
+        by_preferences = {}
+        for (preferences, start_slot, length), column in placements.items():
+            by_preferences.setdefault(preferences, []).append((column, start_slot, length))
+        for preferences, group in by_preferences.items():
+            group_columns, start_slots, lengths = (np.array(values) for values in zip(*group))
+            within[:, group_columns], expected[group_columns] = self.placement_outcomes(preferences, start_slots, lengths)
+
+        # One matrix product counts, per sample and candidate, how many of its placements miss
+        incidence = np.zeros((len(placements), len(schedules)), dtype=np.float32)
+        for candidate, schedule_columns in enumerate(columns):
+            incidence[schedule_columns, candidate] = 1
+        all_within = ((~within).astype(np.float32) @ incidence == 0).mean(axis=0)
+        chances = within.mean(axis=0)
+
+        results = []
+        for candidate, (schedule_columns, schedule_names) in enumerate(zip(columns, names)):
+            durations = np.array([by_name[name]['duration'] for name in schedule_names], dtype=float)
+            results.append({
+                'probability': float(all_within[candidate]) if schedule_columns else None,
+                'expected_score': float(np.average(expected[schedule_columns], weights=durations)) if schedule_columns else None,
+                'activity_probability': {name: float(chances[column]) for name, column in zip(schedule_names, schedule_columns)},
+                'samples': self.n_samples,
+            })
+        return results
+
+
+def _schedule_entries(schedule):
+    if isinstance(schedule, dict):
+        return [(name, details['start']) for name, details in schedule.items()]
+    placements = getattr(schedule, 'placements', schedule)
+    return [(placement.name, placement.start) for placement in placements]
+
+
+# Robustness of one schedule on `grid`; see RobustnessModel.evaluate
+def schedule_robustness(grid, activities, schedule, n_samples=DEFAULT_SAMPLES, seed=DEFAULT_SEED):
+    return RobustnessModel(grid, n_samples, seed).evaluate(activities, [schedule])[0]
+
+
+# Time-indexed MILP on expected weather: every start is allowed, and the objective is the expected shortfall from
+# each activity's first preference over the sampled outcomes. `min_probability` drops starts whose chance of
+# staying within preferences is lower.
+@register_engine("robust", "Robust MILP (expected satisfaction under rain uncertainty)")
+def schedule_robust(activities, grid, n_samples=DEFAULT_SAMPLES, seed=DEFAULT_SEED, min_probability=0.0, time_limit=None,
+                    control=None):
+    estart_time = time.time()
+    model = RobustnessModel(grid, n_samples, seed)
+    start_costs = []
+    for activity in activities:
+        length = grid.duration_slots(activity['duration'])
+        probability, expected = model.start_outcomes(activity['weather'], length)
+        costs = (PREFERENCE_SCORES[0] - expected) * length
+        costs[probability < min_probability] = np.inf
+        if grid.busy is not None:
+            costs[~free_starts(grid.blocked, length)] = np.inf
+        start_costs.append(costs)
+
+    starts, result, _ = optimal_starts(grid, activities, time_limit=time_limit, control=control, start_costs=start_costs)
+    if starts is None:
+        return make_schedule("robust", (), time.time() - estart_time, control=control)
+
+    placements = []
+    for activity, start in zip(activities, starts):
+        placement = grid.describe_placement(start, grid.duration_slots(activity['duration']))
+        placements.append(placement_from_details(activity['name'], placement))
+    report = dict(model.evaluate(activities, [placements])[0], status=result.message)
+
+    execution_time = time.time() - estart_time
+    print(f"Execution Time: {execution_time} seconds")
+    return make_schedule("robust", placements, execution_time, report=report, control=control)
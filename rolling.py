@@ -0,0 +1,145 @@
+# Rolling re-optimization: when a forecast refresh changes the weather class of some hours,
+# repair only the schedules with activities in those hours and keep everything else fixed
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from weather_grid import CLASSIFICATION_SCHEMES, NO_MATCH, WEATHER_CLASSES, free_starts
+from problem_cache import cached_weather_grid
+from instrumentation import record_solve
+
+
+# Weather classes each hour of a forecast falls into, keyed by the hour's datetime
+def hourly_classes(weather_data, scheme="precip"):
+    field, classify = CLASSIFICATION_SCHEMES[scheme]
+    masks = classify(weather_data[field].to_numpy(dtype=float))
+    stamps = pd.to_datetime(weather_data['datetime'])
+    return {
+        stamp.to_pydatetime().replace(minute=0, second=0, microsecond=0):
+            frozenset(name for name in WEATHER_CLASSES if masks[name][position])
+        for position, stamp in enumerate(stamps)
+    }
+
+
+def changed_hours(old_weather, new_weather, scheme="precip"):
+    old = hourly_classes(old_weather, scheme)
+    new = hourly_classes(new_weather, scheme)
+    return sorted(hour for hour in old.keys() | new.keys() if old.get(hour) != new.get(hour))
+
+
+# Names of scheduled activities that overlap at least one of the changed hours
+def affected_activities(schedule, hours):
+    affected = []
+    for name, details in schedule.items():
+        if any(details['start'] < hour + timedelta(hours=1) and hour < details['end'] for hour in hours):
+            affected.append(name)
+    return affected
+
+
+# Minimal repair: unaffected activities stay put, affected ones stay if the new weather still suits
+# their slot, otherwise move to the best free slot closest to where they were.
+# Slots overlapping `busy` (BusyIntervals) are never chosen.
+def repair_schedule(schedule, activities, weather_data, start_datetime, end_datetime, affected, slot_minutes=15,
+                    scheme="precip", busy=None):
+    grid = cached_weather_grid(weather_data, start_datetime, end_datetime, slot_minutes, scheme).with_busy(busy)
+    by_name = {activity['name']: activity for activity in activities}
+    slot = timedelta(minutes=slot_minutes)
+
+    def covered_slots(details):
+        first = int((details['start'] - start_datetime) // slot)
+        last = int(-((start_datetime - details['end']) // slot))  # Ceiling division
+        return max(first, 0), min(last, grid.n_slots)
+
+    occupied = np.zeros(grid.n_slots, dtype=bool)
+    repaired = {}
+    for name, details in schedule.items():
+        if name not in affected:
+            first, last = covered_slots(details)
+            occupied[first:last] = True
+            repaired[name] = details
+
+    kept, moved, unscheduled = [], [], []
+    for name in affected:
+        activity = by_name[name]
+        first, last = covered_slots(schedule[name])
+        ranks = grid.preference_ranks(activity['weather'])
+        if not (occupied[first:last] | grid.blocked[first:last]).any() and (ranks[first:last] != NO_MATCH).all():
+            occupied[first:last] = True
+            repaired[name] = schedule[name]
+            kept.append(name)
+            continue
+
+        length = grid.duration_slots(activity['duration'])
+        feasible, scores = grid.placement_scores(activity['weather'], length)
+        candidates = np.flatnonzero(feasible & free_starts(occupied, length)) if feasible.size else feasible
+        if not candidates.size:
+            unscheduled.append(name)
+            continue
+        # Best weather score first, then the smallest move from the original start
+        best = candidates[np.lexsort((np.abs(candidates - first), -scores[candidates]))[0]]
+        occupied[best:best + length] = True
+        repaired[name] = grid.describe_placement(best, length)
+        moved.append(name)
+
+    repaired = dict(sorted(repaired.items(), key=lambda item: item[1]['start']))
+    return repaired, {'kept': kept, 'moved': moved, 'unscheduled': unscheduled}
+
+
+# Keeps the latest forecast per (location, day) and the plans made against it
+class RollingScheduler:
+    def __init__(self, slot_minutes=15, scheme="precip"):
+        self.slot_minutes = slot_minutes
+        self.scheme = scheme
+        self.plans = {}
+        self.forecasts = {}
+        self._plans_by_day = {}
+        self._lock = threading.Lock()
+
+    def register(self, plan_id, location, activities, start_datetime, end_datetime, schedule, weather_data, busy=None):
+        day = start_datetime.date()
+        with self._lock:
+            self.plans[plan_id] = {
+                'location': location,
+                'activities': activities,
+                'start': start_datetime,
+                'end': end_datetime,
+                'schedule': schedule,
+                'busy': busy,
+            }
+            self._plans_by_day.setdefault((location, day), set()).add(plan_id)
+            self.forecasts.setdefault((location, day), weather_data)
+
+    def unregister(self, plan_id):
+        with self._lock:
+            plan = self.plans.pop(plan_id, None)
+            if plan is not None:
+                self._plans_by_day.get((plan['location'], plan['start'].date()), set()).discard(plan_id)
+
+    # Diff a new forecast against the previous one and repair only the plans it touches
+    def on_forecast(self, location, day, weather_data):
+        with self._lock:
+            previous = self.forecasts.get((location, day))
+            self.forecasts[(location, day)] = weather_data
+            plan_ids = sorted(self._plans_by_day.get((location, day), ()))
+            plans = {plan_id: self.plans[plan_id] for plan_id in plan_ids}
+
+        hours = changed_hours(previous, weather_data, self.scheme) if previous is not None else []
+        reports = {}
+        for plan_id, plan in plans.items():
+            affected = affected_activities(plan['schedule'], hours)
+            if not affected:
+                continue
+            schedule, report = repair_schedule(plan['schedule'], plan['activities'], weather_data,
+                                               plan['start'], plan['end'], affected, self.slot_minutes, self.scheme,
+                                               plan['busy'])
+            with self._lock:
+                if plan_id in self.plans:
+                    self.plans[plan_id]['schedule'] = schedule
+            reports[plan_id] = dict(report, affected=affected, schedule=schedule)
+
+        record_solve("rolling", changed_hours=len(hours), plans_checked=len(plans), plans_repaired=len(reports),
+                     activities_moved=sum(len(report['moved']) for report in reports.values()),
+                     activities_unscheduled=sum(len(report['unscheduled']) for report in reports.values()))
+        return reports
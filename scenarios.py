@@ -0,0 +1,190 @@
+# What-if scenarios: many planning windows, days and activity variants evaluated in one batch.
+# Every day's weather is parsed into one grid that all its windows share. A vectorized screen scores each
+# activity across all windows of a day at once and rules out hopeless scenarios; the rest are solved in parallel.
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from robustness import schedule_robustness
+from shared_grids import SharedGridStore, attach_grid, solver_process_pool
+from solvers import SolveControl, day_weather_grid, get_engine, normalize_activities, observe_schedule, solve
+from weather_grid import preference_list
+
+# Constants and Global Variables
+DEFAULT_SCENARIO_WORKERS = 4
+# "thread" or "process"; processes solve in parallel but pay a worker start-up the first time
+DEFAULT_SCENARIO_EXECUTOR = os.environ.get("SCHEDULER_SCENARIO_EXECUTOR", "thread")
+COMPARISON_COLUMNS = ['scenario', 'day', 'start', 'end', 'engine', 'feasible', 'scheduled', 'unscheduled',
+                      'score', 'chance_within_preferences', 'best_possible_score', 'screened_out', 'stop_reason', 'solve_seconds']
+
+
+class Scenario(NamedTuple):
+    label: str
+    start: datetime
+    end: datetime
+    activities: list
+
+
+# Scenarios for every combination of days, window start/end times and activity variants ({label: activities})
+def scenario_grid(days, windows, activity_variants):
+    scenarios = []
+    for day in days:
+        for start_time, end_time in windows:
+            for variant, activities in activity_variants.items():
+                label = f"{day:%a %d %b} {start_time:%H:%M}-{end_time:%H:%M}" + (f" {variant}" if len(activity_variants) > 1 else "")
+                scenarios.append(Scenario(label, datetime.combine(day, start_time), datetime.combine(day, end_time), activities))
+    return scenarios
+
+
+# Per activity signature, the best mean preference score it can reach alone in each window (NaN if it cannot fit).
+# One placement_scores pass over the whole day per signature, then a (windows x starts) mask picks each window's
+# range. Windows that do not start on a slot boundary of `grid` are scored on their own grid instead.
+def screen_windows(grid, windows, signatures):
+    slot = timedelta(minutes=grid.slot_minutes)
+    offsets = [start - grid.start_datetime for start, _ in windows]
+    aligned = np.array([offset % slot == timedelta(0) for offset in offsets], dtype=bool)
+    window_slots = np.array([(offset // slot, offset // slot + (end - start) // slot)
+                             for offset, (start, end) in zip(offsets, windows)]).reshape(-1, 2)
+    best = {}
+    for duration, weather in signatures:
+        length = grid.duration_slots(duration)
+        feasible, scores = grid.placement_scores(list(weather), length)
+        starts = np.arange(feasible.size)
+        in_window = (starts >= window_slots[:, :1]) & (starts + length <= window_slots[:, 1:])
+        window_best = np.where(in_window & feasible, scores, -np.inf).max(axis=1, initial=-np.inf)
+        for position in np.flatnonzero(~aligned):
+            window_feasible, window_scores = grid.window(*windows[position]).placement_scores(list(weather), length)
+            window_best[position] = window_scores[window_feasible].max(initial=-np.inf)
+        best[(duration, weather)] = np.where(np.isfinite(window_best), window_best, np.nan)
+    return best
+
+
+def activity_signature(activity):
+    return activity['duration'], tuple(preference_list(activity['weather']))
+
+
+# Duration-weighted mean preference score (3 = first preference throughout) of a solved schedule
+def schedule_score(grid, activities, schedule):
+    by_name = {activity['name']: activity for activity in activities}
+    total = weight = 0.0
+    for placement in schedule.placements:
+        activity = by_name[placement.name]
+        length = grid.duration_slots(activity['duration'])
+        start_slot = (placement.start - grid.start_datetime) // timedelta(minutes=grid.slot_minutes)
+        _, scores = grid.placement_scores(activity['weather'], length)
+        if 0 <= start_slot < scores.size:
+            total += scores[start_slot] * activity['duration']
+            weight += activity['duration']
+    return total / weight if weight else None
+
+
+# Solves one scenario on its window grid; returns (schedule, score, chance within preferences, seconds)
+def solve_window(engine, activities, window, deadline_seconds=None, options=None):
+    engine_spec = get_engine(engine)
+    started = time.perf_counter()
+    control = SolveControl(deadline_seconds) if deadline_seconds is not None else None
+    schedule = solve(engine, activities, window, control=control, **(options or {}))
+    elapsed = time.perf_counter() - started
+    engine_grid = window.view(engine_spec.slot_minutes, engine_spec.scheme)
+    normalized = normalize_activities(activities, engine_spec.single_preference)
+    score = schedule_score(engine_grid, normalized, schedule)
+    chance = schedule_robustness(engine_grid, normalized, schedule)['probability']
+    return schedule, score, chance, elapsed
+
+
+# Process-pool task: the day's grid arrives as a GridHandle and is read from shared memory, never pickled
+def solve_shared_window(handle, start_datetime, end_datetime, engine, activities, deadline_seconds=None, options=None):
+    window = attach_grid(handle).window(start_datetime, end_datetime)
+    return solve_window(engine, activities, window, deadline_seconds, options)
+
+
+# Evaluates every scenario and returns one comparison row each, in input order.
+# `weather` maps each day to its hourly DataFrame (WeatherClient.get_days returns exactly that);
+# `deadline_seconds` caps each solve on its own. With executor="process" each day's grid is published once
+# into shared memory and the solves run on a process pool. `busy` (a BusyIntervals) holds fixed events on any
+# of the days; no activity may overlap them.
+def evaluate_scenarios(scenarios, weather, engine="milp", max_workers=DEFAULT_SCENARIO_WORKERS, deadline_seconds=None,
+                       executor=DEFAULT_SCENARIO_EXECUTOR, busy=None, **options):
+    engine_spec = get_engine(engine)
+    rows = [None] * len(scenarios)
+    to_solve = []
+    day_grids = {}
+
+    by_day = {}
+    for index, scenario in enumerate(scenarios):
+        by_day.setdefault(scenario.start.date(), []).append(index)
+
+    for day, indices in by_day.items():
+        grid = day_weather_grid(weather[day], day).with_busy(busy)
+        # Screened at the resolution and weather scheme the engine will solve on
+        engine_grid = day_grids[day] = grid.view(engine_spec.slot_minutes, engine_spec.scheme)
+        activities = {index: normalize_activities(scenarios[index].activities, engine_spec.single_preference) for index in indices}
+        signatures = sorted({activity_signature(activity) for index in indices for activity in activities[index]})
+        best = screen_windows(engine_grid, [(scenarios[index].start, scenarios[index].end) for index in indices], signatures)
+        for position, index in enumerate(indices):
+            scenario = scenarios[index]
+            activity_best = np.array([best[activity_signature(activity)][position] for activity in activities[index]])
+            weights = np.array([activity['duration'] for activity in activities[index]], dtype=float)
+            reachable = ~np.isnan(activity_best)
+            window_hours = (scenario.end - scenario.start) / timedelta(hours=1)
+            if busy is not None:
+                window_hours -= busy.clip(scenario.start, scenario.end).total() / timedelta(hours=1)
+            # Engines with their own weather checks (the python-constraint ones) are only screened on total length
+            fits = (bool(reachable.all()) or not engine_spec.mask_feasible) and weights.sum() <= window_hours
+            rows[index] = {
+                'scenario': scenario.label,
+                'day': day,
+                'start': scenario.start.time(),
+                'end': scenario.end.time(),
+                'engine': engine,
+                'feasible': False,
+                'scheduled': 0,
+                'unscheduled': len(scenario.activities),
+                'score': None,
+                'chance_within_preferences': None,
+                'best_possible_score': float(np.average(activity_best[reachable], weights=weights[reachable]))
+                                       if reachable.any() and weights[reachable].sum() else None,
+                'screened_out': not fits and not engine_spec.partial,
+                'stop_reason': None,
+                'solve_seconds': 0.0,
+            }
+            # An activity with no weather-feasible start, or more activity than free time, needs no solver to rule out;
+            # engines that return partial schedules still run and place what fits
+            if fits or engine_spec.partial:
+                to_solve.append(index)
+
+    def record(index, schedule, score, chance, elapsed):
+        rows[index].update(feasible=schedule.feasible, scheduled=len(schedule.placements),
+                           unscheduled=len(scenarios[index].activities) - len(schedule.placements),
+                           score=score, chance_within_preferences=chance, stop_reason=schedule.stop_reason,
+                           solve_seconds=elapsed)
+
+    if executor == "process" and to_solve:
+        pool = solver_process_pool(max_workers)
+        with SharedGridStore() as store:
+            handles = {day: store.publish(day_grids[day]) for day in {scenarios[index].start.date() for index in to_solve}}
+            futures = {index: pool.submit(solve_shared_window, handles[scenarios[index].start.date()], scenarios[index].start,
+                                          scenarios[index].end, engine, scenarios[index].activities, deadline_seconds, options)
+                       for index in to_solve}
+            for index, future in futures.items():
+                schedule, score, chance, elapsed = future.result()
+                record(index, schedule, score, chance, elapsed)
+                # Workers count solves in their own registry; count them here so the metrics endpoint sees them
+                observe_schedule(schedule, len(scenarios[index].activities))
+    else:
+        # Threads overlap only where an engine releases the GIL (NumPy, HiGHS's model setup)
+        def run(index):
+            scenario = scenarios[index]
+            window = day_grids[scenario.start.date()].window(scenario.start, scenario.end)
+            return (index,) + solve_window(engine, scenario.activities, window, deadline_seconds, options)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(to_solve) or 1))) as pool:
+            for index, schedule, score, chance, elapsed in pool.map(run, to_solve):
+                record(index, schedule, score, chance, elapsed)
+
+    return pd.DataFrame(rows, columns=COMPARISON_COLUMNS)
@@ -0,0 +1,209 @@
+# Weather grids published once into shared memory for process-pool workers.
+# The parent writes each day's hourly records, slot values and class masks (every scheme) into one block;
+# a task carries only a GridHandle, and workers map the block and solve on read-only views of it.
+import multiprocessing
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing.shared_memory import SharedMemory
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from solvers import ENGINE_MODULES
+from weather_grid import CLASSIFICATION_SCHEMES, WEATHER_CLASSES, WEATHER_FIELDS, WeatherGrid
+
+# Constants and Global Variables
+MAX_ATTACHED_BLOCKS = 32    # Blocks a worker keeps mapped; older ones are unmapped once their grids are dropped
+WORKER_PRELOAD = ("scenarios",) + ENGINE_MODULES
+ALIGNMENT = 8
+
+
+# What a worker needs to map a published grid: a block name and the array sizes (a couple of hundred bytes pickled)
+class GridHandle(NamedTuple):
+    name: str
+    weather_key: str
+    start_datetime: datetime
+    end_datetime: datetime
+    slot_minutes: int
+    scheme: str           # Scheme of the grid that was published; the block holds masks for every scheme
+    fields: tuple         # Weather fields the hourly records carried
+    n_records: int
+    n_hours: int
+    n_slots: int
+    busy: Optional[object] = None  # BusyIntervals of the published grid; fixed events travel with the handle, not the block
+
+
+# (array name, dtype, shape, byte offset) of every array in a block, and the block size
+def block_layout(n_records, n_hours, n_slots):
+    arrays = (
+        ('stamps', np.dtype('datetime64[us]'), (n_records,)),
+        ('records', np.dtype(float), (len(WEATHER_FIELDS), n_records)),
+        ('slot_hour', np.dtype(np.int64), (n_slots,)),
+        ('hourly', np.dtype(float), (len(WEATHER_FIELDS), n_hours)),
+        ('slot_values', np.dtype(float), (len(WEATHER_FIELDS), n_slots)),
+        ('class_masks', np.dtype(bool), (len(CLASSIFICATION_SCHEMES), len(WEATHER_CLASSES), n_slots)),
+    )
+    layout, offset = [], 0
+    for name, dtype, shape in arrays:
+        layout.append((name, dtype, shape, offset))
+        offset += -(-int(np.prod(shape)) * dtype.itemsize // ALIGNMENT) * ALIGNMENT
+    return layout, max(offset, 1)
+
+
+def _block_arrays(block, handle):
+    layout, _ = block_layout(handle.n_records, handle.n_hours, handle.n_slots)
+    return {name: np.ndarray(shape, dtype, buffer=block.buf, offset=offset) for name, dtype, shape, offset in layout}
+
+
+def _write_grid(block, handle, grid):
+    arrays = _block_arrays(block, handle)
+    arrays['stamps'][:] = np.array(list(grid.hours), dtype='datetime64[us]')
+    for position, field in enumerate(WEATHER_FIELDS):
+        arrays['records'][position] = [record.get(field, np.nan) for record in grid.hours.values()]
+        arrays['hourly'][position] = grid.hourly[field]
+        arrays['slot_values'][position] = getattr(grid, field)
+    arrays['slot_hour'][:] = grid.slot_hour
+    for position, scheme in enumerate(CLASSIFICATION_SCHEMES):
+        masks = grid.view(scheme=scheme).class_masks
+        for class_position, name in enumerate(WEATHER_CLASSES):
+            arrays['class_masks'][position, class_position] = masks[name]
+
+
+def _release(blocks):
+    for block, _ in blocks.values():
+        block.close()
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+    blocks.clear()
+
+
+# Owns the blocks it publishes and unlinks them on close(), on leaving a with-block, or when garbage collected.
+# Workers that still have a block mapped keep reading it until they drop it.
+class SharedGridStore:
+    def __init__(self):
+        self._blocks = {}  # (weather_key, window, slot size) -> (SharedMemory, GridHandle)
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _release, self._blocks)
+
+    def publish(self, grid):
+        key = (grid.weather_key, grid.start_datetime, grid.end_datetime, grid.slot_minutes)
+        with self._lock:
+            if key in self._blocks:
+                return self._blocks[key][1]._replace(scheme=grid.scheme, busy=grid.busy)
+            fields = tuple(field for field in WEATHER_FIELDS if any(field in record for record in grid.hours.values()))
+            n_hours = grid.hourly[WEATHER_FIELDS[0]].size
+            _, size = block_layout(len(grid.hours), n_hours, grid.n_slots)
+            block = SharedMemory(create=True, size=size)
+            handle = GridHandle(block.name, grid.weather_key, grid.start_datetime, grid.end_datetime, grid.slot_minutes,
+                                grid.scheme, fields, len(grid.hours), n_hours, grid.n_slots)
+            try:
+                _write_grid(block, handle, grid)
+            except BaseException:
+                block.close()
+                block.unlink()
+                raise
+            self._blocks[key] = (block, handle)
+            return handle._replace(busy=grid.busy)
+
+    def close(self):
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Maps an existing block. Only the publisher may unlink it: on 3.13+ the worker skips the resource tracker,
+# and before that the pool's workers share the parent's tracker, where registering a block again changes nothing.
+def _open_block(name):
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)
+    return SharedMemory(name)
+
+
+# {scheme: WeatherGrid} over one block; the grids of different schemes share every array but the masks
+def _attach(handle):
+    block = _open_block(handle.name)
+    arrays = _block_arrays(block, handle)
+    for array in arrays.values():
+        array.flags.writeable = False
+
+    stamps = arrays['stamps'].astype(object)
+    records = arrays['records']
+    fields = [(position, field) for position, field in enumerate(WEATHER_FIELDS) if field in handle.fields]
+    hours = MappingProxyType({
+        stamp: MappingProxyType({field: float(records[position, column]) for position, field in fields})
+        for column, stamp in enumerate(stamps)
+    })
+    hourly = {field: arrays['hourly'][position] for position, field in enumerate(WEATHER_FIELDS)}
+    slot_values = {field: arrays['slot_values'][position] for position, field in enumerate(WEATHER_FIELDS)}
+
+    grids = {}
+    for position, scheme in enumerate(CLASSIFICATION_SCHEMES):
+        masks = {name: arrays['class_masks'][position, class_position] for class_position, name in enumerate(WEATHER_CLASSES)}
+        grids[scheme] = WeatherGrid.from_arrays(hours, handle.weather_key, handle.start_datetime, handle.end_datetime,
+                                                handle.slot_minutes, scheme, arrays['slot_hour'], hourly, slot_values, masks)
+    # view(scheme=...) on any of them returns its sibling instead of rebuilding from the hourly records
+    for grid in grids.values():
+        for scheme, sibling in grids.items():
+            if sibling is not grid:
+                grid._views[(handle.slot_minutes, scheme)] = sibling
+    return block, grids
+
+
+_attached = OrderedDict()  # Block name -> (SharedMemory, {scheme: WeatherGrid}), most recently used last
+_attached_lock = threading.Lock()
+
+
+# The published grid for `handle`, mapped on first use and reused by every later task in this process
+def attach_grid(handle, scheme=None):
+    with _attached_lock:
+        if handle.name not in _attached:
+            _attached[handle.name] = _attach(handle)
+            while len(_attached) > MAX_ATTACHED_BLOCKS:
+                _, (block, grids) = _attached.popitem(last=False)
+                grids.clear()
+                try:
+                    block.close()
+                except BufferError:
+                    # A grid from this block is still referenced; the mapping goes when that grid does
+                    pass
+        _attached.move_to_end(handle.name)
+        return _attached[handle.name][1][scheme or handle.scheme].with_busy(handle.busy)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+# Solver processes fork from a clean server process that has already imported the engines, so they start
+# quickly and never inherit the app's threads
+def solver_process_context():
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(list(WORKER_PRELOAD))
+    return context
+
+
+# Boots the server process and waits until it has imported the engines, so later solver processes start at once
+def start_solver_server():
+    process = solver_process_context().Process(target=int)
+    process.start()
+    process.join()
+
+
+# One long-lived pool per size
+def solver_process_pool(max_workers):
+    with _pools_lock:
+        pool = _pools.get(max_workers)
+        if pool is None or getattr(pool, '_broken', False):
+            pool = _pools[max_workers] = ProcessPoolExecutor(max_workers, mp_context=solver_process_context())
+        return pool
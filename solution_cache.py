@@ -0,0 +1,192 @@
+# Solved schedules keyed by a canonical form of the problem: the same activities in another order or under
+# other names, on the same window, day's weather and fixed events, are answered from the cache instead of
+# searched again.
+# Schedules live in a bounded in-memory LRU and, when SCHEDULER_SOLUTION_CACHE_DIR is set, in files on disk.
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import NamedTuple
+
+from problem_cache import solution_cache_entries
+from weather_grid import preference_list
+
+# Constants and Global Variables
+CANONICAL_NAME = "activity_{}"
+DISK_CACHE_ENTRIES = 10_000  # Files kept on disk; the least recently used are pruned beyond this
+PRUNE_EVERY = 64             # Disk writes between prunes
+
+logger = logging.getLogger(__name__)
+
+
+class CanonicalProblem(NamedTuple):
+    fingerprint: str
+    names: tuple  # names[i] is the caller's name for activity_i, the i-th activity in canonical order
+
+
+def _activity_key(activity):
+    extras = tuple(sorted((key, repr(value)) for key, value in activity.items() if key not in ('name', 'duration', 'weather')))
+    return activity['duration'], tuple(preference_list(activity['weather'])), extras
+
+
+# The activities in a fixed order (by duration, preferences and any other fields; identical ones by name) and a
+# fingerprint of everything the engine's answer depends on. None when the grid carries no weather fingerprint
+# or two activities share a name, since names are how answers map back.
+def canonical_problem(engine, activities, grid, options):
+    names = [activity['name'] for activity in activities]
+    if grid.weather_key is None or len(set(names)) != len(names):
+        return None
+    order = sorted(range(len(activities)), key=lambda index: (_activity_key(activities[index]), str(names[index])))
+    problem = (engine, grid.weather_key, grid.busy_key, grid.start_datetime.isoformat(), grid.end_datetime.isoformat(), grid.slot_minutes,
+               grid.scheme, tuple(_activity_key(activities[index]) for index in order),
+               tuple(sorted((name, repr(value)) for name, value in options.items())))
+    fingerprint = hashlib.blake2b(repr(problem).encode(), digest_size=16).hexdigest()
+    return CanonicalProblem(fingerprint, tuple(names[index] for index in order))
+
+
+def _rename_placements(placements, mapping):
+    return type(placements)(placement._replace(name=mapping.get(placement.name, placement.name)) for placement in placements)
+
+
+# Only the report fields that carry activity names are renamed; every other field is copied as it is, so an
+# activity named like a report key (say "status") leaves the report intact
+def _rename_report(report, mapping):
+    report = dict(report)
+    if 'placements' in report:
+        report['placements'] = _rename_placements(report['placements'], mapping)
+    if 'unscheduled' in report:
+        report['unscheduled'] = type(report['unscheduled'])(mapping.get(name, name) for name in report['unscheduled'])
+    if 'activity_probability' in report:
+        report['activity_probability'] = {mapping.get(name, name): chance
+                                          for name, chance in report['activity_probability'].items()}
+    if 'front' in report:
+        report['front'] = [dict(entry, placements=_rename_placements(entry['placements'], mapping))
+                           for entry in report['front']]
+    return report
+
+
+def rename(schedule, mapping):
+    placements = _rename_placements(tuple(schedule.placements), mapping)
+    unscheduled = tuple(mapping.get(name, name) for name in schedule.unscheduled)
+    report = _rename_report(schedule.report, mapping) if schedule.report else schedule.report
+    return schedule._replace(placements=placements, unscheduled=unscheduled, report=report)
+
+
+# Stored under canonical names, answered under the caller's
+def canonical_names(schedule, names):
+    return rename(schedule, {name: CANONICAL_NAME.format(position) for position, name in enumerate(names)})
+
+
+def restore_names(schedule, names):
+    return rename(schedule, {CANONICAL_NAME.format(position): name for position, name in enumerate(names)})
+
+
+class SolutionCache:
+    def __init__(self, memory=solution_cache_entries, directory=None, max_disk_entries=DISK_CACHE_ENTRIES):
+        self.memory = memory
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self.disk_hits = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, fingerprint):
+        return os.path.join(self.directory, f"{fingerprint}.pkl")
+
+    def get(self, fingerprint):
+        schedule = self.memory.get(fingerprint)
+        if schedule is not None or not self.directory:
+            return schedule
+        path = self._path(fingerprint)
+        try:
+            with open(path, "rb") as handle:
+                schedule = pickle.load(handle)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            # A truncated or stale file is dropped and the problem solved again
+            logger.warning("Discarding unreadable cached solution %s: %s", path, error)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        self.memory.put(fingerprint, schedule)
+        return schedule
+
+    def put(self, fingerprint, schedule):
+        self.memory.put(fingerprint, schedule)
+        if not self.directory:
+            return
+        # Write then rename, so a concurrent reader never sees half a file
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as handle:
+                pickle.dump(schedule, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._path(fingerprint))
+        except OSError as error:
+            logger.warning("Could not store solution %s: %s", fingerprint, error)
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    # Removes the least recently used files beyond max_disk_entries
+    def prune(self):
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".pkl")]
+        except OSError:
+            return
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def clear(self):
+        self.memory.clear()
+        if self.directory:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".pkl"):
+                    os.remove(entry.path)
+
+
+solution_cache = SolutionCache(directory=os.environ.get("SCHEDULER_SOLUTION_CACHE_DIR") or None)
+
+
+# Answers an equivalent earlier problem from the cache, or solves this one as given and stores the answer.
+# Searches cut short by a cancel or deadline are returned but never stored, so a later request with more time
+# searches again.
+def cached_solve(engine, solve, activities, grid, options):
+    search_options = {name: value for name, value in options.items() if name != 'control'}
+    problem = canonical_problem(engine, activities, grid, search_options)
+    if problem is None:
+        return solve(activities, grid, **options)
+
+    started = time.time()
+    schedule = solution_cache.get(problem.fingerprint)
+    if schedule is not None:
+        report = dict(schedule.report or {}, solution_cache="hit", solved_in_seconds=schedule.execution_time)
+        return restore_names(schedule._replace(execution_time=time.time() - started, report=report), problem.names)
+
+    schedule = solve(activities, grid, **options)
+    if schedule.stop_reason is None:
+        solution_cache.put(problem.fingerprint, canonical_names(schedule, problem.names))
+    return schedule
@@ -0,0 +1,131 @@
+# Background solves tied to a Streamlit session: the page stays live, shows progress and can cancel the search
+import threading
+
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from busy_intervals import BusyIntervals, read_fixed_events
+from solvers import SolveControl, solve
+
+# Constants and Global Variables
+PROGRESS_INTERVAL_SECONDS = 0.5
+DEFAULT_DEADLINE_SECONDS = 30.0
+STOP_MESSAGES = {
+    "cancelled": "Search cancelled; showing the best schedule found before it stopped.",
+    "deadline": "Deadline reached; showing the best schedule found in time.",
+}
+WEATHER_NOTICES = {
+    "climatology": "No forecast covers this day yet, so it is planned on typical weather for the date. Re-plan once it is within the forecast range.",
+    "stale": "The weather service is unavailable, so this plan uses the last forecast fetched for the day.",
+}
+
+
+class SolveJob:
+    def __init__(self, engine, activities, grid, deadline_seconds=None, context=None, **options):
+        self.engine = engine
+        self.control = SolveControl(deadline_seconds)
+        self.context = context or {}
+        self.result = None
+        self.error = None
+        self._thread = threading.Thread(target=self._run, args=(activities, grid, options),
+                                        name=f"solve-{engine}", daemon=True)
+
+    def _run(self, activities, grid, options):
+        try:
+            self.result = solve(self.engine, activities, grid, control=self.control, **options)
+        except Exception as error:
+            self.error = error
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    def cancel(self):
+        self.control.cancel()
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.result
+
+
+# Starts a solve for this session, cancelling any solve it still has running
+def start_job(session_key, engine, activities, grid, deadline_seconds=None, context=None, **options):
+    previous = st.session_state.get(session_key)
+    if previous is not None and not previous.done:
+        previous.cancel()
+    job = SolveJob(engine, activities, grid, deadline_seconds, context, **options).start()
+    st.session_state[session_key] = job
+    return job
+
+
+# Upload box for fixed events (meetings, commutes) that activities must be planned around.
+# Returns the events as a BusyIntervals, or None when nothing usable was uploaded.
+def fixed_events_input(planning_day):
+    upload = st.file_uploader("Fixed events (ICS calendar, or CSV with start and end columns)", type=["ics", "csv"], key="fixed_events")
+    if upload is None:
+        return None
+    try:
+        busy = BusyIntervals(read_fixed_events(upload.getvalue(), upload.name))
+    except (ValueError, UnicodeDecodeError) as error:
+        st.error(f"Could not read {upload.name}: {error}")
+        return None
+    midnight = datetime.combine(planning_day, datetime.min.time())
+    day_busy = busy.clip(midnight, midnight + timedelta(days=1))
+    st.caption(f"{len(day_busy)} busy periods on {planning_day} ({day_busy.total() / timedelta(hours=1):.1f} h); "
+               f"activities are planned around them.")
+    return busy
+
+
+# What the page should say about the weather a plan was built on, or None for a live forecast or history
+def weather_notice(weather_data):
+    source = weather_data.attrs.get('source')
+    if source == "climatology" and weather_data.attrs.get('fallback'):
+        return "The weather service is unavailable, so this day is planned on typical weather for the date."
+    return WEATHER_NOTICES.get(source)
+
+
+def progress_caption(snapshot):
+    parts = [f"elapsed {snapshot['elapsed']:.1f} s"]
+    if snapshot.get('nodes') is not None:
+        parts.append(f"nodes explored {snapshot['nodes']:,}")
+    if snapshot.get('best_score') is not None:
+        parts.append(f"best score {snapshot['best_score']:.2f}")
+    return "Solving... " + ", ".join(parts)
+
+
+# Polls the session's job in a fragment, so only this panel reruns while the search works.
+# `render_result(job)` draws the finished Schedule.
+def show_job(session_key, render_result):
+    job = st.session_state.get(session_key)
+    if job is None:
+        return
+
+    polling = not job.done
+
+    @st.fragment(run_every=PROGRESS_INTERVAL_SECONDS if polling else None)
+    def job_panel():
+        if not job.done:
+            st.caption(progress_caption(job.control.snapshot()))
+            if st.button("Cancel", key=f"{session_key}_cancel"):
+                job.cancel()
+            return
+        # The job finished while the fragment was polling; one full rerun turns the polling off
+        if polling:
+            st.rerun()
+        if job.error is not None:
+            st.error(f"Solver failed: {job.error}")
+            return
+        if job.context.get('weather_notice'):
+            st.info(job.context['weather_notice'])
+        if (job.result.report or {}).get('solution_cache') == "hit":
+            st.caption("Same plan as an earlier request; the schedule was served from the solution cache.")
+        if job.result.stop_reason in STOP_MESSAGES:
+            st.warning(STOP_MESSAGES[job.result.stop_reason])
+        render_result(job)
+
+    job_panel()
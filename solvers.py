@@ -0,0 +1,205 @@
+# Shared solver protocol: every engine takes activities and one immutable WeatherGrid and returns a Schedule
+import functools
+import importlib
+import inspect
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional, Protocol
+
+from weather_grid import WeatherGrid, preference_list
+from problem_cache import cached_weather_grid
+from solution_cache import cached_solve
+from metrics import activities_per_request, solve_seconds, solves_total
+
+# Constants and Global Variables
+NO_SCHEDULE = "No feasible schedule found."
+BASE_SLOT_MINUTES = 15  # Finest slot size any engine uses; coarser engines get a view of the same grid
+ENGINE_MODULES = ("csp", "wcsp", "milp", "multires", "robustness", "pareto", "heuristic", "cpnets")
+
+
+class Placement(NamedTuple):
+    name: str
+    start: object
+    end: object
+    average_temperature: Optional[float] = None
+    average_precip_mm: Optional[float] = None
+    average_chance_of_rain: Optional[float] = None
+
+
+class Schedule(NamedTuple):
+    engine: str
+    placements: tuple            # Placements sorted by start time
+    execution_time: float
+    unscheduled: tuple = ()      # Names an anytime engine could not fit
+    report: Optional[dict] = None
+    stop_reason: Optional[str] = None  # "cancelled" or "deadline" when the search was cut short
+
+    @property
+    def feasible(self):
+        return bool(self.placements)
+
+    @property
+    def message(self):
+        return None if self.feasible else NO_SCHEDULE
+
+    # {name: {'start', 'end', 'average_*'}}, the shape the apps and plots have always used
+    def as_dict(self):
+        return {
+            placement.name: {key: value for key, value in placement._asdict().items() if key != 'name'}
+            for placement in self.placements
+        }
+
+
+# (schedule dict or message, execution time), what the solve_* functions have always returned
+def legacy_result(schedule):
+    return (schedule.as_dict() if schedule.feasible else NO_SCHEDULE), schedule.execution_time
+
+
+def make_schedule(engine, placements, execution_time, unscheduled=(), report=None, control=None):
+    placements = tuple(sorted(placements, key=lambda placement: placement.start))
+    stop_reason = control.stop_reason if control is not None else None
+    return Schedule(engine, placements, execution_time, tuple(unscheduled), report, stop_reason)
+
+
+class SolveInterrupted(Exception):
+    pass
+
+
+# Cooperative stop signal and progress channel between a caller and a running engine.
+# Engines poll should_stop() (or tick() inside tight callbacks) and return the best result found so far.
+class SolveControl:
+    def __init__(self, deadline_seconds=None):
+        self.started = time.time()
+        self.deadline = None if deadline_seconds is None else self.started + deadline_seconds
+        self.stop_reason = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._progress = {}
+        self._ticks = 0
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def should_stop(self):
+        if self.stop_reason is None:
+            if self._cancelled.is_set():
+                self.stop_reason = "cancelled"
+            elif self.deadline is not None and time.time() > self.deadline:
+                self.stop_reason = "deadline"
+        return self.stop_reason is not None
+
+    def remaining(self):
+        return None if self.deadline is None else max(self.deadline - time.time(), 0.0)
+
+    def report(self, **values):
+        with self._lock:
+            self._progress.update(values)
+
+    # For callbacks a search calls too often to check every time: counts nodes and raises SolveInterrupted
+    def tick(self, every=1024):
+        self._ticks += 1
+        if self._ticks % every == 0:
+            self.report(nodes=self._ticks)
+            if self.should_stop():
+                raise SolveInterrupted(self.stop_reason)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._progress, elapsed=time.time() - self.started, stop_reason=self.stop_reason)
+
+
+# Placement from a WeatherGrid.describe_placement / legacy schedule entry
+def placement_from_details(name, details):
+    return Placement(name, details['start'], details['end'], details.get('average_temperature'),
+                     details.get('average_precip_mm'), details.get('average_chance_of_rain'))
+
+
+class SolverEngine(Protocol):
+    def __call__(self, activities: list, grid: WeatherGrid, **options) -> Schedule: ...
+
+
+class Engine(NamedTuple):
+    name: str
+    label: str
+    solve: SolverEngine
+    slot_minutes: int = BASE_SLOT_MINUTES
+    scheme: str = "precip"
+    single_preference: bool = False  # CSP and CP-Net activities carry one preference, not an ordered list
+    partial: bool = False            # Returns whatever fits (with the rest unscheduled) instead of no schedule
+    mask_feasible: bool = False      # Weather feasibility is exactly the grid's class masks, so the masks can rule plans out
+
+
+ENGINES = {}
+
+
+# Latency, outcome and request size of every solve, whether it came through solve() or a solve_* wrapper
+def observe_schedule(schedule, n_activities):
+    solve_seconds.observe(schedule.execution_time, engine=schedule.engine)
+    outcome = schedule.stop_reason or ("feasible" if schedule.feasible else "infeasible")
+    solves_total.inc(engine=schedule.engine, outcome=outcome)
+    activities_per_request.observe(n_activities, engine=schedule.engine)
+
+
+def register_engine(name, label, slot_minutes=BASE_SLOT_MINUTES, scheme="precip", single_preference=False, partial=False,
+                    mask_feasible=False):
+    def decorator(solve):
+        signature = inspect.signature(solve)
+
+        # Options by name with defaults filled in, so positional and keyword calls share solution cache entries
+        @functools.wraps(solve)
+        def observed(activities, grid, *args, **options):
+            bound = signature.bind(activities, grid, *args, **options)
+            bound.apply_defaults()
+            options = dict(list(bound.arguments.items())[2:])
+            schedule = cached_solve(name, solve, activities, grid, options)
+            observe_schedule(schedule, len(activities))
+            return schedule
+        ENGINES[name] = Engine(name, label, observed, slot_minutes, scheme, single_preference, partial, mask_feasible)
+        return observed
+    return decorator
+
+
+# Engines register themselves on import; importing them here keeps callers free of that detail
+def load_engines():
+    for module in ENGINE_MODULES:
+        importlib.import_module(module)
+    return ENGINES
+
+
+def get_engine(name):
+    if name not in ENGINES:
+        load_engines()
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}'")
+    return ENGINES[name]
+
+
+def engine_names():
+    return tuple(load_engines())
+
+
+# Activities in the preference form an engine expects
+def normalize_activities(activities, single_preference):
+    normalized = []
+    for activity in activities:
+        preferences = preference_list(activity['weather'])
+        normalized.append(dict(activity, weather=preferences[0] if single_preference else preferences))
+    return normalized
+
+
+# Whole-day grid for one day's weather, parsed once; every window on that day is a window() of it
+def day_weather_grid(weather_data, day):
+    midnight = datetime.combine(day, datetime.min.time())
+    return cached_weather_grid(weather_data, midnight, midnight + timedelta(days=1), BASE_SLOT_MINUTES)
+
+
+# The one grid a caller builds per day and window; every engine solves against a view of it
+def build_weather_grid(weather_data, start_datetime, end_datetime):
+    return day_weather_grid(weather_data, start_datetime.date()).window(start_datetime, end_datetime)
+
+
+def solve(name, activities, grid, **options):
+    engine = get_engine(name)
+    engine_grid = grid.view(engine.slot_minutes, engine.scheme)
+    return engine.solve(normalize_activities(activities, engine.single_preference), engine_grid, **options)
@@ -0,0 +1,52 @@
+# Symmetry breaking for interchangeable activities (same duration and same weather preferences)
+import math
+from collections import defaultdict
+
+from weather_grid import preference_list
+
+
+def activity_signature(activity):
+    return (activity['duration'], tuple(preference_list(activity['weather'])))
+
+
+# Groups of two or more activity indices that can be swapped without changing feasibility or score
+def interchangeable_classes(activities):
+    groups = defaultdict(list)
+    for index, activity in enumerate(activities):
+        groups[activity_signature(activity)].append(index)
+    return [indices for indices in groups.values() if len(indices) > 1]
+
+
+# Number of equivalent copies of every solution that lexicographic ordering removes
+def symmetry_factor(classes):
+    return math.prod(math.factorial(len(indices)) for indices in classes)
+
+
+# Pairs (earlier, later) that keep each class in input order by start time
+def ordering_pairs(classes):
+    return [(indices[position], indices[position + 1]) for indices in classes for position in range(len(indices) - 1)]
+
+
+# Orderings of `items` with interchangeable items kept in canonical order, generated without repeats
+def canonical_permutations(items, key):
+    labels = [key(item) for item in items]
+    remaining = defaultdict(list)
+    for item, label in zip(items, labels):
+        remaining[label].append(item)
+    distinct = list(dict.fromkeys(labels))
+    used = {label: 0 for label in distinct}
+    ordering = []
+
+    def extend():
+        if len(ordering) == len(items):
+            yield tuple(ordering)
+            return
+        for label in distinct:
+            if used[label] < len(remaining[label]):
+                ordering.append(remaining[label][used[label]])
+                used[label] += 1
+                yield from extend()
+                used[label] -= 1
+                ordering.pop()
+
+    yield from extend()
@@ -0,0 +1,126 @@
+import contextlib
+import io
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from benchmarks import INSTANCES, instance_window, synthetic_weather
+from busy_intervals import BusyIntervals, read_csv, read_fixed_events, read_ics
+from problem_cache import clear_caches
+from solvers import build_weather_grid, solve
+
+BASE = datetime(2025, 7, 1)
+
+CALENDAR = """BEGIN:VCALENDAR\r
+VERSION:2.0\r
+BEGIN:VEVENT\r
+SUMMARY:Standup\r
+DTSTART;TZID=Europe/Berlin:20250701T090000\r
+DTEND;TZID=Europe/Berlin:20250701T091500\r
+RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE;COUNT=5\r
+EXDATE;TZID=Europe/Berlin:20250708T090000\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+SUMMARY:Planning with a summary that is folded\r
+  across lines\r
+DTSTART:20250701T120000\r
+DURATION:PT1H30M\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+SUMMARY:Holiday\r
+DTSTART;VALUE=DATE:20250704\r
+DTEND;VALUE=DATE:20250705\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+SUMMARY:Shown as free\r
+TRANSP:TRANSPARENT\r
+DTSTART:20250701T130000\r
+DTEND:20250701T140000\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+
+def at(minutes):
+    return BASE + timedelta(minutes=int(minutes))
+
+
+def test_overlapping_and_touching_events_merge():
+    busy = BusyIntervals([(at(60), at(120)), (at(100), at(150)), (at(150), at(160)), (at(300), at(300)), (at(200), at(210))])
+    assert list(busy) == [(at(60), at(160)), (at(200), at(210))]
+    assert busy.total() == timedelta(minutes=110)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_overlaps_match_pairwise_check(seed):
+    rng = np.random.default_rng(seed)
+    events = [(at(start), at(start + length)) for start, length in zip(rng.integers(0, 1440, 25), rng.integers(0, 180, 25))]
+    busy = BusyIntervals(events)
+    starts = [at(minute) for minute in rng.integers(-60, 1500, 300)]
+    ends = [start + timedelta(minutes=int(length)) for start, length in zip(starts, rng.integers(1, 240, 300))]
+    expected = [any(event_start < end and start < event_end for event_start, event_end in events if event_end > event_start)
+                for start, end in zip(starts, ends)]
+    np.testing.assert_array_equal(busy.overlaps(starts, ends), expected)
+
+
+def test_clip_and_next_free():
+    busy = BusyIntervals([(at(0), at(90)), (at(120), at(180)), (at(600), at(660))])
+    assert list(busy.clip(at(60), at(150))) == [(at(60), at(90)), (at(120), at(150))]
+    assert busy.next_free(at(30), timedelta(minutes=30)) == at(90)
+    assert busy.next_free(at(30), timedelta(minutes=45)) == at(180)
+    assert busy.next_free(at(200), timedelta(hours=1)) == at(200)
+
+
+def test_blocked_slots():
+    busy = BusyIntervals([(at(20), at(40))])
+    np.testing.assert_array_equal(busy.blocked_slots(BASE, 15, 4), [False, True, True, False])
+
+
+def test_read_ics():
+    events = read_ics(CALENDAR, until=datetime(2025, 8, 1))
+    standups = sorted(event.start for event in events if event.summary == "Standup")
+    # COUNT includes the excluded occurrence on the 8th
+    assert standups == [datetime(2025, 7, day, 9) for day in (1, 2, 7, 9)]
+    by_summary = {event.summary: event for event in events}
+    assert "Shown as free" not in by_summary
+    planning = by_summary["Planning with a summary that is folded across lines"]
+    assert planning.end - planning.start == timedelta(hours=1, minutes=30)
+    assert (by_summary["Holiday"].start, by_summary["Holiday"].end) == (datetime(2025, 7, 4), datetime(2025, 7, 5))
+
+
+def test_read_ics_converts_to_zone():
+    events = read_ics(CALENDAR, zone="America/New_York", until=datetime(2025, 8, 1))
+    assert min(event.start for event in events if event.summary == "Standup") == datetime(2025, 7, 1, 3)
+
+
+def test_read_csv():
+    events = read_csv(b"date, start, end, title\n2025-07-01, 22:00, 01:00, Night shift\n")
+    assert [(event.start, event.end, event.summary) for event in events] == \
+           [(datetime(2025, 7, 1, 22), datetime(2025, 7, 2, 1), "Night shift")]
+    with pytest.raises(ValueError):
+        read_csv(io.StringIO("a,b\n1,2\n"))
+
+
+def test_read_fixed_events_by_extension():
+    assert len(read_fixed_events(CALENDAR.encode(), "calendar.ics")) == 6
+    assert len(read_fixed_events(b"start,end\n2025-07-01 09:00,2025-07-01 10:00\n", "events.csv")) == 1
+    with pytest.raises(ValueError):
+        read_fixed_events(b"", "events.txt")
+
+
+@pytest.mark.parametrize("engine", ["csp", "wcsp", "milp", "multires", "heuristic", "csp_bitset"])
+def test_engines_plan_around_busy_time(engine):
+    clear_caches()
+    instance = INSTANCES["small_feasible"]
+    start_datetime, end_datetime = instance_window(instance)
+    busy = BusyIntervals([(start_datetime.replace(hour=9), start_datetime.replace(hour=10, minute=30)),
+                          (start_datetime.replace(hour=13), start_datetime.replace(hour=14))])
+    grid = build_weather_grid(synthetic_weather(), start_datetime, end_datetime).with_busy(busy)
+    options = {'seed': 0, 'max_iterations': 50} if engine == "heuristic" else {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        schedule = solve(engine, instance["activities"], grid, **options)
+    clear_caches()
+    assert schedule.placements
+    assert not busy.overlaps([placement.start for placement in schedule.placements],
+                             [placement.end for placement in schedule.placements]).any()
@@ -0,0 +1,45 @@
+import contextlib
+import io
+import math
+from datetime import datetime
+
+import pytest
+
+import instrumentation
+from benchmarks import make_activities, synthetic_weather
+from problem_cache import clear_caches
+from solvers import SolveControl, build_weather_grid, solve
+
+# Two pairs of interchangeable activities: each canonical ordering stands for 4 orderings
+ACTIVITIES = make_activities([(1.0, ["Sunny"])] * 2 + [(0.5, ["Cloudy"])] * 2
+                             + [(duration, ["Rainy"]) for duration in (0.25, 0.75, 1.25, 1.5)])
+
+
+# Stops the sweep at its second check, after the first 256 orderings
+class StopAfterFirstBatch(SolveControl):
+    checks = 0
+
+    def should_stop(self):
+        self.checks += 1
+        return self.checks > 1
+
+
+def cpnet_counters(control=None):
+    clear_caches()
+    grid = build_weather_grid(synthetic_weather(), datetime(2024, 6, 1, 8), datetime(2024, 6, 1, 18))
+    with contextlib.redirect_stdout(io.StringIO()):
+        solve("cpnet", ACTIVITIES, grid, control=control)
+    return instrumentation.last_solve['cpnet']
+
+
+def test_full_sweep_skips_every_symmetric_ordering():
+    counters = cpnet_counters()
+    assert counters['orderings_evaluated'] == math.factorial(len(ACTIVITIES)) // 4
+    assert counters['orderings_evaluated'] + counters['orderings_skipped'] == math.factorial(len(ACTIVITIES))
+
+
+@pytest.mark.parametrize("control, evaluated", [(StopAfterFirstBatch(), 256), (SolveControl(deadline_seconds=0), 0)])
+def test_stopped_sweep_counts_only_orderings_reached(control, evaluated):
+    counters = cpnet_counters(control)
+    assert counters['orderings_evaluated'] == evaluated
+    assert counters['orderings_skipped'] == evaluated * 3
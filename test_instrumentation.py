@@ -0,0 +1,40 @@
+import contextlib
+import io
+
+import numpy as np
+
+import instrumentation
+from metrics import exposition, solver_counters_total, solver_last_value
+
+
+def record(engine, **counters):
+    with contextlib.redirect_stdout(io.StringIO()):
+        instrumentation.record_solve(engine, **counters)
+
+
+def samples(metric, engine):
+    return {dict(labels)[metric.labelnames[1]]: value for _, labels, value in metric.samples() if dict(labels)['engine'] == engine}
+
+
+def test_scores_are_gauges_not_counters():
+    instrumentation.reset()
+    record("test_levels", iterations=10, unscheduled=1, score=7.5, upper_bound=9.0)
+    record("test_levels", iterations=5, unscheduled=0, score=8.0, upper_bound=9.0)
+
+    assert samples(solver_counters_total, "test_levels") == {'iterations': 15, 'unscheduled': 1}
+    assert samples(solver_last_value, "test_levels") == {'score': 8.0, 'upper_bound': 9.0}
+    assert instrumentation.totals()['counters'] == {('test_levels', 'iterations'): 15, ('test_levels', 'unscheduled'): 1}
+    assert instrumentation.last_solve['test_levels']['score'] == 8.0
+
+
+def test_numpy_counts_are_counted():
+    record("test_numpy", nodes=np.int64(3), score=np.float64(1.5))
+    assert samples(solver_counters_total, "test_numpy") == {'nodes': 3}
+    assert samples(solver_last_value, "test_numpy") == {'score': 1.5}
+
+
+def test_exposition_types():
+    record("test_exposition", nodes=2, score=1.0)
+    text = exposition()
+    assert "# TYPE scheduler_solver_last_value gauge" in text
+    assert 'scheduler_solver_counter_total{engine="test_exposition",counter="score"}' not in text
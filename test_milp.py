@@ -0,0 +1,33 @@
+import threading
+import time
+from datetime import datetime
+
+from benchmarks import make_activities, synthetic_weather
+from milp import optimal_starts
+from shared_grids import start_solver_server
+from solvers import SolveControl, build_weather_grid
+
+# Proving this infeasible takes HiGHS several seconds at one-minute slots
+ACTIVITIES = make_activities([(1.0, ["Sunny"])] * 5 + [(0.5, ["Cloudy"])] * 9)
+
+
+def hard_grid():
+    return build_weather_grid(synthetic_weather(), datetime(2024, 6, 1, 9), datetime(2024, 6, 1, 15)).view(1)
+
+
+def test_cancel_stops_a_long_solve():
+    start_solver_server()
+    grid = hard_grid()
+    control = SolveControl()
+    threading.Timer(1.0, control.cancel).start()
+    started = time.perf_counter()
+    starts, _, variables = optimal_starts(grid, ACTIVITIES, control=control)
+    assert time.perf_counter() - started < 2.0
+    assert starts is None and variables > 0
+    assert control.stop_reason == "cancelled"
+
+
+def test_small_solve_with_control_stays_in_process():
+    grid = build_weather_grid(synthetic_weather(), datetime(2024, 6, 1, 9), datetime(2024, 6, 1, 12))
+    starts, result, _ = optimal_starts(grid, ACTIVITIES[:2], control=SolveControl())
+    assert result.status == 0 and len(starts) == 2
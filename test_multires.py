@@ -0,0 +1,88 @@
+import contextlib
+import io
+
+import pytest
+
+import multires
+from benchmarks import INSTANCES, instance_window, synthetic_weather
+from problem_cache import clear_caches
+from solvers import SolveControl, build_weather_grid
+
+INSTANCE = INSTANCES["medium_feasible"]
+
+
+@pytest.fixture
+def grid():
+    clear_caches()
+    start_datetime, end_datetime = instance_window(INSTANCE)
+    yield build_weather_grid(synthetic_weather(), start_datetime, end_datetime).view(1)
+    clear_caches()
+
+
+class Calls(list):
+    after = None  # Optional (result, control) -> result, applied to every MILP result
+
+
+# Records the time limit and neighbourhood of every MILP the search runs
+@pytest.fixture
+def calls(monkeypatch):
+    recorded = Calls()
+    real = multires.optimal_starts
+
+    def recording(level_grid, activities, allowed, time_limit, control):
+        recorded.append({'slot_minutes': level_grid.slot_minutes, 'allowed': allowed is not None, 'time_limit': time_limit})
+        result = real(level_grid, activities, allowed, time_limit, control)
+        return result if recorded.after is None else recorded.after(result, control)
+
+    monkeypatch.setattr(multires, "optimal_starts", recording)
+    return recorded
+
+
+def run(grid, **options):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return multires.schedule_multires(INSTANCE["activities"], grid, **options)
+
+
+def test_levels_share_the_time_limit(grid, calls):
+    run(grid, time_limit=8.0)
+    assert [call['slot_minutes'] for call in calls] == list(multires.RESOLUTION_LEVELS)
+    # Each level gets an equal share of what is left, never the whole limit
+    assert calls[0]['time_limit'] <= 8.0 / len(multires.RESOLUTION_LEVELS)
+    assert all(call['time_limit'] <= 8.0 / (len(calls) - position) for position, call in enumerate(calls))
+
+
+def test_deadline_splits_like_time_limit(grid, calls):
+    run(grid, control=SolveControl(deadline_seconds=8.0))
+    assert calls[0]['time_limit'] <= 8.0 / len(multires.RESOLUTION_LEVELS)
+
+
+def test_stop_before_next_level_keeps_coarser_answer(grid, calls):
+    def cancel(result, control):
+        control.cancel()
+        return result
+
+    calls.after = cancel
+    control = SolveControl()
+    schedule = run(grid, control=control)
+    assert len(calls) == 1
+    assert schedule.stop_reason == "cancelled"
+    assert len(schedule.placements) == len(INSTANCE["activities"])
+    assert schedule.report['resolution_minutes'] == multires.RESOLUTION_LEVELS[0]
+
+
+def test_no_widening_after_stop(grid, calls):
+    def miss_and_cancel(result, control):
+        if calls[-1]['allowed']:
+            control.cancel()
+            return None, None, 0
+        return result
+
+    calls.after = miss_and_cancel
+    run(grid, control=SolveControl())
+    assert [call['allowed'] for call in calls] == [False, True]
+
+
+def test_spent_budget_runs_no_level(grid, calls):
+    schedule = run(grid, time_limit=0)
+    assert calls == []
+    assert schedule.placements == ()
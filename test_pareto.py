@@ -0,0 +1,74 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from benchmarks import INSTANCES, instance_window, synthetic_weather
+from pareto import ParetoArchive, crowding_distance, non_dominated
+from problem_cache import clear_caches
+from solvers import build_weather_grid, solve
+
+INSTANCE = INSTANCES["medium_feasible"]
+
+
+# Pairwise dominance check the sorted filter must agree with
+def brute_force_front(points):
+    keep = np.ones(len(points), dtype=bool)
+    for index, point in enumerate(points):
+        others = np.delete(points, index, axis=0)
+        dominated = ((others <= point).all(axis=1) & (others < point).any(axis=1)).any()
+        duplicate = (points[:index] == point).all(axis=1).any()
+        keep[index] = not dominated and not duplicate
+    return keep
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_non_dominated_matches_pairwise_check(seed):
+    points = np.random.default_rng(seed).integers(0, 6, size=(200, 3)).astype(float)
+    np.testing.assert_array_equal(non_dominated(points), brute_force_front(points))
+
+
+def test_crowding_distance_extremes_are_infinite():
+    distance = crowding_distance([[0, 4], [1, 3], [2, 1], [4, 0]])
+    assert np.isinf(distance[[0, 3]]).all()
+    assert np.isfinite(distance[[1, 2]]).all()
+
+
+def test_archive_keeps_only_non_dominated():
+    archive = ParetoArchive(max_size=10, n_objectives=2)
+    assert archive.add([2, 2], "a")
+    assert archive.add([1, 3], "b")
+    assert not archive.add([3, 3], "dominated")
+    assert archive.add([1, 1], "c")
+    assert archive.solutions == ["c"]
+
+
+def test_archive_drops_most_crowded_beyond_max_size():
+    archive = ParetoArchive(max_size=3, n_objectives=2)
+    for x in (0, 1, 1.1, 4):
+        archive.add([x, 4 - x], x)
+    assert len(archive) == 3
+    assert {0, 4} <= set(archive.solutions)
+
+
+@pytest.fixture
+def grid():
+    clear_caches()
+    start_datetime, end_datetime = instance_window(INSTANCE)
+    yield build_weather_grid(synthetic_weather(), start_datetime, end_datetime)
+    clear_caches()
+
+
+def test_front_is_feasible_and_non_dominated(grid):
+    with contextlib.redirect_stdout(io.StringIO()):
+        schedule = solve("pareto", INSTANCE["activities"], grid, max_iterations=50)
+    front = schedule.report['front']
+    assert front and schedule.placements == front[0]['placements']
+    points = np.array([[-entry['weather_score'], entry['comfort_degree_hours'], entry['idle_hours'],
+                        entry['finish'].timestamp()] for entry in front])
+    assert non_dominated(points).all()
+    for entry in front:
+        placements = entry['placements']
+        assert len(placements) == len(INSTANCE["activities"])
+        assert all(earlier.end <= later.start for earlier, later in zip(placements, placements[1:]))
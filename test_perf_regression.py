@@ -0,0 +1,27 @@
+from perf_regression import compare
+
+BASELINES = {'calibration_seconds': 0.01, 'results': {
+    'csp/small': {'seconds': 0.010, 'feasible': True},
+    'milp/tiny': {'seconds': 0.0005, 'feasible': True},
+    'wcsp/large': {'seconds': 2.0, 'feasible': True},
+}}
+
+
+def statuses(results):
+    rows, failed = compare({case: {'seconds': seconds, 'feasible': True} for case, seconds in results.items()}, 0.01, BASELINES)
+    return {row[0]: row[4] for row in rows}, failed
+
+
+# A 5x slowdown of a 10 ms solve used to hide under the fixed 50 ms noise floor
+def test_small_solves_are_checked():
+    assert statuses({'csp/small': 0.050})[0]['csp/small'] == "SLOWER"
+    assert statuses({'csp/small': 0.050})[1]
+
+
+def test_noise_on_tiny_solves_is_ignored():
+    assert statuses({'milp/tiny': 0.0015, 'csp/small': 0.012}) == ({'milp/tiny': "ok", 'csp/small': "ok"}, False)
+
+
+def test_large_solves_keep_the_tolerance():
+    assert statuses({'wcsp/large': 3.5})[0]['wcsp/large'] == "ok"
+    assert statuses({'wcsp/large': 4.5})[0]['wcsp/large'] == "SLOWER"
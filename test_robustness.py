@@ -0,0 +1,67 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from benchmarks import INSTANCES, instance_window, synthetic_weather
+from problem_cache import clear_caches
+from robustness import RobustnessModel, precip_scenarios
+from solvers import build_weather_grid, solve
+from weather_grid import classify_precip, preference_list
+
+INSTANCE = INSTANCES["medium_feasible"]
+
+
+@pytest.fixture
+def grid():
+    clear_caches()
+    start_datetime, end_datetime = instance_window(INSTANCE)
+    yield build_weather_grid(synthetic_weather(), start_datetime, end_datetime)
+    clear_caches()
+
+
+def quiet_solve(*args, **options):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return solve(*args, **options)
+
+
+# Each hour is wet about as often as its chance of rain, and rains the forecast amount on average
+def test_samples_match_forecast_marginals(grid):
+    samples = precip_scenarios(grid, n_samples=20000)
+    np.testing.assert_allclose((samples > 0).mean(axis=0), grid.hourly['chance_of_rain'] / 100, atol=0.02)
+    rainy = grid.hourly['precip_mm'] > 0
+    np.testing.assert_allclose(samples.mean(axis=0)[rainy], grid.hourly['precip_mm'][rainy], rtol=0.1)
+
+
+def test_samples_are_seeded(grid):
+    np.testing.assert_array_equal(precip_scenarios(grid, 100, seed=3), precip_scenarios(grid, 100, seed=3))
+
+
+# The vectorized chance agrees with checking every sample of every hour a placement covers
+def test_evaluate_matches_direct_count(grid):
+    schedule = quiet_solve("milp", INSTANCE["activities"], grid)
+    model = RobustnessModel(grid, n_samples=2000)
+    result = model.evaluate(INSTANCE["activities"], [schedule])[0]
+
+    by_name = {activity['name']: activity for activity in INSTANCE["activities"]}
+    within = np.ones(model.n_samples, dtype=bool)
+    for placement in schedule.placements:
+        first = (placement.start - grid.start_datetime) // (grid.slot_time(1) - grid.slot_time(0))
+        length = grid.duration_slots(by_name[placement.name]['duration'])
+        for hour in np.unique(grid.slot_hour[first:first + length]):
+            masks = classify_precip(model.samples[:, hour])
+            ok = np.isnan(model.samples[:, hour])
+            for preference in preference_list(by_name[placement.name]['weather']):
+                ok |= masks[preference]
+            within &= ok
+    assert result['probability'] == pytest.approx(within.mean())
+    assert set(result['activity_probability']) == set(by_name)
+
+
+# At 0.5 too few starts are left for every activity to fit, so no plan is returned
+def test_min_probability_drops_unlikely_starts(grid):
+    schedule = quiet_solve("robust", INSTANCE["activities"], grid, n_samples=1000, min_probability=0.3)
+    assert len(schedule.placements) == len(INSTANCE["activities"])
+    assert min(schedule.report['activity_probability'].values()) >= 0.3
+    assert quiet_solve("robust", INSTANCE["activities"], grid, n_samples=1000, min_probability=0.5).placements == ()
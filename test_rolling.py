@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from benchmarks import synthetic_weather
+from busy_intervals import BusyIntervals
+from problem_cache import clear_caches
+from rolling import RollingScheduler, changed_hours, repair_schedule
+
+DAY = "2024-06-01"
+START = datetime(2024, 6, 1, 8)
+END = datetime(2024, 6, 1, 12)
+WALK = {"name": "walk", "duration": 1.0, "weather": ["Sunny"]}
+SCHEDULE = {"walk": {"start": datetime(2024, 6, 1, 9), "end": datetime(2024, 6, 1, 10)}}
+
+
+# 09:00 turns Cloudy under chance_of_rain while precip_mm stays 0, so the precip scheme still reads Sunny
+def refreshed_weather():
+    weather_data = synthetic_weather(DAY)
+    weather_data.loc[weather_data['datetime'].dt.hour == 9, 'chance_of_rain'] = 50
+    return weather_data
+
+
+def test_changed_hours_follow_scheme():
+    old, new = synthetic_weather(DAY), refreshed_weather()
+    assert changed_hours(old, new, "precip") == []
+    assert changed_hours(old, new, "chance_of_rain") == [datetime(2024, 6, 1, 9)]
+
+
+def test_repair_uses_scheme():
+    clear_caches()
+    repaired, report = repair_schedule(SCHEDULE, [WALK], refreshed_weather(), START, END, ["walk"],
+                                       scheme="chance_of_rain")
+    assert report['moved'] == ["walk"]
+    assert repaired["walk"]['start'].hour != 9
+
+    _, report = repair_schedule(SCHEDULE, [WALK], refreshed_weather(), START, END, ["walk"])
+    assert report['kept'] == ["walk"]
+
+
+def test_rolling_scheduler_moves_activity_off_changed_hour():
+    clear_caches()
+    scheduler = RollingScheduler(scheme="chance_of_rain")
+    scheduler.register("plan", "Paris", [WALK], START, END, SCHEDULE, synthetic_weather(DAY))
+    reports = scheduler.on_forecast("Paris", START.date(), refreshed_weather())
+    assert reports["plan"]['moved'] == ["walk"]
+    assert scheduler.plans["plan"]['schedule']["walk"]['start'].hour != 9
+
+
+# Blocking the slot the repair would pick sends the walk elsewhere, never into busy time
+def test_repair_avoids_busy_slots():
+    clear_caches()
+    best, _ = repair_schedule(SCHEDULE, [WALK], refreshed_weather(), START, END, ["walk"], scheme="chance_of_rain")
+    busy = BusyIntervals([(best["walk"]['start'], best["walk"]['end'])])
+    repaired, report = repair_schedule(SCHEDULE, [WALK], refreshed_weather(), START, END, ["walk"],
+                                       scheme="chance_of_rain", busy=busy)
+    assert report['moved'] == ["walk"]
+    assert not busy.overlaps([repaired["walk"]['start']], [repaired["walk"]['end']]).any()
+
+    scheduler = RollingScheduler(scheme="chance_of_rain")
+    scheduler.register("plan", "Paris", [WALK], START, END, SCHEDULE, synthetic_weather(DAY), busy=busy)
+    scheduler.on_forecast("Paris", START.date(), refreshed_weather())
+    walk = scheduler.plans["plan"]['schedule']["walk"]
+    assert not busy.overlaps([walk['start']], [walk['end']]).any()
+
+
+# An affected activity that would stay put still moves when its slot has become busy
+def test_repair_moves_activity_out_of_busy_slot():
+    clear_caches()
+    busy = BusyIntervals([(datetime(2024, 6, 1, 9, 30), datetime(2024, 6, 1, 9, 45))])
+    repaired, report = repair_schedule(SCHEDULE, [WALK], refreshed_weather(), START, END, ["walk"], busy=busy)
+    assert report['moved'] == ["walk"]
+    assert not busy.overlaps([repaired["walk"]['start']], [repaired["walk"]['end']]).any()
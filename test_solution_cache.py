@@ -0,0 +1,64 @@
+import contextlib
+import io
+from datetime import datetime
+
+import pytest
+
+from benchmarks import synthetic_weather
+from problem_cache import clear_caches
+from solvers import build_weather_grid, solve
+
+START = datetime(2024, 6, 1, 8)
+END = datetime(2024, 6, 1, 18)
+
+
+def activities(*names):
+    preferences = (["Sunny"], ["Cloudy", "Sunny"], ["Rainy", "Cloudy"])
+    return [{"name": name, "duration": 1.0, "weather": list(weather)} for name, weather in zip(names, preferences)]
+
+
+@pytest.fixture
+def grid():
+    clear_caches()
+    yield build_weather_grid(synthetic_weather(), START, END)
+    clear_caches()
+
+
+def quiet_solve(*args, **options):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return solve(*args, **options)
+
+
+# An activity named like a report key used to rename that key on the way into the cache
+def test_activity_named_after_report_key(grid):
+    first = quiet_solve("milp", activities("status", "lunch", "errand"), grid)
+    second = quiet_solve("milp", activities("walk", "lunch", "errand"), grid)
+    assert second.report['solution_cache'] == "hit"
+    assert second.report['status'] == first.report['status']
+    assert set(second.report) == set(first.report) | {'solution_cache', 'solved_in_seconds'}
+    assert [placement.name for placement in second.placements] == ["walk", "lunch", "errand"]
+
+
+def test_hit_in_other_order_and_names(grid):
+    first = quiet_solve("milp", activities("a", "b", "c"), grid)
+    second = quiet_solve("milp", list(reversed(activities("x", "y", "z"))), grid)
+    assert second.report['solution_cache'] == "hit"
+    renamed = dict(zip("abc", "xyz"))
+    assert [(renamed[placement.name], placement.start) for placement in first.placements] == \
+           [(placement.name, placement.start) for placement in second.placements]
+
+
+def test_activity_probability_renamed(grid):
+    quiet_solve("robust", activities("a", "b", "c"), grid, n_samples=200)
+    second = quiet_solve("robust", activities("x", "y", "z"), grid, n_samples=200)
+    assert second.report['solution_cache'] == "hit"
+    assert set(second.report['activity_probability']) == {"x", "y", "z"}
+
+
+def test_front_placements_renamed(grid):
+    quiet_solve("pareto", activities("a", "b", "c"), grid, max_iterations=5)
+    second = quiet_solve("pareto", activities("x", "y", "z"), grid, max_iterations=5)
+    assert second.report['solution_cache'] == "hit"
+    assert second.report['objectives']
+    for entry in second.report['front']:
+        assert {placement.name for placement in entry['placements']} == {"x", "y", "z"}
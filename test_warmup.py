@@ -0,0 +1,46 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import warmup
+from benchmarks import synthetic_weather
+from problem_cache import clear_caches, weather_grid_cache
+from solvers import build_weather_grid
+from weather_grid import WEATHER_FIELDS, WeatherGrid
+
+TODAY = date(2024, 6, 1)
+
+
+class FakeClient:
+    def get_days(self, location, days):
+        return {day: synthetic_weather(day.isoformat()) for day in days}
+
+
+# The warmed day grid is the one the pages' same-day windows are sliced from
+def test_warm_location_builds_the_grids_pages_use(monkeypatch):
+    clear_caches()
+    monkeypatch.setattr(warmup, "default_weather_client", lambda api_key: FakeClient())
+    status = warmup.WarmupStatus(["weather:Paris", "grids:Paris"])
+    forecasts = warmup.warm_location("key", "Paris", status, TODAY)
+    assert status.completed == ["weather:Paris", "grids:Paris"]
+
+    misses = weather_grid_cache.misses
+    start = datetime.combine(TODAY, datetime.min.time()) + timedelta(hours=9, minutes=15)
+    build_weather_grid(forecasts[TODAY], start, start + timedelta(hours=6))
+    assert weather_grid_cache.misses == misses
+
+
+def test_window_matches_grid_built_directly():
+    clear_caches()
+    weather_data = synthetic_weather(TODAY.isoformat())
+    start = datetime(2024, 6, 1, 7, 30)
+    end = datetime(2024, 6, 1, 19, 45)
+    window = build_weather_grid(weather_data, start, end)
+    direct = WeatherGrid(weather_data, start, end, 15)
+    assert (window.start_datetime, window.end_datetime, window.n_slots) == (direct.start_datetime, direct.end_datetime, direct.n_slots)
+    np.testing.assert_array_equal(window.slot_hour, direct.slot_hour)
+    for field in WEATHER_FIELDS:
+        np.testing.assert_array_equal(getattr(window, field), getattr(direct, field))
+        np.testing.assert_array_equal(window.hourly[field], direct.hourly[field])
+    for name, mask in direct.class_masks.items():
+        np.testing.assert_array_equal(window.class_masks[name], mask)
@@ -0,0 +1,116 @@
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks import synthetic_weather_payload
+from weather_client import WeatherClient
+from weather_source import WeatherUnavailableError
+
+TODAY = date(2024, 6, 10)
+
+
+# Answers forecast.json and history.json with synthetic days; `gate`, when set, holds every request until released
+class FakeSource:
+    def __init__(self, gate=None, error=None):
+        self.gate = gate
+        self.error = error
+        self.requests = []
+        self.started = threading.Event()
+
+    def get(self, endpoint, params):
+        self.requests.append((endpoint, dict(params)))
+        self.started.set()
+        if self.gate is not None:
+            assert self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        if endpoint == "forecast.json":
+            days = [TODAY + timedelta(days=offset) for offset in range(params["days"])]
+        else:
+            first = date.fromisoformat(params["dt"])
+            last = date.fromisoformat(params.get("end_dt", params["dt"]))
+            days = [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+        return {'forecast': {'forecastday': [synthetic_weather_payload(day.isoformat())['forecast']['forecastday'][0]
+                                             for day in days]}}
+
+
+def client(source, **options):
+    return WeatherClient(source, today=lambda: TODAY, **options)
+
+
+def test_one_forecast_request_for_separate_runs():
+    days = [TODAY - timedelta(days=3), TODAY - timedelta(days=2), TODAY, TODAY + timedelta(days=2)]
+    assert client(FakeSource(), merge_history=True).plan_requests("Paris", days) == [
+        ("history.json", {"q": "Paris", "dt": "2024-06-07", "end_dt": "2024-06-08"}),
+        ("forecast.json", {"q": "Paris", "days": 3}),
+    ]
+
+
+# end_dt needs a paid plan, so by default every past day is its own request
+def test_history_is_fetched_per_day_by_default():
+    days = [TODAY - timedelta(days=3), TODAY - timedelta(days=2)]
+    weather = client(FakeSource())
+    assert weather.plan_requests("Paris", days) == [
+        ("history.json", {"q": "Paris", "dt": "2024-06-07"}),
+        ("history.json", {"q": "Paris", "dt": "2024-06-08"}),
+    ]
+    assert set(weather.get_days("Paris", days)) == set(days)
+
+
+def test_forecast_beyond_horizon_is_rejected():
+    with pytest.raises(ValueError):
+        client(FakeSource()).plan_requests("Paris", [TODAY + timedelta(days=3)])
+
+
+def test_get_days_sends_one_forecast_request():
+    source = FakeSource()
+    weather = client(source)
+    result = weather.get_days("Paris", [TODAY, TODAY + timedelta(days=2)])
+    assert set(result) == {TODAY, TODAY + timedelta(days=2)}
+    assert source.requests == [("forecast.json", {"q": "Paris", "days": 3})]
+    # The day in between came with the same response
+    weather.get_day("Paris", TODAY + timedelta(days=1))
+    assert weather.upstream_calls == 1
+
+
+# A slow fetch for one location does not hold up cached days or other requests
+def test_fetch_does_not_hold_the_lock():
+    source = FakeSource()
+    weather = client(source)
+    weather.get_day("Lyon", TODAY)
+    gate = source.gate = threading.Event()
+    source.started.clear()
+
+    slow = threading.Thread(target=weather.get_day, args=("Paris", TODAY))
+    slow.start()
+    assert source.started.wait(5)
+    try:
+        assert TODAY in weather.get_days("Lyon", [TODAY])
+        assert weather._lock.acquire(timeout=1)
+        weather._lock.release()
+    finally:
+        gate.set()
+        slow.join(5)
+
+
+def test_concurrent_callers_share_one_request():
+    gate = threading.Event()
+    source = FakeSource(gate)
+    weather = client(source)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(weather.get_day("Paris", TODAY))) for _ in range(3)]
+    threads[0].start()
+    assert source.started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(results) == 3
+    assert len(source.requests) == 1
+
+
+def test_unavailable_source_raises_without_fallback():
+    with pytest.raises(WeatherUnavailableError):
+        client(FakeSource(error=WeatherUnavailableError("quota"))).get_day("Paris", TODAY)
@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from weather_source import (DailyQuota, LiveWeatherSource, QuotaExhaustedError, RetryPolicy, TokenBucket,
+                            WeatherUnavailableError)
+from weather_stub import RETRY_AFTER_SECONDS, StubWeatherServer
+
+FORECAST = ("forecast.json", {"q": "Paris", "days": 1})
+
+
+# Records backoff waits instead of sleeping; a tiny base leaves Retry-After as the only sizeable wait
+class RecordedRetry(RetryPolicy):
+    def __init__(self, max_attempts=4):
+        self.sleeps = []
+        super().__init__(max_attempts, base=0.001, rng=random.Random(0), sleep=self.sleeps.append)
+
+
+@pytest.fixture
+def stub_source():
+    servers = []
+
+    def start(faults=(), **options):
+        stub = StubWeatherServer(faults=faults).start()
+        servers.append(stub)
+        options.setdefault("retry", RecordedRetry())
+        return stub, LiveWeatherSource("test-key", base_url=stub.base_url, **options)
+
+    yield start
+    for stub in servers:
+        stub.stop()
+
+
+def test_ok_response(stub_source):
+    stub, source = stub_source()
+    payload = source.get(*FORECAST)
+    assert len(payload['forecast']['forecastday']) == 1
+    assert [fault for _, _, fault in stub.requests] == ["ok"]
+
+
+def test_429_retry_after_is_honoured(stub_source):
+    stub, source = stub_source(["429"])
+    assert source.get(*FORECAST)['forecast']['forecastday']
+    assert source.retry.sleeps == [RETRY_AFTER_SECONDS]
+    assert [fault for _, _, fault in stub.requests] == ["429", "ok"]
+
+
+def test_transient_faults_are_retried(stub_source):
+    stub, source = stub_source(["500", "drop", "garbage"])
+    assert source.get(*FORECAST)['forecast']['forecastday']
+    assert [fault for _, _, fault in stub.requests] == ["500", "drop", "garbage", "ok"]
+    assert len(source.retry.sleeps) == 3
+
+
+@pytest.mark.parametrize("fault", ["500", "503", "drop", "garbage"])
+def test_persistent_fault_is_unavailable(stub_source, fault):
+    stub, source = stub_source([fault] * 4)
+    with pytest.raises(WeatherUnavailableError):
+        source.get(*FORECAST)
+    assert len(stub.requests) == 4
+
+
+def test_timeout_is_unavailable(stub_source):
+    stub, source = stub_source(["slow:1", "slow:1"], timeout=(1.0, 0.2), retry=RecordedRetry(max_attempts=2))
+    with pytest.raises(WeatherUnavailableError):
+        source.get(*FORECAST)
+    assert len(stub.requests) == 2
+
+
+def test_quota_error_exhausts_daily_quota(stub_source):
+    quota = DailyQuota(limit=100)
+    stub, source = stub_source(["quota"], quota=quota)
+    with pytest.raises(QuotaExhaustedError):
+        source.get(*FORECAST)
+    assert quota.remaining == 0
+    # Spent until tomorrow: no further request goes upstream
+    with pytest.raises(QuotaExhaustedError):
+        source.get(*FORECAST)
+    assert len(stub.requests) == 1
+
+
+def test_rate_limiter_refuses_when_wait_passes_timeout(stub_source):
+    bucket = TokenBucket(rate=0.1, capacity=1)
+    stub, source = stub_source(rate_limiter=bucket, rate_limit_wait=0.5)
+    source.get(*FORECAST)
+    with pytest.raises(WeatherUnavailableError):
+        source.get(*FORECAST)
+    assert len(stub.requests) == 1
+
+
+def test_token_bucket_waits_within_timeout():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2.0, capacity=1, clock=lambda: now[0], sleep=sleep)
+    assert bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=0.4)
+    assert bucket.acquire(timeout=0.6)
+    assert sleeps == [0.5]
@@ -0,0 +1,123 @@
+# Background warm-up at server start: prefetch weather, parse each day's grid and run a tiny solve,
+# so the first user of the day does not pay for it
+import os
+import threading
+import time
+import traceback
+from datetime import date, datetime, timedelta
+
+import streamlit as st
+
+from weather_client import default_weather_client
+from solvers import day_weather_grid
+from milp import solve_milp
+from shared_grids import start_solver_server
+
+# Constants and Global Variables
+WARMUP_DAYS = 3
+
+
+class WarmupStatus:
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.completed = []
+        self.errors = {}
+        self.started_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def mark(self, step):
+        with self._lock:
+            self.completed.append(step)
+
+    def fail(self, step, error):
+        with self._lock:
+            self.errors[step] = error
+
+    def finish(self):
+        with self._lock:
+            self.finished_at = time.time()
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    @property
+    def ready(self):
+        return self.done and not self.errors
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'done': self.finished_at is not None,
+                'completed': len(self.completed),
+                'total': len(self.steps),
+                'errors': dict(self.errors),
+                'elapsed': (self.finished_at or time.time()) - self.started_at,
+            }
+
+
+def warm_location(api_key, location, status, today):
+    days = [today + timedelta(days=offset) for offset in range(WARMUP_DAYS)]
+    step = f"weather:{location}"
+    forecasts = default_weather_client(api_key).get_days(location, days)
+    status.mark(step)
+
+    # build_weather_grid slices every planning window out of this day grid, so the pages reuse it
+    for day, weather_data in forecasts.items():
+        day_weather_grid(weather_data, day)
+    status.mark(f"grids:{location}")
+    return forecasts
+
+
+def run_warmup(api_key, locations, status, today=None):
+    today = today or date.today()
+    sample = None
+    for location in locations:
+        try:
+            forecasts = warm_location(api_key, location, status, today)
+            sample = sample if sample is not None else forecasts.get(today)
+        except Exception as error:
+            status.fail(location, f"{type(error).__name__}: {error}")
+            traceback.print_exc()
+
+    # A one-activity solve loads SciPy/HiGHS and exercises the grid and feasibility caches
+    try:
+        if sample is not None:
+            day_start = datetime.combine(today, datetime.min.time())
+            solve_milp([{"name": "warmup", "duration": 0.5, "weather": ["Sunny", "Cloudy", "Rainy"]}],
+                       sample, day_start + timedelta(hours=8), day_start + timedelta(hours=9))
+        start_solver_server()
+        status.mark("solver")
+    except Exception as error:
+        status.fail("solver", f"{type(error).__name__}: {error}")
+    status.finish()
+
+
+def start_warmup(api_key, locations, today=None):
+    steps = [f"{kind}:{location}" for location in locations for kind in ("weather", "grids")] + ["solver"]
+    status = WarmupStatus(steps)
+    thread = threading.Thread(target=run_warmup, args=(api_key, list(locations), status, today),
+                              name="scheduler-warmup", daemon=True)
+    thread.start()
+    return status
+
+
+# Runs once per Streamlit server process; later script runs get the same status object back
+@st.cache_resource(show_spinner=False)
+def server_warmup(api_key, locations):
+    if os.environ.get("SCHEDULER_WARMUP", "1") == "0":
+        return None
+    return start_warmup(api_key, locations)
+
+
+def show_warmup_status(status):
+    if status is None:
+        return
+    snapshot = status.snapshot()
+    if not snapshot['done']:
+        st.sidebar.caption(f"Warming up weather and solver caches ({snapshot['completed']}/{snapshot['total']})...")
+    elif snapshot['errors']:
+        st.sidebar.caption(f"Warm-up finished with errors: {', '.join(snapshot['errors'])}")
+    else:
+        st.sidebar.caption(f"Ready (warmed up in {snapshot['elapsed']:.1f} seconds)")
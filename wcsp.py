@@ -1,283 +1,383 @@
-# Library Imports
-import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import networkx as nx
-import requests
-from datetime import datetime, timedelta
-from constraint import Problem, AllDifferentConstraint, FunctionConstraint, BacktrackingSolver
-import seaborn as sns
-import logging
-import matplotlib.dates as mdates
-import matplotlib.colors as mcolors
-from datetime import date
-import time
-import math
-
-
-# Constants and Global Variables
-api_key = ""
-location = "Los Angeles"
-
-# Function to Fetch and Process Weather Data for a Specific Day
-def fetch_weather_data(api_key, location, selected_date):
-    url = f"http://api.weatherapi.com/v1/history.json?key={api_key}&q={location}&dt={selected_date}"
-    response = requests.get(url)
-    data = response.json()
-
-    df_weather = pd.DataFrame()
-    for hour in data['forecast']['forecastday'][0]['hour']:
-        df_weather = df_weather.append({
-            'date': selected_date,
-            'time': hour['time'],
-            'temp_c': hour['temp_c'],
-            'wind_kph': hour['wind_kph'],
-            'humidity': hour['humidity'],
-            'chance_of_rain': hour['chance_of_rain'],
-            'precip_mm': hour['precip_mm'],
-            'vis_km': hour['vis_km'],
-        }, ignore_index=True)
-
-    df_weather['datetime'] = pd.to_datetime(df_weather['time'])
-    return df_weather
-
-def add_activity_input(key):
-    with st.container():
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            activity_name = st.text_input("Activity Name", key=f"activity_{key}")
-        with col2:
-            duration = st.number_input("Duration (in hours)", min_value=0.5, max_value=12.0, step=0.5, key=f"duration_{key}")
-        with col3:
-            # Updated weather preferences
-            weather_preference = st.multiselect("Weather Preference (Select in order of preference)", 
-                                                ["Sunny", "Cloudy", "Rainy"], 
-                                                key=f"weather_{key}")
-    return {"name": activity_name, "duration": duration, "weather": weather_preference}
-
-def weather_condition_check(precip_mm, preferences):
-    # Mapping conditions to chance of rain
-    condition_map = {
-        'Sunny': lambda precip_mm: precip_mm == 0,
-        'Cloudy': lambda precip_mm: 0 <= precip_mm <= 0.3,
-        'Rainy': lambda precip_mm: precip_mm > 0.3
-    }
-
-    # Check weather conditions based on preferences
-    for preference in preferences:
-        if condition_map[preference](precip_mm):
-            return True
-    return False
-
-def is_within_time_range(start_time, end_time, activity_start, activity_duration):
-    activity_end = activity_start + activity_duration
-    return start_time <= activity_start and activity_end <= end_time
-
-def combine_date_time(date_obj, time_obj):
-    return datetime.combine(date_obj, time_obj)
-
-def solve_wcsp(activities, weather_data, start_datetime, end_datetime):
-    estart_time = time.time()
-    # Create a constraint problem
-    problem = Problem(BacktrackingSolver())
-
-    # Convert weather data to a dictionary for easy access
-    weather_dict = {pd.to_datetime(row['datetime']): row for index, row in weather_data.iterrows()}
-
-    # Add variables for each activity (activity start time)
-    for activity in activities:
-        # Define possible start times for each activity
-        possible_start_times = []
-        for minute in range(0, int((end_datetime - start_datetime).total_seconds() // 60) - int(activity['duration']*60) + 1):
-            possible_start = start_datetime + timedelta(minutes=minute)
-            possible_end = possible_start + timedelta(hours=activity['duration'])
-            if possible_end <= end_datetime:
-                possible_start_times.append((possible_start, possible_end))
-
-
-
-        problem.addVariable(activity['name'], possible_start_times)
-        
-    # Custom constraint to ensure no overlapping activities
-    def no_overlap(time1, time2):
-        start1, end1 = time1
-        start2, end2 = time2
-        return end1 <= start2 or start1 >= end2
-
-    # Apply the no_overlap constraint to all pairs of activities
-    for activity1 in activities:
-        for activity2 in activities:
-            if activity1 != activity2:
-                problem.addConstraint(no_overlap, (activity1['name'], activity2['name']))
-
-    # Weather constraints for each activity
-    def weather_constraint(activity_time, activity, weather_dict):
-        activity_start, activity_end = activity_time
-        while activity_start < activity_end:
-            weather_info = weather_dict.get(activity_start)
-            if weather_info is not None:
-                # Ensure we are dealing with single values, not Series
-                precip_mm = weather_info['precip_mm']
-                if isinstance(precip_mm, pd.Series):
-                    precip_mm = precip_mm.iloc[0]  # Handle Series
-                elif isinstance(precip_mm, pd.DataFrame):
-                    precip_mm = precip_mm.iloc[0, 0]  # Handle DataFrame
-                # Now precip_mm should be a single value (int or float)
-                if not weather_condition_check(precip_mm, activity['weather']):
-                    return False
-            activity_start += timedelta(hours=1)
-        return True
-
-    for activity in activities:
-        problem.addConstraint(FunctionConstraint(lambda time, act=activity: weather_constraint(time, act, weather_dict)), [activity['name']])
-
-    # Function to calculate average weather data
-    def calculate_average_weather(activity_start, activity_duration, weather_dict):
-        activity_end = activity_start + timedelta(hours=activity_duration)
-        temp_sum = 0
-        rain_chance_sum = 0
-        count = 0
-
-        while activity_start < activity_end:
-            # Find the nearest hour for weather data
-            nearest_hour = activity_start.replace(minute=0, second=0, microsecond=0)
-            if activity_start.minute >= 30:  # Round up if past 30 minutes
-                nearest_hour += timedelta(hours=1)
-
-            weather_info = weather_dict.get(nearest_hour)
-            if weather_info is not None:  # Check if weather_info is not None
-                temp_sum += weather_info['temp_c']
-                rain_chance_sum += int(weather_info['precip_mm'])
-                count += 1
-            activity_start += timedelta(hours=1)
-
-        if count > 0:
-            avg_temp = temp_sum / count
-            avg_rain_chance = rain_chance_sum / count
-        else:
-            avg_temp = None
-            avg_rain_chance = None
-
-        return avg_temp, avg_rain_chance
-    
-    # Solve the problem
-    solution = problem.getSolution()
-
-    if solution is None:
-        return "No feasible schedule found."
-
-    # Convert solution to a more readable format and calculate average weather data
-    schedule = {}
-    for activity in activities:
-        start_time, end_time = solution[activity['name']]
-        avg_temp, avg_rain_chance = calculate_average_weather(start_time, activity['duration'], weather_dict)
-        schedule[activity['name']] = {
-            'start': start_time, 
-            'end': end_time, 
-            'average_temperature': avg_temp, 
-            'average_precip_mm': avg_rain_chance
-        }
-    
-    eend_time = time.time()
-    # Calculate execution time
-    execution_time = eend_time - estart_time
-    print(f"Execution Time: {execution_time} seconds")
-    return schedule, execution_time
-
-
-def plot_activity_timeline(schedule, planning_day):
-    fig, ax = plt.subplots(figsize=(10, 3))
-
-    # Generate distinct colors for each activity
-    colors = list(mcolors.TABLEAU_COLORS.values())
-    color_idx = 0
-
-    for activity, details in schedule.items():
-        start = details['start']
-        end = details['end']
-        ax.plot([start, end], [1, 1], color=colors[color_idx], linewidth=6, label=activity)
-        color_idx = (color_idx + 1) % len(colors)
-
-    ax.set_yticks([])
-    ax.set_xlabel('Time')
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-    plt.xticks(rotation=45)
-    plt.title(f'Activity Timeline for {planning_day.strftime("%Y-%m-%d")}')
-    plt.grid(True)
-    plt.legend()
-
-    return fig
-
-
-def user_interface():
-    st.title("Activity Scheduler Using Weather Constraints and WCSP")
-    st.subheader("Enter Activities")
-    activities = []
-    activity_names = set()
-    activity_count = st.number_input("How many activities do you want to schedule?", min_value=1, max_value=10, step=1)
-
-    valid_input = True
-
-    for i in range(activity_count):
-        activity = add_activity_input(i)
-        if not activity['name']:
-            st.error("Activity name cannot be blank.")
-            valid_input = False
-        if activity['name'] in activity_names:
-            st.error(f"Activity name '{activity['name']}' is already used. Please use a unique name.")
-            valid_input = False
-        activity_names.add(activity['name'])
-        activities.append(activity)
-
-    st.subheader("Planning Day and Time")
-    planning_day = st.date_input("Select the Day for Planning", min_value=date.today())
-    start_time = st.time_input("Start Time", key="start_time")
-    end_time = st.time_input("End Time", key="end_time")
-
-    # Check for valid time inputs
-    if start_time > end_time:
-        st.error("Start time cannot be after end time.")
-        valid_input = False
-    if planning_day > date.today() + timedelta(days=2):
-        st.error("Date chosen must be within the next 3 days.")
-        valid_input = False
-
-    if st.button("Submit") and valid_input:
-        st.write("Scheduled Activities:")
-        for activity in activities:
-            st.write(activity)
-        
-        start_datetime = combine_date_time(planning_day, start_time)
-        end_datetime = combine_date_time(planning_day, end_time)
-
-        weather_data = fetch_weather_data(api_key, location, planning_day.strftime("%Y-%m-%d"))
-        wcsp_schedule, execution_time = solve_wcsp(activities, weather_data, start_datetime, end_datetime)  # Modified to capture execution time
-
-        if isinstance(wcsp_schedule, str):
-            st.write(wcsp_schedule)
-        else:
-            st.write("Optimized Schedule:")
-            for activity in wcsp_schedule:
-                start = wcsp_schedule[activity]['start']
-                end = wcsp_schedule[activity]['end']
-                avg_temp = wcsp_schedule[activity]['average_temperature']
-                if avg_temp is not None:
-                    avg_temp = round(avg_temp, 1)
-                avg_rain_chance = wcsp_schedule[activity]['average_precip_mm']
-                if avg_rain_chance is not None:
-                    avg_rain_chance = round(avg_rain_chance, 2)
-                st.write(f"{activity}: Start at {start.strftime('%Y-%m-%d %H:%M')}, End by {end.strftime('%Y-%m-%d %H:%M')}, Average Temperature: {avg_temp}°C, Precipitation: {avg_rain_chance}mm")
-
-            # Display execution time
-            st.write(f"Execution Time: {execution_time:.2f} seconds")  # Display execution time
-
-            # Plot and display the activity timeline
-            fig = plot_activity_timeline(wcsp_schedule, planning_day)
-            st.pyplot(fig)
-
-# Main Function
-def main():
-    user_interface()
-
-if __name__ == "__main__":
+# Library Imports
+import streamlit as st
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+import networkx as nx
+import requests
+from datetime import datetime, timedelta
+from constraint import Problem, AllDifferentConstraint, FunctionConstraint, BacktrackingSolver
+import seaborn as sns
+import logging
+import matplotlib.dates as mdates
+import matplotlib.colors as mcolors
+from datetime import date
+from datetime import time as day_time
+import time
+import math
+from weather_client import WeatherClient, default_weather_client
+from weather_source import WeatherSourceError
+from symmetry import interchangeable_classes, ordering_pairs, symmetry_factor
+from instrumentation import record_solve
+from weather_grid import preference_list
+from problem_cache import candidate_cache, feasibility_cache, cached_weather_grid, cache_totals
+from solvers import Placement, SolveInterrupted, build_weather_grid, get_engine, legacy_result, make_schedule, register_engine
+from warmup import server_warmup, show_warmup_status
+from metrics import ensure_metrics_server
+from solve_jobs import DEFAULT_DEADLINE_SECONDS, fixed_events_input, show_job, start_job, weather_notice
+from scenarios import evaluate_scenarios, scenario_grid
+from robustness import schedule_robustness
+from pareto import COMFORT_RANGE_C
+
+
+# Constants and Global Variables
+api_key = ""
+location = "Los Angeles"
+
+# Function to Fetch and Process Weather Data for a Specific Day
+def fetch_weather_data(api_key, location, selected_date, source=None):
+    # The client picks history or forecast by date and caches every day a response contains
+    client = default_weather_client(api_key) if source is None else WeatherClient(source)
+    return client.get_day(location, selected_date)
+
+def add_activity_input(key):
+    with st.container():
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            activity_name = st.text_input("Activity Name", key=f"activity_{key}")
+        with col2:
+            duration = st.number_input("Duration (in hours)", min_value=0.5, max_value=12.0, step=0.5, key=f"duration_{key}")
+        with col3:
+            # Updated weather preferences
+            weather_preference = st.multiselect("Weather Preference (Select in order of preference)", 
+                                                ["Sunny", "Cloudy", "Rainy"], 
+                                                key=f"weather_{key}")
+    return {"name": activity_name, "duration": duration, "weather": weather_preference}
+
+def weather_condition_check(precip_mm, preferences):
+    # Mapping conditions to chance of rain
+    condition_map = {
+        'Sunny': lambda precip_mm: precip_mm == 0,
+        'Cloudy': lambda precip_mm: 0 <= precip_mm <= 0.3,
+        'Rainy': lambda precip_mm: precip_mm > 0.3
+    }
+
+    # Check weather conditions based on preferences
+    for preference in preferences:
+        if condition_map[preference](precip_mm):
+            return True
+    return False
+
+def is_within_time_range(start_time, end_time, activity_start, activity_duration):
+    activity_end = activity_start + activity_duration
+    return start_time <= activity_start and activity_end <= end_time
+
+def combine_date_time(date_obj, time_obj):
+    return datetime.combine(date_obj, time_obj)
+
+# Candidate start offsets (minutes after the window start) for an activity of `duration` hours.
+# A range is generated on demand, so nothing is materialized per minute until the weather filter runs.
+def candidate_start_offsets(start_datetime, end_datetime, duration):
+    return range(0, int((end_datetime - start_datetime).total_seconds() // 60) - int(duration*60) + 1)
+
+@register_engine("wcsp", "Backtracking (python-constraint)")
+def schedule_wcsp(activities, grid, control=None):
+    estart_time = time.time()
+    hits_before, misses_before = cache_totals()
+    start_datetime, end_datetime = grid.start_datetime, grid.end_datetime
+    # Create a constraint problem
+    problem = Problem(BacktrackingSolver())
+
+    # Hourly weather keyed by datetime, parsed once per day by the grid
+    weather_key = grid.weather_key
+    weather_dict = grid.hours
+
+    # Weather constraints for each activity
+    def weather_constraint(offset, activity, weather_dict):
+        activity_start = start_datetime + timedelta(minutes=offset)
+        activity_end = activity_start + timedelta(hours=activity['duration'])
+        while activity_start < activity_end:
+            weather_info = weather_dict.get(activity_start)
+            if weather_info is not None:
+                # Ensure we are dealing with single values, not Series
+                precip_mm = weather_info['precip_mm']
+                if isinstance(precip_mm, pd.Series):
+                    precip_mm = precip_mm.iloc[0]  # Handle Series
+                elif isinstance(precip_mm, pd.DataFrame):
+                    precip_mm = precip_mm.iloc[0, 0]  # Handle DataFrame
+                # Now precip_mm should be a single value (int or float)
+                if not weather_condition_check(precip_mm, activity['weather']):
+                    return False
+            activity_start += timedelta(hours=1)
+        return True
+
+    # Add variables for each activity (activity start time), pre-filtered by the weather constraint
+    for activity in activities:
+        prefs = tuple(preference_list(activity['weather']))
+
+        # Candidate offsets depend only on the planning window, weather feasibility also on the day and preferences
+        possible_start_times = candidate_cache.get_or_build(
+            ("wcsp", start_datetime, end_datetime, activity['duration']),
+            lambda: candidate_start_offsets(start_datetime, end_datetime, activity['duration']))
+        feasible_start_times = feasibility_cache.get_or_build(
+            ("wcsp", weather_key, start_datetime, end_datetime, activity['duration'], prefs),
+            lambda: tuple(offset for offset in possible_start_times if weather_constraint(offset, activity, weather_dict)))
+        # Offsets that would run into a fixed event are dropped in one pass, not by extra constraints
+        if grid.busy is not None and feasible_start_times:
+            offsets = np.array(feasible_start_times, dtype=np.int64)
+            starts = np.datetime64(start_datetime, 'us') + offsets * np.timedelta64(1, 'm')
+            feasible_start_times = tuple(offsets[grid.busy.available(starts, timedelta(hours=activity['duration']))].tolist())
+
+        # No start time suits the weather, so no schedule can exist
+        if not feasible_start_times:
+            return make_schedule("wcsp", (), time.time() - estart_time)
+
+        problem.addVariable(activity['name'], feasible_start_times)
+
+    # Custom constraint to ensure no overlapping activities (offsets and lengths in minutes)
+    def no_overlap(offset1, offset2, length1, length2):
+        # python-constraint runs the search, so progress and stop requests ride on its constraint checks
+        if control is not None:
+            control.tick()
+        return offset1 + length1 <= offset2 or offset1 >= offset2 + length2
+
+    # Apply the no_overlap constraint to all pairs of activities
+    for activity1 in activities:
+        for activity2 in activities:
+            if activity1 != activity2:
+                problem.addConstraint(lambda offset1, offset2, length1=activity1['duration'] * 60, length2=activity2['duration'] * 60:
+                                      no_overlap(offset1, offset2, length1, length2),
+                                      (activity1['name'], activity2['name']))
+
+    # Interchangeable activities must start in input order, so their swaps are never explored
+    classes = interchangeable_classes(activities)
+    for earlier, later in ordering_pairs(classes):
+        problem.addConstraint(lambda offset1, offset2: offset1 < offset2, (activities[earlier]['name'], activities[later]['name']))
+    hits_after, misses_after = cache_totals()
+    record_solve("wcsp", symmetry_classes=len(classes), symmetric_solutions_removed=symmetry_factor(classes),
+                 cache_hits=hits_after - hits_before, cache_misses=misses_after - misses_before)
+
+    # Function to calculate average weather data
+    def calculate_average_weather(activity_start, activity_duration, weather_dict):
+        activity_end = activity_start + timedelta(hours=activity_duration)
+        temp_sum = 0
+        rain_chance_sum = 0
+        count = 0
+
+        while activity_start < activity_end:
+            # Find the nearest hour for weather data
+            nearest_hour = activity_start.replace(minute=0, second=0, microsecond=0)
+            if activity_start.minute >= 30:  # Round up if past 30 minutes
+                nearest_hour += timedelta(hours=1)
+
+            weather_info = weather_dict.get(nearest_hour)
+            if weather_info is not None:  # Check if weather_info is not None
+                temp_sum += weather_info['temp_c']
+                rain_chance_sum += int(weather_info['precip_mm'])
+                count += 1
+            activity_start += timedelta(hours=1)
+
+        if count > 0:
+            avg_temp = temp_sum / count
+            avg_rain_chance = rain_chance_sum / count
+        else:
+            avg_temp = None
+            avg_rain_chance = None
+
+        return avg_temp, avg_rain_chance
+    
+    # Solve the problem; a first-solution search has nothing to return when stopped early
+    try:
+        solution = problem.getSolution()
+    except SolveInterrupted:
+        return make_schedule("wcsp", (), time.time() - estart_time, control=control)
+
+    if solution is None:
+        return make_schedule("wcsp", (), time.time() - estart_time)
+
+    # Convert solution to a more readable format and calculate average weather data
+    placements = []
+    for activity in activities:
+        start_time = start_datetime + timedelta(minutes=solution[activity['name']])
+        end_time = start_time + timedelta(hours=activity['duration'])
+        avg_temp, avg_rain_chance = calculate_average_weather(start_time, activity['duration'], weather_dict)
+        placements.append(Placement(activity['name'], start_time, end_time, average_temperature=avg_temp,
+                                    average_precip_mm=avg_rain_chance))
+    
+    eend_time = time.time()
+    # Calculate execution time
+    execution_time = eend_time - estart_time
+    print(f"Execution Time: {execution_time} seconds")
+    return make_schedule("wcsp", placements, execution_time)
+
+def solve_wcsp(activities, weather_data, start_datetime, end_datetime, busy=None):
+    grid = cached_weather_grid(weather_data, start_datetime, end_datetime, get_engine("wcsp").slot_minutes).with_busy(busy)
+    return legacy_result(schedule_wcsp(activities, grid))
+
+
+def plot_activity_timeline(schedule, planning_day, busy=None):
+    fig, ax = plt.subplots(figsize=(10, 3))
+
+    # Fixed events the schedule was planned around
+    for index, (start, end) in enumerate(busy or ()):
+        ax.axvspan(start, end, color='lightgrey', alpha=0.6, label='Fixed events' if index == 0 else None)
+
+    # Generate distinct colors for each activity
+    colors = list(mcolors.TABLEAU_COLORS.values())
+    color_idx = 0
+
+    for activity, details in schedule.items():
+        start = details['start']
+        end = details['end']
+        ax.plot([start, end], [1, 1], color=colors[color_idx], linewidth=6, label=activity)
+        color_idx = (color_idx + 1) % len(colors)
+
+    ax.set_yticks([])
+    ax.set_xlabel('Time')
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+    plt.xticks(rotation=45)
+    plt.title(f'Activity Timeline for {planning_day.strftime("%Y-%m-%d")}')
+    plt.grid(True)
+    plt.legend()
+
+    return fig
+
+
+def user_interface():
+    st.title("Activity Scheduler Using Weather Constraints and WCSP")
+    st.subheader("Enter Activities")
+    activities = []
+    activity_names = set()
+    activity_count = st.number_input("How many activities do you want to schedule?", min_value=1, max_value=10, step=1)
+
+    valid_input = True
+
+    for i in range(activity_count):
+        activity = add_activity_input(i)
+        if not activity['name']:
+            st.error("Activity name cannot be blank.")
+            valid_input = False
+        if activity['name'] in activity_names:
+            st.error(f"Activity name '{activity['name']}' is already used. Please use a unique name.")
+            valid_input = False
+        activity_names.add(activity['name'])
+        activities.append(activity)
+
+    st.subheader("Planning Day and Time")
+    planning_day = st.date_input("Select the Day for Planning", min_value=date.today())
+    start_time = st.time_input("Start Time", key="start_time")
+    end_time = st.time_input("End Time", key="end_time")
+    busy = fixed_events_input(planning_day)
+    solver = st.selectbox("Solver", ["wcsp", "milp", "multires", "robust", "pareto"], format_func=lambda name: get_engine(name).label, key="solver")
+    options = {}
+    if solver == "pareto":
+        options['comfort_range'] = st.slider("Comfortable temperature (°C)", -10.0, 40.0, COMFORT_RANGE_C, step=0.5, key="comfort_range")
+    deadline = st.number_input("Deadline (seconds)", min_value=1.0, max_value=600.0, value=DEFAULT_DEADLINE_SECONDS, step=1.0, key="deadline")
+
+    # Check for valid time inputs
+    if start_time > end_time:
+        st.error("Start time cannot be after end time.")
+        valid_input = False
+    horizon = default_weather_client(api_key).planning_horizon(location)
+    if planning_day > date.today() + timedelta(days=horizon - 1):
+        st.error(f"Date chosen must be within the next {horizon} days.")
+        valid_input = False
+
+    if st.button("Submit") and valid_input:
+        st.write("Scheduled Activities:")
+        for activity in activities:
+            st.write(activity)
+        
+        start_datetime = combine_date_time(planning_day, start_time)
+        end_datetime = combine_date_time(planning_day, end_time)
+
+        try:
+            weather_data = fetch_weather_data(api_key, location, planning_day.strftime("%Y-%m-%d"))
+        except WeatherSourceError as error:
+            st.error(f"Weather data for {planning_day} is unavailable: {error}")
+        else:
+            grid = build_weather_grid(weather_data, start_datetime, end_datetime).with_busy(busy)
+            start_job("solve_job", solver, activities, grid, deadline_seconds=deadline,
+                      context={'planning_day': planning_day, 'weather_notice': weather_notice(weather_data),
+                               'grid': grid, 'activities': activities, 'busy': grid.busy}, **options)
+
+    show_job("solve_job", show_schedule)
+    show_what_if(activities, planning_day, start_time, end_time, solver, deadline, horizon, valid_input, busy)
+
+
+# Compares the plan above with other start times and days in one batch, without a Submit per variant
+def show_what_if(activities, planning_day, start_time, end_time, solver, deadline, horizon, valid_input, busy=None):
+    with st.expander("What if: compare other start times and days"):
+        other_starts = st.multiselect("Other start times", [day_time(hour) for hour in range(5, 14)],
+                                      format_func=lambda start: start.strftime("%H:%M"), key="what_if_starts")
+        other_days = st.multiselect("Other days", [date.today() + timedelta(days=offset) for offset in range(horizon)],
+                                    key="what_if_days")
+        if not st.button("Compare", key="what_if_compare") or not valid_input:
+            return
+        days = sorted({planning_day, *other_days})
+        windows = sorted({(start_time, end_time), *((start, end_time) for start in other_starts if start < end_time)})
+        try:
+            weather = default_weather_client(api_key).get_days(location, days)
+        except WeatherSourceError as error:
+            st.error(f"Weather data is unavailable: {error}")
+            return
+        comparison = evaluate_scenarios(scenario_grid(days, windows, {"": activities}), weather, solver, deadline_seconds=deadline,
+                                        busy=busy)
+        st.dataframe(comparison.sort_values(['feasible', 'score'], ascending=False), hide_index=True)
+
+
+# Draws a finished solve started from the form above
+def show_schedule(job):
+    result = job.result
+    planning_day = job.context['planning_day']
+    wcsp_schedule, execution_time = result.as_dict(), result.execution_time
+
+    if not result.feasible:
+        st.write(result.message)
+    else:
+        # A multi-objective solve returns every trade-off it found; pick one to show without solving again
+        front = (result.report or {}).get('front')
+        if front:
+            st.write("Trade-offs found (no plan is better than another on every column):")
+            st.dataframe(pd.DataFrame([{
+                'plan': number + 1,
+                'weather_score': round(plan['weather_score'], 2),
+                'hours_outside_comfort': round(plan['comfort_degree_hours'], 1),
+                'idle_hours': round(plan['idle_hours'], 2),
+                'finish': plan['finish'].strftime('%H:%M'),
+            } for number, plan in enumerate(front)]), hide_index=True)
+            choice = st.selectbox("Plan to show", range(len(front)), format_func=lambda number: f"Plan {number + 1}", key="pareto_plan")
+            result = result._replace(placements=front[choice]['placements'])
+            wcsp_schedule = result.as_dict()
+        st.write("Optimized Schedule:")
+        for activity in wcsp_schedule:
+            start = wcsp_schedule[activity]['start']
+            end = wcsp_schedule[activity]['end']
+            avg_temp = wcsp_schedule[activity]['average_temperature']
+            if avg_temp is not None:
+                avg_temp = round(avg_temp, 1)
+            avg_rain_chance = wcsp_schedule[activity]['average_precip_mm']
+            if avg_rain_chance is not None:
+                avg_rain_chance = round(avg_rain_chance, 2)
+            st.write(f"{activity}: Start at {start.strftime('%Y-%m-%d %H:%M')}, End by {end.strftime('%Y-%m-%d %H:%M')}, Average Temperature: {avg_temp}°C, Precipitation: {avg_rain_chance}mm")
+
+        # Chance the plan holds when the rain does not follow the forecast exactly
+        robustness = schedule_robustness(job.context['grid'].view(get_engine(job.engine).slot_minutes), job.context['activities'], result)
+        st.write(f"Chance every activity stays within its weather preferences: {robustness['probability']:.0%} "
+                 f"(expected preference score {robustness['expected_score']:.2f} of 3, over {robustness['samples']:,} sampled days)")
+
+        # Display execution time
+        st.write(f"Execution Time: {execution_time:.2f} seconds")  # Display execution time
+
+        # Plot and display the activity timeline
+        fig = plot_activity_timeline(wcsp_schedule, planning_day, job.context.get('busy'))
+        st.pyplot(fig)
+
+# Main Function
+def main():
+    ensure_metrics_server()
+    show_warmup_status(server_warmup(api_key, (location,)))
+    user_interface()
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
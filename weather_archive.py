@@ -0,0 +1,254 @@
+# On-disk hourly weather archive: one fixed-stride array per location, memory-mapped with NumPy.
+# Opening reads only a small JSON index, so it costs the same for one site-year or fifty.
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from weather_grid import WeatherGrid
+from weather_source import weather_payload_to_rows
+
+# Constants and Global Variables
+DEFAULT_ARCHIVE_DIR = "archive"
+ARCHIVE_FIELDS = ("temp_c", "wind_kph", "humidity", "chance_of_rain", "precip_mm", "vis_km")
+HOURS_PER_DAY = 24
+ARCHIVE_DTYPE = np.float64  # Round-trips API values exactly, so class thresholds like 0.3 mm never shift
+BACKFILL_CHUNK_DAYS = 30  # Longest dt/end_dt range history.json accepts
+INDEX_FILE = "index.json"
+
+
+def location_slug(location):
+    return re.sub(r"[^a-z0-9]+", "_", location.lower()).strip("_") or "location"
+
+
+# Read-only {datetime: {field: value}} view over a slice of the archive, the same shape as hour_records.
+# Hours that were never filled are absent, so the solvers treat them like hours the API did not return.
+class ArchiveHours(Mapping):
+    def __init__(self, first_hour, block):
+        self.first_hour = first_hour
+        self.block = block
+        self._filled = ~np.isnan(block).all(axis=1)
+
+    def _offset(self, stamp):
+        if not isinstance(stamp, datetime) or stamp.minute or stamp.second or stamp.microsecond:
+            raise KeyError(stamp)
+        offset = (stamp - self.first_hour) // timedelta(hours=1)
+        if not 0 <= offset < len(self.block) or not self._filled[offset]:
+            raise KeyError(stamp)
+        return offset
+
+    def __getitem__(self, stamp):
+        values = self.block[self._offset(stamp)]
+        return MappingProxyType({field: float(value) for field, value in zip(ARCHIVE_FIELDS, values)})
+
+    def __iter__(self):
+        for offset in np.flatnonzero(self._filled):
+            yield self.first_hour + timedelta(hours=int(offset))
+
+    def __len__(self):
+        return int(self._filled.sum())
+
+
+class WeatherArchive:
+    def __init__(self, path=DEFAULT_ARCHIVE_DIR):
+        self.path = path
+        self._lock = threading.Lock()
+        self._arrays = {}
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as handle:
+                self.index = json.load(handle)
+            if tuple(self.index['fields']) != ARCHIVE_FIELDS:
+                raise ValueError(f"Archive at {path} stores {self.index['fields']}, expected {list(ARCHIVE_FIELDS)}")
+        else:
+            self.index = {'fields': list(ARCHIVE_FIELDS), 'locations': {}}
+
+    def locations(self):
+        return sorted(self.index['locations'])
+
+    # (first day, number of days) stored for a location, or None
+    def day_range(self, location):
+        entry = self.index['locations'].get(location)
+        if entry is None:
+            return None
+        return datetime.strptime(entry['first_day'], "%Y-%m-%d").date(), entry['n_days']
+
+    # (n_days, 24, fields) array for a location, mapped on first use and never read eagerly
+    def _array(self, location):
+        entry = self.index['locations'][location]
+        array = self._arrays.get(location)
+        if array is None or array.shape[0] != entry['n_days']:
+            array = np.memmap(os.path.join(self.path, entry['file']), dtype=ARCHIVE_DTYPE, mode='r',
+                              shape=(entry['n_days'], HOURS_PER_DAY, len(ARCHIVE_FIELDS)))
+            self._arrays[location] = array
+        return array
+
+    # Zero-copy (hours, fields) view of every stored hour from first_day through last_day
+    def hour_block(self, location, first_day, last_day):
+        stored = self.day_range(location)
+        if stored is None:
+            return datetime.combine(first_day, datetime.min.time()), np.zeros((0, len(ARCHIVE_FIELDS)), dtype=ARCHIVE_DTYPE)
+        stored_first, n_days = stored
+        begin = max((first_day - stored_first).days, 0)
+        end = min((last_day - stored_first).days + 1, n_days)
+        first_hour = datetime.combine(stored_first + timedelta(days=begin), datetime.min.time())
+        if end <= begin:
+            return first_hour, np.zeros((0, len(ARCHIVE_FIELDS)), dtype=ARCHIVE_DTYPE)
+        return first_hour, self._array(location)[begin:end].reshape(-1, len(ARCHIVE_FIELDS))
+
+    def hours(self, location, first_day, last_day):
+        first_hour, block = self.hour_block(location, first_day, last_day)
+        return ArchiveHours(first_hour, block)
+
+    def has_day(self, location, day):
+        return len(self.hours(location, day, day)) > 0
+
+    # Slot grid for a planning window, read straight from the mapped days it covers
+    def weather_grid(self, location, start_datetime, end_datetime, slot_minutes=15, scheme="precip"):
+        hours = self.hours(location, start_datetime.date(), end_datetime.date())
+        weather_key = "archive:" + hashlib.blake2b(np.ascontiguousarray(hours.block).tobytes(), digest_size=16).hexdigest()
+        return WeatherGrid(hours, start_datetime, end_datetime, slot_minutes, scheme, weather_key)
+
+    # One day as the hourly DataFrame fetch_weather_data returns (a copy; the grid path avoids it)
+    def day_frame(self, location, day):
+        hours = self.hours(location, day, day)
+        rows = []
+        for stamp in hours:
+            row = {'date': day.isoformat(), 'time': stamp.strftime("%Y-%m-%d %H:%M")}
+            row.update(hours[stamp])
+            rows.append(row)
+        weather_data = pd.DataFrame(rows, columns=['date', 'time'] + list(ARCHIVE_FIELDS))
+        weather_data['datetime'] = pd.to_datetime(weather_data['time'])
+        return weather_data
+
+    # Bulk append: every day in the frame is written in place, growing the location's file as needed
+    def append_frame(self, location, weather_data):
+        stamps = pd.DatetimeIndex(pd.to_datetime(weather_data['time'] if 'time' in weather_data.columns else weather_data['datetime']))
+        if not len(stamps):
+            return 0
+        days = np.array([stamp.date() for stamp in stamps])
+        values = np.column_stack([weather_data[field].to_numpy(dtype=ARCHIVE_DTYPE) if field in weather_data.columns
+                                  else np.full(len(stamps), np.nan, dtype=ARCHIVE_DTYPE) for field in ARCHIVE_FIELDS])
+
+        with self._lock:
+            first_day, n_days = self._reserve(location, min(days), max(days))
+            array = np.memmap(os.path.join(self.path, self.index['locations'][location]['file']), dtype=ARCHIVE_DTYPE,
+                              mode='r+', shape=(n_days, HOURS_PER_DAY, len(ARCHIVE_FIELDS)))
+            day_offsets = np.array([(day - first_day).days for day in days])
+            array[day_offsets, stamps.hour] = values
+            array.flush()
+            del array
+            self._arrays.pop(location, None)
+        return len(set(days))
+
+    def append_payload(self, location, data):
+        rows = []
+        for day_index, forecast_day in enumerate(data['forecast']['forecastday']):
+            rows.extend(weather_payload_to_rows(data, forecast_day['date'], day_index))
+        return self.append_frame(location, pd.DataFrame(rows))
+
+    # Grows the location's file to cover [first, last] and returns its (first day, n_days)
+    def _reserve(self, location, first, last):
+        os.makedirs(self.path, exist_ok=True)
+        entry = self.index['locations'].get(location)
+        day_bytes = HOURS_PER_DAY * len(ARCHIVE_FIELDS) * np.dtype(ARCHIVE_DTYPE).itemsize
+        empty_day = np.full((HOURS_PER_DAY, len(ARCHIVE_FIELDS)), np.nan, dtype=ARCHIVE_DTYPE).tobytes()
+
+        if entry is None:
+            entry = {'file': self._unique_file(location), 'first_day': first.isoformat(), 'n_days': 0}
+            open(os.path.join(self.path, entry['file']), 'wb').close()
+            self.index['locations'][location] = entry
+
+        path = os.path.join(self.path, entry['file'])
+        stored_first = datetime.strptime(entry['first_day'], "%Y-%m-%d").date() if entry['n_days'] else first
+        stored_last = stored_first + timedelta(days=entry['n_days'] - 1)
+
+        # Days before the stored range need a rewrite; that only happens when backfilling further into the past
+        if first < stored_first:
+            missing = (stored_first - first).days
+            with open(path, 'rb') as handle:
+                existing = handle.read()
+            with open(path + ".tmp", 'wb') as handle:
+                handle.write(empty_day * missing)
+                handle.write(existing)
+            os.replace(path + ".tmp", path)
+            stored_first = first
+        # Later days are appended at the end of the file
+        new_last = max(last, stored_last) if entry['n_days'] else last
+        n_days = (new_last - stored_first).days + 1
+        current_days = os.path.getsize(path) // day_bytes
+        if n_days > current_days:
+            with open(path, 'ab') as handle:
+                handle.write(empty_day * (n_days - current_days))
+
+        entry['first_day'] = stored_first.isoformat()
+        entry['n_days'] = n_days
+        self._write_index()
+        return stored_first, n_days
+
+    def _unique_file(self, location):
+        taken = {entry['file'] for entry in self.index['locations'].values()}
+        name = f"{location_slug(location)}.f64"
+        suffix = 1
+        while name in taken:
+            suffix += 1
+            name = f"{location_slug(location)}_{suffix}.f64"
+        return name
+
+    def _write_index(self):
+        index_path = os.path.join(self.path, INDEX_FILE)
+        with open(index_path + ".tmp", 'w') as handle:
+            json.dump(self.index, handle, indent=1, sort_keys=True)
+        os.replace(index_path + ".tmp", index_path)
+
+
+# Fetches history in month-sized chunks through the client, which writes every fetched day to its archive
+def backfill(client, location, first_day, last_day, chunk_days=BACKFILL_CHUNK_DAYS):
+    fetched = 0
+    day = first_day
+    while day <= last_day:
+        chunk_last = min(day + timedelta(days=chunk_days - 1), last_day)
+        fetched += len(client.get_days(location, [day + timedelta(days=offset) for offset in range((chunk_last - day).days + 1)]))
+        day = chunk_last + timedelta(days=1)
+    return fetched
+
+
+def main():
+    from weather_client import WeatherClient
+    from weather_source import default_weather_source
+
+    parser = argparse.ArgumentParser(description="Manage the memory-mapped hourly weather archive")
+    parser.add_argument("--archive", default=os.environ.get("WEATHER_ARCHIVE", DEFAULT_ARCHIVE_DIR))
+    commands = parser.add_subparsers(dest="command", required=True)
+    fill = commands.add_parser("backfill", help="fetch and store history for a location and date range")
+    fill.add_argument("location")
+    fill.add_argument("first_day")
+    fill.add_argument("last_day")
+    fill.add_argument("--api-key", default="")
+    commands.add_parser("info", help="list stored locations and day ranges")
+    args = parser.parse_args()
+
+    archive = WeatherArchive(args.archive)
+    if args.command == "backfill":
+        client = WeatherClient(default_weather_source(args.api_key), archive=archive,
+                               merge_history=os.environ.get("WEATHER_MERGE_HISTORY", "0") == "1")
+        first_day = datetime.strptime(args.first_day, "%Y-%m-%d").date()
+        last_day = datetime.strptime(args.last_day, "%Y-%m-%d").date()
+        days = backfill(client, args.location, first_day, last_day)
+        print(f"{args.location}: {days} days available, {client.upstream_calls} upstream requests")
+    else:
+        for location in archive.locations():
+            first_day, n_days = archive.day_range(location)
+            print(f"{location:<30}{first_day}  {n_days} days")
+
+
+if __name__ == "__main__":
+    main()
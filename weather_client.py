@@ -0,0 +1,225 @@
+# Weather client: picks history or forecast by date, merges contiguous days into as few upstream
+# requests as possible and caches every returned day on its own
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from weather_source import WeatherUnavailableError, default_weather_source, weather_payload_to_rows
+from problem_cache import LRUCache
+from metrics import weather_fallbacks_total, weather_fetch_failures_total, weather_fetch_seconds
+
+# Constants and Global Variables
+FORECAST_DAYS_LIMIT = 3          # Days the forecast endpoint returns on our plan, today included
+FORECAST_TTL_SECONDS = 60 * 60   # Forecast days are refreshed hourly; history never changes
+
+
+def as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+# Splits sorted dates into runs of consecutive days
+def contiguous_ranges(dates):
+    ranges = []
+    for day in sorted(set(dates)):
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [tuple(day_range) for day_range in ranges]
+
+
+class WeatherClient:
+    def __init__(self, source, forecast_days_limit=FORECAST_DAYS_LIMIT, merge_history=False,
+                 cache_size=256, forecast_ttl=FORECAST_TTL_SECONDS, today=date.today, archive=None, climatology=None):
+        self.source = source
+        # Optional ClimatologyIndex: days past the forecast horizon get expected weather instead of an error
+        self.climatology = climatology
+        # Optional WeatherArchive: past days are read from it and every fetched history response is added to it
+        self.archive = archive
+        self.forecast_days_limit = forecast_days_limit
+        # history.json only accepts an end_dt range on paid plans, so past days are fetched one per request by default
+        self.merge_history = merge_history
+        self.forecast_ttl = forecast_ttl
+        self.today = today
+        self.cache = LRUCache("weather_days", cache_size)
+        self.upstream_calls = 0
+        self._lock = threading.Lock()  # Guards upstream_calls and _in_flight; the day cache has its own lock
+        self._in_flight = {}  # (endpoint, params) -> {'done': Event, 'error': exception or None} while fetching
+
+    # Upstream requests (endpoint, params) needed to cover `days`: history one per contiguous run where possible,
+    # and a single forecast request, since the forecast endpoint always starts today
+    def plan_requests(self, location, days):
+        today = self.today()
+        requests_needed = []
+        for first, last in contiguous_ranges(day for day in days if day < today):
+            if self.merge_history:
+                params = {"q": location, "dt": first.isoformat()}
+                if last > first:
+                    params["end_dt"] = last.isoformat()
+                requests_needed.append(("history.json", params))
+            else:
+                requests_needed.extend(("history.json", {"q": location, "dt": (first + timedelta(days=offset)).isoformat()})
+                                       for offset in range((last - first).days + 1))
+        forecast_days = [day for day in days if day >= today]
+        if forecast_days:
+            horizon = (max(forecast_days) - today).days + 1
+            if horizon > self.forecast_days_limit:
+                raise ValueError(f"{max(forecast_days)} is beyond the {self.forecast_days_limit}-day forecast horizon")
+            requests_needed.append(("forecast.json", {"q": location, "days": horizon}))
+        return requests_needed
+
+    # Days ahead (today included) that can be planned for a location
+    def planning_horizon(self, location):
+        if self.climatology is not None and self.climatology.covers(location):
+            from climatology import CLIMATOLOGY_HORIZON_DAYS
+            return CLIMATOLOGY_HORIZON_DAYS
+        return self.forecast_days_limit
+
+    def _cached(self, location, day, allow_stale=False):
+        entry = self.cache.get((location, day))
+        if entry is None:
+            return None
+        fetched_at, weather_data, is_forecast = entry
+        if is_forecast and time.time() - fetched_at > self.forecast_ttl and not allow_stale:
+            return None
+        return weather_data
+
+    # Weather for a day upstream could not serve: the last forecast fetched for it, else climatology.
+    # The frame is marked in attrs so pages can say what the plan is based on.
+    def _fallback(self, location, day, error):
+        weather_data = self._cached(location, day, allow_stale=True)
+        if weather_data is not None:
+            weather_data = weather_data.copy(deep=False)
+            weather_data.attrs = {'source': "stale", 'fallback': str(error)}
+        elif self.climatology is not None and self.climatology.covers(location):
+            weather_data = self.climatology.expected_frame(location, day)
+            weather_data.attrs['fallback'] = str(error)
+        else:
+            return None
+        weather_fallbacks_total.inc(source=weather_data.attrs['source'])
+        return weather_data
+
+    # One upstream request, stored per day; returns the WeatherUnavailableError when retries, rate limit or
+    # quota gave out, so the days it covered can fall back
+    def _fetch(self, location, endpoint, params):
+        fetch_started = time.perf_counter()
+        try:
+            data = self.source.get(endpoint, params)
+        except WeatherUnavailableError as error:
+            weather_fetch_failures_total.inc(endpoint=endpoint, error=type(error).__name__)
+            return error
+        except Exception as error:
+            weather_fetch_failures_total.inc(endpoint=endpoint, error=type(error).__name__)
+            raise
+        finally:
+            weather_fetch_seconds.observe(time.perf_counter() - fetch_started, endpoint=endpoint)
+        with self._lock:
+            self.upstream_calls += 1
+        self._store(location, data, is_forecast=endpoint == "forecast.json")
+        if self.archive is not None and endpoint == "history.json":
+            self.archive.append_payload(location, data)
+        return None
+
+    # Hourly weather DataFrames for every requested day, keyed by date
+    def get_days(self, location, days):
+        days = [as_date(day) for day in days]
+        last_forecast_day = self.today() + timedelta(days=self.forecast_days_limit - 1)
+        result = {}
+        missing = []
+        for day in days:
+            # Beyond the forecast horizon, plan on climatology; once the day comes within range the forecast takes over
+            if day > last_forecast_day and self.climatology is not None and self.climatology.covers(location):
+                result[day] = self.climatology.expected_frame(location, day)
+                continue
+            weather_data = self._cached(location, day)
+            if weather_data is None and self.archive is not None and day < self.today() and self.archive.has_day(location, day):
+                weather_data = self.archive.day_frame(location, day)
+                self.cache.put((location, day), (time.time(), weather_data, False))
+            if weather_data is None:
+                missing.append(day)
+            else:
+                result[day] = weather_data
+
+        # Fetched outside the lock, so one slow request or retry backoff does not hold up other locations and
+        # days; a request already in flight in another thread is waited for instead of sent again
+        unavailable = None
+        for endpoint, params in self.plan_requests(location, missing):
+            request_key = (endpoint, tuple(sorted(params.items())))
+            with self._lock:
+                in_flight = self._in_flight.get(request_key)
+                owner = in_flight is None
+                if owner:
+                    in_flight = self._in_flight[request_key] = {'done': threading.Event(), 'error': None}
+            if not owner:
+                in_flight['done'].wait()
+                if isinstance(in_flight['error'], WeatherUnavailableError):
+                    unavailable = in_flight['error']
+                elif in_flight['error'] is not None:
+                    raise in_flight['error']
+                continue
+            try:
+                in_flight['error'] = self._fetch(location, endpoint, params)
+            except Exception as error:
+                in_flight['error'] = error
+                raise
+            finally:
+                with self._lock:
+                    del self._in_flight[request_key]
+                in_flight['done'].set()
+            unavailable = in_flight['error'] or unavailable
+
+        for day in missing:
+            weather_data = self._cached(location, day)
+            if weather_data is None and unavailable is not None:
+                weather_data = self._fallback(location, day, unavailable)
+                if weather_data is None:
+                    raise unavailable
+            if weather_data is None:
+                raise LookupError(f"WeatherAPI returned no data for {location} on {day}")
+            result[day] = weather_data
+        return result
+
+    def get_day(self, location, day):
+        return self.get_days(location, [day])[as_date(day)]
+
+    # Split a (possibly multi-day) response into one cached DataFrame per day
+    def _store(self, location, data, is_forecast):
+        fetched_at = time.time()
+        for day_index, forecast_day in enumerate(data['forecast']['forecastday']):
+            day_string = forecast_day['date']
+            weather_data = pd.DataFrame(weather_payload_to_rows(data, day_string, day_index))
+            weather_data['datetime'] = pd.to_datetime(weather_data['time'])
+            self.cache.put((location, as_date(day_string)), (fetched_at, weather_data, is_forecast))
+
+
+_default_clients = {}
+_default_clients_lock = threading.Lock()
+
+
+# One shared client per API key, so every page and solver reuses the same per-day cache.
+# WEATHER_ARCHIVE points it at a memory-mapped history archive, WEATHER_CLIMATOLOGY at a climatology index.
+# WEATHER_MERGE_HISTORY=1 fetches consecutive past days in one request, which needs a paid plan.
+def default_weather_client(api_key):
+    with _default_clients_lock:
+        if api_key not in _default_clients:
+            archive_path = os.environ.get("WEATHER_ARCHIVE")
+            archive = None
+            if archive_path:
+                from weather_archive import WeatherArchive
+                archive = WeatherArchive(archive_path)
+            climatology_path = os.environ.get("WEATHER_CLIMATOLOGY")
+            climatology = None
+            if climatology_path:
+                from climatology import ClimatologyIndex
+                climatology = ClimatologyIndex(climatology_path)
+            merge_history = os.environ.get("WEATHER_MERGE_HISTORY", "0") == "1"
+            _default_clients[api_key] = WeatherClient(default_weather_source(api_key), merge_history=merge_history,
+                                                      archive=archive, climatology=climatology)
+        return _default_clients[api_key]
@@ -0,0 +1,267 @@
+# Slot-indexed weather grid shared by the array-based scheduling engines
+import hashlib
+import math
+from datetime import timedelta
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+# Constants and Global Variables
+WEATHER_CLASSES = ("Sunny", "Cloudy", "Rainy")
+WEATHER_FIELDS = ("temp_c", "chance_of_rain", "precip_mm")
+NO_MATCH = len(WEATHER_CLASSES)  # Rank of a slot whose weather matches none of the preferences
+PREFERENCE_SCORES = np.array([3.0, 2.0, 1.0, 0.0])  # Score by rank, same 3/2/1 scale as the CP-Net
+
+
+# Same thresholds as weather_condition_check in wcsp.py
+def classify_precip(precip_mm):
+    return {
+        "Sunny": precip_mm == 0,
+        "Cloudy": (precip_mm >= 0) & (precip_mm <= 0.3),
+        "Rainy": precip_mm > 0.3,
+    }
+
+
+# Same thresholds as weather_condition_check in csp.py
+def classify_chance_of_rain(chance_of_rain):
+    return {
+        "Sunny": chance_of_rain < 20,
+        "Cloudy": (chance_of_rain >= 20) & (chance_of_rain <= 70),
+        "Rainy": chance_of_rain > 70,
+    }
+
+
+CLASSIFICATION_SCHEMES = {
+    "precip": ("precip_mm", classify_precip),
+    "chance_of_rain": ("chance_of_rain", classify_chance_of_rain),
+}
+
+
+# CSP and CP-Net activities carry a single preference, WCSP activities an ordered list
+def preference_list(weather):
+    if isinstance(weather, str):
+        return [weather]
+    return list(weather)
+
+
+# Start slots where an activity of `length` slots does not touch an occupied slot
+def free_starts(occupied, length):
+    busy = np.concatenate(([0], np.cumsum(occupied)))
+    return (busy[length:] - busy[:-length]) == 0
+
+
+# Stable content hash of a day's weather, so identical data maps to the same cache entries
+def weather_fingerprint(weather_data):
+    columns = [column for column in ('datetime',) + WEATHER_FIELDS if column in weather_data.columns]
+    hashed = pd.util.hash_pandas_object(weather_data[columns], index=False).to_numpy()
+    return hashlib.blake2b(hashed.tobytes(), digest_size=16).hexdigest()
+
+
+# Read-only {datetime: {field: value}} view of the hourly rows every engine reads from
+def hour_records(weather_data):
+    fields = [field for field in WEATHER_FIELDS if field in weather_data.columns]
+    stamps = pd.to_datetime(weather_data['datetime'])
+    values = {field: weather_data[field].to_numpy(dtype=float) for field in fields}
+    return MappingProxyType({
+        stamp.to_pydatetime(): MappingProxyType({field: float(values[field][position]) for field in fields})
+        for position, stamp in enumerate(stamps)
+    })
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+# Immutable once built: grids are cached and shared between engines and Streamlit sessions
+class WeatherGrid:
+    def __init__(self, weather_data, start_datetime, end_datetime, slot_minutes=15, scheme="precip", weather_key=None):
+        # A DataFrame is parsed once; views of the same day pass the parsed hours on instead
+        if isinstance(weather_data, pd.DataFrame):
+            weather_key = weather_key if weather_key is not None else weather_fingerprint(weather_data)
+            weather_data = hour_records(weather_data)
+        self.hours = weather_data
+        self.weather_key = weather_key
+        self.start_datetime = start_datetime
+        self.end_datetime = end_datetime
+        self.slot_minutes = slot_minutes
+        self.scheme = scheme
+        self._views = {}
+
+        total_minutes = int((end_datetime - start_datetime).total_seconds() // 60)
+        self.n_slots = max(total_minutes // slot_minutes, 0)
+
+        # Hour of each slot, counted from the hour the planning window starts in
+        slot_offsets = np.arange(self.n_slots) * slot_minutes
+        self.slot_hour = _read_only((start_datetime.minute + slot_offsets) // 60)
+        n_hours = int(self.slot_hour[-1]) + 1 if self.n_slots else 0
+
+        first_hour = start_datetime.replace(minute=0, second=0, microsecond=0)
+        hourly = {field: np.full(n_hours, np.nan) for field in WEATHER_FIELDS}
+        for stamp, record in self.hours.items():
+            offset = (stamp.replace(minute=0, second=0, microsecond=0) - first_hour) // timedelta(hours=1)
+            if 0 <= offset < n_hours:
+                for field in WEATHER_FIELDS:
+                    hourly[field][offset] = record.get(field, np.nan)
+        self.hourly = MappingProxyType({field: _read_only(values) for field, values in hourly.items()})
+
+        # Per-slot weather values (NaN where the API returned nothing for that hour)
+        self.temp_c = _read_only(hourly["temp_c"][self.slot_hour])
+        self.chance_of_rain = _read_only(hourly["chance_of_rain"][self.slot_hour])
+        self.precip_mm = _read_only(hourly["precip_mm"][self.slot_hour])
+        self.known = _read_only(~np.isnan(self.precip_mm))
+
+        # Hours without data never rule a slot out, matching the dict lookups in the solvers
+        field, classify = CLASSIFICATION_SCHEMES[scheme]
+        values = getattr(self, field)
+        self.class_masks = MappingProxyType({name: _read_only(mask | ~self.known) for name, mask in classify(values).items()})
+
+        # Fixed events are added with with_busy(); a grid built from weather alone has none
+        self.busy = None
+        self.blocked = _read_only(np.zeros(self.n_slots, dtype=bool))
+        self._frozen = True
+
+    # A grid over arrays that already exist (slices of a parent grid, a shared-memory block); nothing is recomputed.
+    # `busy` is a BusyIntervals already clipped to the window, or None.
+    @classmethod
+    def from_arrays(cls, hours, weather_key, start_datetime, end_datetime, slot_minutes, scheme, slot_hour, hourly,
+                    slot_values, class_masks, busy=None):
+        grid = cls.__new__(cls)
+        grid.hours = hours
+        grid.weather_key = weather_key
+        grid.start_datetime = start_datetime
+        grid.end_datetime = end_datetime
+        grid.slot_minutes = slot_minutes
+        grid.scheme = scheme
+        grid._views = {}
+        grid.n_slots = int(slot_hour.size)
+        grid.slot_hour = _read_only(slot_hour)
+        grid.hourly = MappingProxyType({field: _read_only(values) for field, values in hourly.items()})
+        for field in WEATHER_FIELDS:
+            setattr(grid, field, _read_only(slot_values[field]))
+        grid.known = _read_only(~np.isnan(grid.precip_mm))
+        grid.class_masks = MappingProxyType({name: _read_only(mask) for name, mask in class_masks.items()})
+        grid.busy = busy
+        grid.blocked = _read_only(busy.blocked_slots(start_datetime, slot_minutes, grid.n_slots) if busy is not None
+                                  else np.zeros(grid.n_slots, dtype=bool))
+        grid._frozen = True
+        return grid
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError(f"WeatherGrid is immutable, cannot set '{name}'")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"WeatherGrid is immutable, cannot delete '{name}'")
+
+    # The same day and window at another slot size or classification scheme, without re-reading the weather
+    def view(self, slot_minutes=None, scheme=None):
+        slot_minutes = self.slot_minutes if slot_minutes is None else slot_minutes
+        scheme = self.scheme if scheme is None else scheme
+        if (slot_minutes, scheme) == (self.slot_minutes, self.scheme):
+            return self
+        key = (slot_minutes, scheme)
+        if key not in self._views:
+            if self.busy is not None:
+                self._views[key] = self.without_busy().view(slot_minutes, scheme).with_busy(self.busy)
+            else:
+                self._views[key] = WeatherGrid(self.hours, self.start_datetime, self.end_datetime, slot_minutes, scheme, self.weather_key)
+        return self._views[key]
+
+    # Another planning window on the same day's weather, at this grid's slot size and scheme
+    def window(self, start_datetime, end_datetime):
+        if (start_datetime, end_datetime) == (self.start_datetime, self.end_datetime):
+            return self
+        key = ("window", start_datetime, end_datetime)
+        if key not in self._views:
+            if self.busy is not None:
+                self._views[key] = self.without_busy().window(start_datetime, end_datetime).with_busy(self.busy)
+            else:
+                self._views[key] = (self._slice(start_datetime, end_datetime)
+                                    or WeatherGrid(self.hours, start_datetime, end_datetime, self.slot_minutes, self.scheme, self.weather_key))
+        return self._views[key]
+
+    # This grid with fixed events (a BusyIntervals, clipped to the window) that no placement may overlap, in place
+    # of any it had; None or no events inside the window gives the grid without them. Weather arrays are shared.
+    def with_busy(self, busy):
+        busy = busy.clip(self.start_datetime, self.end_datetime) if busy is not None else None
+        busy = busy if busy else None
+        if (busy.key if busy is not None else None) == self.busy_key:
+            return self
+        plain = self.without_busy()
+        if busy is None:
+            return plain
+        grid = WeatherGrid.from_arrays(plain.hours, plain.weather_key, plain.start_datetime, plain.end_datetime, plain.slot_minutes,
+                                       plain.scheme, plain.slot_hour, plain.hourly, {field: getattr(plain, field) for field in WEATHER_FIELDS},
+                                       plain.class_masks, busy)
+        grid._views[("busy", None)] = plain
+        return grid
+
+    def without_busy(self):
+        return self._views[("busy", None)] if self.busy is not None else self
+
+    # Fingerprint of the fixed events inside the window, None without any
+    @property
+    def busy_key(self):
+        return self.busy.key if self.busy is not None else None
+
+    # A window on this grid's slot boundaries and inside it is a set of slices of this grid's arrays, with no copy;
+    # None for any other window
+    def _slice(self, start_datetime, end_datetime):
+        slot = timedelta(minutes=self.slot_minutes)
+        offset = start_datetime - self.start_datetime
+        n_slots = max(int((end_datetime - start_datetime).total_seconds() // 60) // self.slot_minutes, 0)
+        if offset < timedelta(0) or offset % slot or not n_slots or offset // slot + n_slots > self.n_slots:
+            return None
+        slots = slice(offset // slot, offset // slot + n_slots)
+        first_hour = int(self.slot_hour[slots.start])
+        slot_hour = self.slot_hour[slots] - first_hour if first_hour else self.slot_hour[slots]
+        hours = slice(first_hour, first_hour + int(slot_hour[-1]) + 1)
+        return WeatherGrid.from_arrays(self.hours, self.weather_key, start_datetime, end_datetime, self.slot_minutes, self.scheme,
+                                       slot_hour, {field: values[hours] for field, values in self.hourly.items()},
+                                       {field: getattr(self, field)[slots] for field in WEATHER_FIELDS},
+                                       {name: mask[slots] for name, mask in self.class_masks.items()})
+
+    def slot_time(self, slot):
+        return self.start_datetime + timedelta(minutes=int(slot) * self.slot_minutes)
+
+    def duration_slots(self, duration_hours):
+        return int(math.ceil(round(duration_hours * 60 / self.slot_minutes, 9)))
+
+    # Index of the first preference each slot satisfies, NO_MATCH if none
+    def preference_ranks(self, preferences):
+        ranks = np.full(self.n_slots, NO_MATCH, dtype=np.int64)
+        for rank, preference in reversed(list(enumerate(preference_list(preferences)))):
+            ranks[self.class_masks[preference]] = rank
+        return ranks
+
+    # Feasibility and mean preference score of every start slot for an activity of `length` slots
+    def placement_scores(self, preferences, length):
+        n_starts = self.n_slots - length + 1
+        if length <= 0 or n_starts <= 0:
+            return np.zeros(0, dtype=bool), np.zeros(0)
+        ranks = self.preference_ranks(preferences)
+        misses = np.concatenate(([0], np.cumsum(ranks == NO_MATCH)))
+        scores = np.concatenate(([0.0], np.cumsum(PREFERENCE_SCORES[ranks])))
+        feasible = (misses[length:] - misses[:-length]) == 0
+        if self.busy is not None:
+            feasible &= free_starts(self.blocked, length)
+        return feasible, (scores[length:] - scores[:-length]) / length
+
+    def window_average(self, values, start_slot, length):
+        window = values[start_slot:start_slot + length]
+        window = window[~np.isnan(window)]
+        if window.size == 0:
+            return None
+        return float(window.mean())
+
+    # Schedule entry in the same shape solve_wcsp returns
+    def describe_placement(self, start_slot, length):
+        return {
+            'start': self.slot_time(start_slot),
+            'end': self.slot_time(start_slot + length),
+            'average_temperature': self.window_average(self.temp_c, start_slot, length),
+            'average_precip_mm': self.window_average(self.precip_mm, start_slot, length),
+        }
@@ -0,0 +1,327 @@
+# Weather Sources: live WeatherAPI calls, recording to and replaying from a fixture archive
+import json
+import os
+import random
+import threading
+import time
+import zipfile
+from datetime import date
+from urllib.parse import urlencode
+
+import requests
+
+from metrics import weather_quota_remaining, weather_retries_total
+
+# Constants and Global Variables
+API_BASE_URL = "http://api.weatherapi.com/v1"
+DEFAULT_FIXTURE_ARCHIVE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "weather_fixtures.zip")
+WEATHER_SOURCE_MODES = ("live", "record", "replay")
+REQUEST_TIMEOUT = (3.05, 10.0)       # (connect, read) seconds for one upstream request
+MAX_ATTEMPTS = 4                     # First try plus three retries
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 8.0            # Longest single wait, Retry-After included
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+API_RATE_PER_SECOND = 5.0            # Sustained request rate we allow ourselves against WeatherAPI
+API_BURST = 10
+DAILY_QUOTA = 30_000                 # Free plan: 1M calls a month, spread evenly over the days
+RATE_LIMIT_WAIT_SECONDS = 5.0        # Longest a request queues for a rate-limit token before giving up
+QUOTA_ERROR_CODES = frozenset({2007})  # WeatherAPI "API key has exceeded calls per month quota"
+
+
+class FixtureNotFoundError(LookupError):
+    pass
+
+
+class WeatherSourceError(RuntimeError):
+    pass
+
+
+# The API answered with an error that retrying will not fix (bad key, unknown location, malformed payload)
+class WeatherAPIError(WeatherSourceError):
+    def __init__(self, message, status=None, code=None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+# Upstream could not be reached in time: retries used up, rate limiter saturated or quota spent.
+# Callers can fall back to cached or climatology weather.
+class WeatherUnavailableError(WeatherSourceError):
+    pass
+
+
+class QuotaExhaustedError(WeatherUnavailableError):
+    pass
+
+
+# Token bucket: `rate` requests per second on average, bursts of up to `capacity`
+class TokenBucket:
+    def __init__(self, rate=API_RATE_PER_SECOND, capacity=API_BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    # Takes one token, waiting up to `timeout` seconds for it; False if none came in time
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else self.clock() + timeout
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - self.clock()
+                if remaining < wait:
+                    return False
+            self.sleep(wait)
+
+
+# Calls left today on our plan; resets when the date changes.
+# Counted per process, so several processes sharing a key should split the budget between them.
+class DailyQuota:
+    def __init__(self, limit=DAILY_QUOTA, today=date.today):
+        self.limit = limit
+        self.today = today
+        self._day = today()
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def _roll(self):
+        if self.today() != self._day:
+            self._day = self.today()
+            self._used = 0
+
+    @property
+    def remaining(self):
+        with self._lock:
+            self._roll()
+            return max(self.limit - self._used, 0)
+
+    def consume(self):
+        with self._lock:
+            self._roll()
+            if self._used >= self.limit:
+                raise QuotaExhaustedError(f"Daily weather quota of {self.limit} calls is spent")
+            self._used += 1
+            weather_quota_remaining.set(self.limit - self._used)
+
+    # Upstream reported the key out of calls; stop spending until tomorrow
+    def exhaust(self):
+        with self._lock:
+            self._roll()
+            self._used = self.limit
+            weather_quota_remaining.set(0)
+
+
+# Exponential backoff with full jitter; a Retry-After from the server is honoured up to the cap
+class RetryPolicy:
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_CAP_SECONDS,
+                 rng=None, sleep=time.sleep):
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.rng = rng or random.Random()
+        self.sleep = sleep
+
+    def delay(self, attempt, retry_after=None):
+        delay = self.rng.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.cap))
+        return delay
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+# Fetches raw JSON payloads from api.weatherapi.com with timeouts, retries, rate limiting and a daily quota.
+# The session keeps connections alive between requests.
+class LiveWeatherSource:
+    mode = "live"
+
+    def __init__(self, api_key, base_url=API_BASE_URL, timeout=REQUEST_TIMEOUT, retry=None,
+                 rate_limiter=None, quota=None, rate_limit_wait=RATE_LIMIT_WAIT_SECONDS, session=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retry = retry or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.quota = quota
+        self.rate_limit_wait = rate_limit_wait
+        self.session = session or requests.Session()
+
+    # Exception text can carry the request URL; keep the key out of logs and error messages
+    def _redact(self, text):
+        return str(text).replace(self.api_key, "***") if self.api_key else str(text)
+
+    def get(self, endpoint, params):
+        url = f"{self.base_url}/{endpoint}?{urlencode({'key': self.api_key, **params})}"
+        failure = None
+        for attempt in range(self.retry.max_attempts):
+            if self.rate_limiter is not None and not self.rate_limiter.acquire(self.rate_limit_wait):
+                raise WeatherUnavailableError(f"Rate limit: no request slot for {endpoint} within {self.rate_limit_wait:.0f} s")
+            if self.quota is not None:
+                self.quota.consume()
+
+            retry_after = None
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                reason, failure = type(error).__name__, self._redact(error)
+            else:
+                if response.status_code in RETRY_STATUSES:
+                    reason, failure = str(response.status_code), f"HTTP {response.status_code}"
+                    retry_after = _retry_after(response)
+                else:
+                    try:
+                        return self._payload(endpoint, response)
+                    except ValueError:
+                        # A proxy or truncated body, not a WeatherAPI answer; worth another try
+                        reason, failure = "invalid_json", f"HTTP {response.status_code} with a non-JSON body"
+
+            weather_retries_total.inc(endpoint=endpoint, reason=reason)
+            if attempt + 1 < self.retry.max_attempts:
+                self.retry.sleep(self.retry.delay(attempt, retry_after))
+        raise WeatherUnavailableError(f"{endpoint} failed after {self.retry.max_attempts} attempts: {failure}")
+
+    def _payload(self, endpoint, response):
+        payload = response.json()
+        if not isinstance(payload, dict):
+            raise WeatherAPIError(f"{endpoint} returned an unexpected payload", response.status_code)
+        if "error" in payload:
+            error = payload["error"] if isinstance(payload["error"], dict) else {"message": str(payload["error"])}
+            if error.get("code") in QUOTA_ERROR_CODES:
+                if self.quota is not None:
+                    self.quota.exhaust()
+                raise QuotaExhaustedError(f"WeatherAPI quota exceeded: {error.get('message', '')}")
+            raise WeatherAPIError(f"WeatherAPI error {error.get('code')}: {self._redact(error.get('message', ''))}",
+                                  response.status_code, error.get("code"))
+        if not response.ok:
+            raise WeatherAPIError(f"{endpoint} returned HTTP {response.status_code}", response.status_code)
+        if not isinstance(payload.get("forecast"), dict) or "forecastday" not in payload["forecast"]:
+            raise WeatherAPIError(f"{endpoint} response has no forecast days", response.status_code)
+        return payload
+
+
+# Compressed archive of raw API responses, one JSON member per (endpoint, params) pair
+class FixtureArchive:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def member_name(endpoint, params):
+        # The API key is never part of the fixture name, so recordings are shareable
+        query = urlencode(sorted((k, v) for k, v in params.items() if k != "key"))
+        return f"{endpoint}/{query}.json"
+
+    def names(self):
+        if not os.path.exists(self.path):
+            return []
+        with zipfile.ZipFile(self.path) as archive:
+            return archive.namelist()
+
+    def load(self, endpoint, params):
+        name = self.member_name(endpoint, params)
+        if not os.path.exists(self.path):
+            raise FixtureNotFoundError(f"No fixture archive at {self.path}")
+        with zipfile.ZipFile(self.path) as archive:
+            try:
+                return json.loads(archive.read(name))
+            except KeyError:
+                raise FixtureNotFoundError(f"No recorded response for {name} in {self.path}") from None
+
+    def save(self, endpoint, params, payload):
+        name = self.member_name(endpoint, params)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with zipfile.ZipFile(self.path, mode="a", compression=zipfile.ZIP_DEFLATED) as archive:
+                # Zip members cannot be replaced in place; the first recording of a request wins
+                if name in archive.namelist():
+                    return
+                archive.writestr(name, json.dumps(payload))
+
+
+# Calls the live API and stores every response in the fixture archive
+class RecordingWeatherSource:
+    mode = "record"
+
+    def __init__(self, api_key, archive, **live_options):
+        self.live = LiveWeatherSource(api_key, **live_options)
+        self.archive = archive
+
+    def get(self, endpoint, params):
+        # Error payloads (bad key, quota exceeded) raise before reaching the archive
+        payload = self.live.get(endpoint, params)
+        self.archive.save(endpoint, params, payload)
+        return payload
+
+
+# Serves responses from the fixture archive only, without touching the network
+class ReplayWeatherSource:
+    mode = "replay"
+
+    def __init__(self, archive):
+        self.archive = archive
+        self._cache = {}
+
+    def get(self, endpoint, params):
+        name = self.archive.member_name(endpoint, params)
+        if name not in self._cache:
+            self._cache[name] = self.archive.load(endpoint, params)
+        return self._cache[name]
+
+
+def make_weather_source(mode, api_key="", archive_path=DEFAULT_FIXTURE_ARCHIVE, **live_options):
+    if mode == "live":
+        return LiveWeatherSource(api_key, **live_options)
+    if mode == "record":
+        return RecordingWeatherSource(api_key, FixtureArchive(archive_path), **live_options)
+    if mode == "replay":
+        return ReplayWeatherSource(FixtureArchive(archive_path))
+    raise ValueError(f"Unknown weather source mode '{mode}', expected one of {WEATHER_SOURCE_MODES}")
+
+
+# Picks the source from the environment so benchmarks can switch modes without code changes.
+# WEATHER_API_BASE_URL points live calls elsewhere (a local stub server); WEATHER_RATE_PER_SECOND and
+# WEATHER_DAILY_QUOTA match the limits to the API plan.
+def default_weather_source(api_key):
+    mode = os.environ.get("WEATHER_SOURCE_MODE", "live")
+    archive_path = os.environ.get("WEATHER_FIXTURE_ARCHIVE", DEFAULT_FIXTURE_ARCHIVE)
+    if mode == "replay":
+        return make_weather_source(mode, api_key, archive_path)
+    rate = float(os.environ.get("WEATHER_RATE_PER_SECOND", API_RATE_PER_SECOND))
+    return make_weather_source(mode, api_key, archive_path,
+                               base_url=os.environ.get("WEATHER_API_BASE_URL", API_BASE_URL),
+                               rate_limiter=TokenBucket(rate, max(API_BURST, rate)),
+                               quota=DailyQuota(int(os.environ.get("WEATHER_DAILY_QUOTA", DAILY_QUOTA))))
+
+
+# Converts a raw history/forecast payload into the hourly DataFrame the solvers expect
+def weather_payload_to_rows(data, selected_date, day_index=0):
+    rows = []
+    for hour in data['forecast']['forecastday'][day_index]['hour']:
+        rows.append({
+            'date': selected_date,
+            'time': hour['time'],
+            'temp_c': hour['temp_c'],
+            'wind_kph': hour['wind_kph'],
+            'humidity': hour['humidity'],
+            'chance_of_rain': hour['chance_of_rain'],
+            'precip_mm': hour['precip_mm'],
+            'vis_km': hour['vis_km'],
+        })
+    return rows
@@ -0,0 +1,193 @@
+# Local stand-in for WeatherAPI that injects faults on demand: 429s, 5xx errors, slow or dropped
+# responses, garbage bodies and an exhausted quota. Point WEATHER_API_BASE_URL at it to exercise the client.
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Constants and Global Variables
+DEFAULT_STUB_PORT = 8765
+FAULT_KINDS = ("ok", "429", "500", "503", "slow", "drop", "garbage", "quota", "invalid_key")
+RANDOM_FAULTS = ("429", "500", "503", "slow", "drop", "garbage")
+SLOW_SECONDS = 15.0  # Longer than the client's read timeout unless a fault says otherwise ("slow:2")
+RETRY_AFTER_SECONDS = 1
+
+
+# Same shape as a forecast/history response: dry mornings, a cloudy early afternoon, evening rain
+def stub_payload(location, first_day, n_days):
+    forecast_days = []
+    for offset in range(n_days):
+        day = first_day + timedelta(days=offset)
+        rng = random.Random(day.toordinal())
+        hours = []
+        for hour in range(24):
+            if hour < 12:
+                precip_mm, chance_of_rain = 0.0, 10
+            elif hour < 16:
+                precip_mm, chance_of_rain = 0.2, 50
+            else:
+                precip_mm, chance_of_rain = 1.0, 80
+            hours.append({
+                'time': f"{day.isoformat()} {hour:02d}:00",
+                'temp_c': round(12 + 8 * rng.random() + (4 if 10 <= hour <= 17 else 0), 1),
+                'wind_kph': round(5 + 15 * rng.random(), 1),
+                'humidity': rng.randint(40, 90),
+                'chance_of_rain': chance_of_rain,
+                'precip_mm': precip_mm,
+                'vis_km': 10.0,
+            })
+        forecast_days.append({'date': day.isoformat(), 'hour': hours})
+    return {'location': {'name': location}, 'forecast': {'forecastday': forecast_days}}
+
+
+# Which fault each request gets: scripted faults first, in order, then random ones at `fault_rate`
+class FaultPlan:
+    def __init__(self, script=(), fault_rate=0.0, seed=0):
+        self.script = deque(parse_fault(fault) for fault in script)
+        self.fault_rate = fault_rate
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            if self.script:
+                return self.script.popleft()
+            if self.fault_rate and self.rng.random() < self.fault_rate:
+                return (self.rng.choice(RANDOM_FAULTS), None)
+            return ("ok", None)
+
+
+# "slow:2.5" -> ("slow", 2.5); other faults take no argument
+def parse_fault(fault):
+    kind, _, argument = fault.partition(":")
+    if kind not in FAULT_KINDS:
+        raise ValueError(f"Unknown fault '{kind}', expected one of {FAULT_KINDS}")
+    return kind, float(argument) if argument else None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        stub = self.server.stub
+        url = urlsplit(self.path)
+        endpoint = url.path.rsplit("/", 1)[-1]
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        kind, argument = stub.plan.next()
+        stub.log(endpoint, params, kind)
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        if endpoint not in ("forecast.json", "history.json"):
+            self._json(400, {'error': {'code': 1005, 'message': "API request url is invalid."}})
+        elif kind == "429":
+            self._json(429, {'error': {'code': 429, 'message': "Too many requests."}},
+                       {'Retry-After': str(RETRY_AFTER_SECONDS)})
+        elif kind in ("500", "503"):
+            self._json(int(kind), {'error': {'code': 9999, 'message': "Internal application error."}})
+        elif kind == "drop":
+            # Close without answering; the client sees the connection reset mid-request
+            self.close_connection = True
+        elif kind == "garbage":
+            self._send(200, b"<html>upstream proxy error</html>", "text/html")
+        elif kind == "quota":
+            self._json(403, {'error': {'code': 2007, 'message': "API key has exceeded calls per month quota."}})
+        elif kind == "invalid_key":
+            self._json(401, {'error': {'code': 2006, 'message': "API key provided is invalid"}})
+        else:
+            if kind == "slow":
+                time.sleep(SLOW_SECONDS if argument is None else argument)
+            self._json(200, self._weather(endpoint, params))
+
+    def _weather(self, endpoint, params):
+        location = params.get('q', "")
+        if endpoint == "history.json":
+            first_day = datetime.strptime(params['dt'], "%Y-%m-%d").date()
+            last_day = datetime.strptime(params.get('end_dt', params['dt']), "%Y-%m-%d").date()
+            return stub_payload(location, first_day, (last_day - first_day).days + 1)
+        return stub_payload(location, self.server.stub.today(), int(params.get('days', 1)))
+
+    def _json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload).encode(), "application/json", headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client timed out and hung up first
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Runs the stub on a background thread; port 0 picks a free port. `requests` records (endpoint, params, fault).
+class StubWeatherServer:
+    def __init__(self, port=0, faults=(), fault_rate=0.0, latency=0.0, seed=0, host="127.0.0.1", today=date.today):
+        self.plan = FaultPlan(faults, fault_rate, seed)
+        self.latency = latency
+        self.today = today
+        self.requests = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def log(self, endpoint, params, fault):
+        with self._lock:
+            self.requests.append((endpoint, params, fault))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="weather-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake WeatherAPI responses with injected faults")
+    parser.add_argument("--port", type=int, default=DEFAULT_STUB_PORT)
+    parser.add_argument("--faults", default="", help=f"comma-separated faults served first, in order: {', '.join(FAULT_KINDS)} (slow:SECONDS)")
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="share of later requests given a random transient fault")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stub = StubWeatherServer(args.port, [fault for fault in args.faults.split(",") if fault], args.fault_rate, args.latency, args.seed)
+    print(f"Stub WeatherAPI on {stub.base_url}; run the apps with WEATHER_API_BASE_URL={stub.base_url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+
+
+if __name__ == "__main__":
+    main()